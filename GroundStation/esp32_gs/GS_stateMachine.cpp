@@ -124,13 +124,13 @@ void GS_stateMachine(void *parameter)
 				}
 
 				// Print received data to serial
-				printData("PACKET: ", rx_data, rx_data_size);
+				reportPacket(rx_data, rx_data_size);
 
 				// Report RSSI and SNR if available
 				float RSSI = radio.getRSSI();
 				float SNR = radio.getSNR();
 				float freq_shift = radio.getFrequencyError();
-				Serial.printf("RSSI: %.2f SNR: %.2f dF: %.2f\n", RSSI, SNR, freq_shift);
+				reportRadio(RSSI, SNR, freq_shift);
 
 				// Reset to idle state after processing packet
 				GS_state = GS_IDLE;
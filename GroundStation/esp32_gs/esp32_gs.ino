@@ -31,7 +31,8 @@ TaskHandle_t RTOS_handle_GS_StateMachine;
 void setup()
 {
 	// Initialize serial port
-	Serial.begin(9600);
+	Serial.setRxBufferSize(SERIAL_RX_BUFFER_SIZE);
+	Serial.begin(SERIAL_BAUD_DEFAULT);
 	Serial.println("");
 	printStartupMessage("SETUP");
 		
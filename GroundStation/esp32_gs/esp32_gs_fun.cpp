@@ -83,18 +83,135 @@ void printPacket(const char* prefix, const Packet* packet)
 }
 
 
+// ---------------------------------
+// SERIAL FRAMING
+// ---------------------------------
+
+// Serial output mode, text lines until the PC asks for binary frames
+bool serial_binary = false;
+
+// CRC-16/CCITT (polynomial 0x1021, initial value 0xFFFF)
+uint16_t crc16CCITT(const uint8_t* data, uint16_t length)
+{
+	uint16_t crc = 0xFFFF;
+	for (uint16_t i = 0; i < length; ++i)
+	{
+		crc ^= (uint16_t)data[i] << 8;
+		for (uint8_t bit = 0; bit < 8; ++bit)
+		{
+			crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+		}
+	}
+	return crc;
+}
+
+// Send a binary frame on serial
+void sendFrame(uint8_t kind, const uint8_t* payload, uint8_t length)
+{
+	uint8_t frame[SERIAL_FRAME_HEADER_LENGTH + 255 + SERIAL_FRAME_CRC_LENGTH];
+
+	frame[0] = SERIAL_FRAME_SYNC_0;
+	frame[1] = SERIAL_FRAME_SYNC_1;
+	frame[2] = kind;
+	frame[3] = length;
+	memcpy(frame + SERIAL_FRAME_HEADER_LENGTH, payload, length);
+
+	uint16_t crc = crc16CCITT(frame + 2, length + 2);
+	frame[SERIAL_FRAME_HEADER_LENGTH + length] = crc >> 8;
+	frame[SERIAL_FRAME_HEADER_LENGTH + length + 1] = crc & 0xFF;
+
+	// Single write, so the frame is not split by other serial output
+	Serial.write(frame, SERIAL_FRAME_HEADER_LENGTH + length + SERIAL_FRAME_CRC_LENGTH);
+}
+
+// Report received packet
+void reportPacket(const uint8_t* data, uint8_t length)
+{
+	if (serial_binary)
+	{
+		sendFrame(SERIAL_FRAME_PACKET, data, length);
+	}
+	else
+	{
+		printData("PACKET: ", data, length);
+	}
+}
+
+// Report RSSI, SNR and frequency shift of the last packet
+void reportRadio(float rssi, float snr, float freq_shift)
+{
+	if (serial_binary)
+	{
+		float values[3] = {rssi, snr, freq_shift};
+		uint8_t payload[sizeof(values)];
+		for (uint8_t i = 0; i < 3; ++i)
+		{
+			uint32_t bits;
+			memcpy(&bits, &values[i], sizeof(bits));
+			payload[4 * i] = bits >> 24;
+			payload[4 * i + 1] = (bits >> 16) & 0xFF;
+			payload[4 * i + 2] = (bits >> 8) & 0xFF;
+			payload[4 * i + 3] = bits & 0xFF;
+		}
+		sendFrame(SERIAL_FRAME_RSSI, payload, sizeof(payload));
+	}
+	else
+	{
+		Serial.printf("RSSI: %.2f SNR: %.2f dF: %.2f\n", rssi, snr, freq_shift);
+	}
+}
+
+// Report a radio error
+void reportRadioError(const char* message)
+{
+	if (serial_binary)
+	{
+		sendFrame(SERIAL_FRAME_RADIO_ERROR, (const uint8_t*)message, strlen(message));
+	}
+	else
+	{
+		Serial.printf("RADIO error: %s\n", message);
+	}
+}
+
+
 // ---------------------------------
 // HELPER FUNCTIONS
 // ---------------------------------
 
+// Queue a packet received from serial for transmission
+void queueTEC(const uint8_t* data, uint8_t data_len)
+{
+	if (data_len > 0)
+	{
+		Packet packet;
+		dataToPacket(data, data_len, &packet);
+
+		if (packet.state == PACKET_ERR_NONE)
+		{
+			xQueueSend(RTOS_queue_TX, &packet, 0);
+			Serial.printf("Packet queued (%d bytes): ", data_len);
+			printData("", data, data_len);
+		}
+		else
+		{
+			Serial.printf("Invalid packet. Error: %d\n", packet.state);
+		}
+	}
+	else
+	{
+		Serial.println("PACKET error: No valid data");
+	}
+}
+
 // Process commands in serial input TODO: maybe this should not be part of GS state machine
 void handleSerialInput()
 {
 	const uint16_t timeout_ms = 20; // max silence threshold between bytes
 	const uint16_t max_wait_ms = 200; // max wait time for full line
 
-	uint8_t buffer[PACKET_SIZE_MAX + 1]; // null-terminated buffer
-	uint8_t length = 0;
+	uint8_t buffer[SERIAL_BUFFER_SIZE + 1]; // null-terminated buffer
+	uint16_t length = 0;
 
 	// Wait until something is available
 	if (!Serial.available())
@@ -103,9 +220,9 @@ void handleSerialInput()
 	uint32_t start_time = millis();
 
 	// Read data until silence or timeout
-	while ((millis() - start_time < max_wait_ms) && length < PACKET_SIZE_MAX)
+	while ((millis() - start_time < max_wait_ms) && length < SERIAL_BUFFER_SIZE)
 	{
-		while (Serial.available() && length < PACKET_SIZE_MAX)
+		while (Serial.available() && length < SERIAL_BUFFER_SIZE)
 		{
 			buffer[length++] = Serial.read();
 			start_time = millis(); // reset timeout on new byte
@@ -113,6 +230,35 @@ void handleSerialInput()
 		vTaskDelay(pdMS_TO_TICKS(timeout_ms)); // brief silence wait
 	}
 
+	// Binary TEC frame
+	if (length >= SERIAL_FRAME_HEADER_LENGTH && buffer[0] == SERIAL_FRAME_SYNC_0 && buffer[1] == SERIAL_FRAME_SYNC_1)
+	{
+		uint8_t payload_length = buffer[3];
+		uint16_t frame_length = SERIAL_FRAME_HEADER_LENGTH + payload_length + SERIAL_FRAME_CRC_LENGTH;
+		if (length < frame_length)
+		{
+			Serial.println("FRAME error: incomplete frame");
+			return;
+		}
+
+		uint16_t crc = ((uint16_t)buffer[frame_length - 2] << 8) | buffer[frame_length - 1];
+		if (crc16CCITT(buffer + 2, payload_length + 2) != crc)
+		{
+			Serial.println("FRAME error: CRC mismatch");
+			return;
+		}
+
+		if (buffer[2] == SERIAL_FRAME_TEC)
+		{
+			queueTEC(buffer + SERIAL_FRAME_HEADER_LENGTH, payload_length);
+		}
+		else
+		{
+			Serial.printf("FRAME error: unexpected kind 0x%02X\n", buffer[2]);
+		}
+		return;
+	}
+
 	buffer[length] = '\0';  // null-terminate for safety
 	String line = String((char*)buffer);
     line.trim();  // remove leading/trailing whitespace, newlines
@@ -155,34 +301,40 @@ void handleSerialInput()
 			power = (int8_t)params[4].toInt();
 
 			// Apply settings
+			char message[64];
 			int8_t state = radio.setFrequency(freq_mhz);
 			if (state != 0)
 			{
-				Serial.printf("RADIO error: failed to apply F %.2f (error: %d)\n", freq_mhz, state);
+				snprintf(message, sizeof(message), "failed to apply F %.2f (error: %d)", freq_mhz, state);
+				reportRadioError(message);
 			}
 
 			state = radio.setBandwidth(bw_khz);
 			if (state != 0)
 			{
-				Serial.printf("RADIO error: failed to apply BW %.2f (error: %d)\n", bw_khz, state);
+				snprintf(message, sizeof(message), "failed to apply BW %.2f (error: %d)", bw_khz, state);
+				reportRadioError(message);
 			}
 
 			state = radio.setSpreadingFactor(sf);
 			if (state != 0)
 			{
-				Serial.printf("RADIO error: failed to apply SF %u (error: %d)\n", sf, state);
+				snprintf(message, sizeof(message), "failed to apply SF %u (error: %d)", sf, state);
+				reportRadioError(message);
 			}
 			
 			state = radio.setCodingRate(cr);
 			if (state != 0)
 			{
-				Serial.printf("RADIO error: failed to apply CR %u (error: %d)\n", cr, state);
+				snprintf(message, sizeof(message), "failed to apply CR %u (error: %d)", cr, state);
+				reportRadioError(message);
 			}
 
 			state = radio.setOutputPower(power);
 			if (state != 0)
 			{
-				Serial.printf("RADIO error: failed to apply Power %d (error: %d)\n", power, state);
+				snprintf(message, sizeof(message), "failed to apply Power %d (error: %d)", power, state);
+				reportRadioError(message);
 			}
 
 			// Report all values
@@ -190,7 +342,7 @@ void handleSerialInput()
 		}
 		else
 		{
-			Serial.println("RADIO error: expected 5 parameters (F, BW, SF, CR, Power)");
+			reportRadioError("expected 5 parameters (F, BW, SF, CR, Power)");
 		}
 	}
 	// Handle command line
@@ -235,26 +387,40 @@ void handleSerialInput()
 			}
 		}
 
-		if (data_len > 0)
-		{
-			Packet packet;
-			dataToPacket(data, data_len, &packet);
+		queueTEC(data, data_len);
+	}
+	// Handle serial mode line
+	else if (line.startsWith("SERIAL:"))
+	{
+		line = line.substring(7); // remove "SERIAL:"
+		line.trim();
 
-			if (packet.state == PACKET_ERR_NONE)
+		if (line.startsWith("BAUD"))
+		{
+			uint32_t baud = line.substring(4).toInt();
+			if (baud == 9600 || baud == 57600 || baud == 115200 || baud == 230400 || baud == 460800 || baud == 921600)
 			{
-				xQueueSend(RTOS_queue_TX, &packet, 0);
-				Serial.printf("Packet queued (%d bytes): ", data_len);
-				printData("", data, data_len);
+				// Reply at the old rate, then switch
+				Serial.printf("SERIAL baud: %lu\n", baud);
+				Serial.flush();
+				Serial.updateBaudRate(baud);
 			}
 			else
 			{
-				Serial.printf("Invalid packet. Error: %d\n", packet.state);
+				Serial.printf("SERIAL error: unsupported baud rate %lu\n", baud);
 			}
+			return;
 		}
-		else
+
+		if (line == "BINARY")
+		{
+			serial_binary = true;
+		}
+		else if (line == "TEXT")
 		{
-			Serial.println("PACKET error: No valid data");
+			serial_binary = false;
 		}
+		Serial.printf("SERIAL mode: %s\n", serial_binary ? "BINARY" : "TEXT");
 	}
 
 	// Display error
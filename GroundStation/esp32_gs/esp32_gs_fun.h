@@ -113,9 +113,47 @@ void printPacket(const char* prefix, const Packet* packet);
 // HELPER FUNCTIONS
 // ---------------------------------
 
+// Serial input configuration
+#define SERIAL_BUFFER_SIZE 400 // [bytes] max size of a serial input (hex TEC line of a full packet)
+#define SERIAL_RX_BUFFER_SIZE 1024 // [bytes] size of the UART driver RX buffer
+#define SERIAL_BAUD_DEFAULT 9600 // [baud] rate at boot, changed with "SERIAL: BAUD <rate>"
+
 // Process commands in serial input
 void handleSerialInput();
 
+// Queue a packet received from serial for transmission
+void queueTEC(const uint8_t* data, uint8_t data_len);
+
+
+// ---------------------------------
+// SERIAL FRAMING
+// ---------------------------------
+
+// Binary frames, enabled by "SERIAL: BINARY" (text commands are accepted in both modes)
+// Frame: sync (2 bytes) - kind - payload length - payload - CRC-16/CCITT of kind, length and payload (big-endian)
+#define SERIAL_FRAME_SYNC_0 0xA5
+#define SERIAL_FRAME_SYNC_1 0x5A
+#define SERIAL_FRAME_HEADER_LENGTH 4 // [bytes] sync + kind + length
+#define SERIAL_FRAME_CRC_LENGTH 2 // [bytes] CRC at the end of the frame
+#define SERIAL_FRAME_PACKET 0x01 // received packet (GS -> PC)
+#define SERIAL_FRAME_RSSI 0x02 // RSSI, SNR, frequency shift as big-endian float (GS -> PC)
+#define SERIAL_FRAME_RADIO_ERROR 0x03 // radio error message (GS -> PC)
+#define SERIAL_FRAME_TEC 0x04 // packet to transmit (PC -> GS)
+
+// Serial output mode
+extern bool serial_binary;
+
+// CRC-16/CCITT (polynomial 0x1021, initial value 0xFFFF)
+uint16_t crc16CCITT(const uint8_t* data, uint16_t length);
+
+// Send a binary frame on serial
+void sendFrame(uint8_t kind, const uint8_t* payload, uint8_t length);
+
+// Report received packet, radio values and radio errors as frames or text lines depending on the serial mode
+void reportPacket(const uint8_t* data, uint8_t length);
+void reportRadio(float rssi, float snr, float freq_shift);
+void reportRadioError(const char* message);
+
 
 // ---------------------------------
 // RADIO FUNCTIONS
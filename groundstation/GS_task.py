@@ -4,7 +4,9 @@ from pyparsing import line
 import serial
 import serial.tools.list_ports
 
-from datetime import datetime
+import math
+import time
+from datetime import datetime, timedelta
 
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QColor
@@ -12,17 +14,57 @@ from PyQt5.QtCore import *
 
 import hmac
 import hashlib
+import binascii
 import traceback
+from types import MappingProxyType
+from collections import namedtuple, deque, OrderedDict
+import numpy as np
+
+try:
+	from . import payload_codec as pc
+except ImportError:
+	import payload_codec as pc
 
 
 # ========== CONSTANTS AND CONFIGURATION ==========
 
 RX_TIMEOUT = 5  # seconds to wait for a reply after sending a TEC
 
+# TEC pipeline configuration
+TEC_WINDOW = 2 # [TECs] maximum TECs waiting for a reply, the satellite command queue holds CMD_QUEUE_SIZE = 2
+TEC_MAX_RETRIES = 2 # retransmissions of a TEC after a timeout or a NACK caused by the link
+TEC_TX_TURNAROUND = 0.25 # [s] serial link, satellite processing and radio switching: the next TEC leaves this long after the time on air of a TEC and its reply
+TEC_TIMEOUTS = {} # [s] reply timeout of specific task codes, estimated from the link for the others
+
+# Link timing configuration
+LORA_PREAMBLE_LENGTH = 8 # [symbols] PREAMBLE_LENGTH of the GS and satellite firmware
+LORA_LDRO_SYMBOL_TIME = 0.016 # [s] RadioLib enables the low data rate optimization from this symbol time
+RTT_ALPHA = 1 / 8 # smoothed RTT gain (RFC 6298)
+RTT_BETA = 1 / 4 # RTT variation gain (RFC 6298)
+RTT_K = 4 # RTT variations added to the smoothed RTT
+RTT_PROCESSING = 1.5 # [s] first guess of the delay not spent on air (serial links, satellite processing)
+RTO_MIN = 1.0 # [s]
+RTO_MAX = 60.0 # [s]
+
+# TEC scheduler configuration
+SCHEDULER_AOS_MARGIN = 30.0 # [s] wait after AOS before the first TEC, the link is poor at low elevation
+SCHEDULER_LOS_MARGIN = 15.0 # [s] the reply of the last TEC must arrive this long before LOS
+
 # Packet configuration
 PACKET_HEADER_LENGTH = 12 # 4 bytes for header + 4 bytes for MAC + 4 bytes for timestamp
+PACKET_HEADER_STRUCT = struct.Struct(">BBBBII") # station ID, ECC flag, TEC/TER, payload length, timestamp, MAC
+PACKET_MAC_ZERO = bytes(4) # MAC field while the MAC is computed
 PACKET_PAYLOAD_MAX = 98  # maximum payload length in bytes
 
+# Fragmentation configuration: payloads longer than PACKET_PAYLOAD_MAX travel as numbered segments
+SEGMENT_HEADER_STRUCT = struct.Struct(">BHHII") # transfer ID, sequence number, number of segments, byte offset, CRC-32 of the payload
+SEGMENT_HEADER_LENGTH = SEGMENT_HEADER_STRUCT.size # 13 bytes
+SEGMENT_DATA_MAX = PACKET_PAYLOAD_MAX - SEGMENT_HEADER_LENGTH # [bytes] data carried by one segment
+SEGMENT_COUNT_MAX = 0xFFFF # maximum number of segments of a transfer
+REASSEMBLY_TIMEOUT = 3600.0 # [s] a transfer receiving no segment for this long is dropped
+REASSEMBLY_TRANSFERS = 16 # maximum number of transfers reassembled at the same time, the idle ones are dropped first
+REASSEMBLY_COMPLETED_WINDOW = 600.0 # [s] late segments of a completed transfer are recognized for this long
+
 # MAC configuration
 SECRET_KEY = 0xA1B2C3D4
 
@@ -33,6 +75,13 @@ BYTE_TX_OFF = 0x00
 BYTE_TX_ON = 0x01
 BYTE_TX_NOBEACON = 0x02
 
+# Reed-Solomon configuration, as in the firmware (rscode-1.3 library)
+RS_BLOCK_SIZE = 16 # [bytes] size of RS codeword (data + parity)
+RS_NPAR = 2 # [bytes] parity bytes per codeword, corrects 1 byte per codeword
+RS_DATA_BLOCK_SIZE = RS_BLOCK_SIZE - RS_NPAR # [bytes] size of data block
+RS_PADDING = 0x00 # padding of the last data block
+RS_PRIMITIVE_POLY = 0x11D # x^8 + x^4 + x^3 + x^2 + 1
+
 # Error codes
 PACKET_ERR_NONE = 0
 PACKET_ERR_RS = -1
@@ -58,6 +107,72 @@ PACKET_ERR_DESCRIPTION = {
 	PACKET_ERR_CMD_MEMORY: "Memory allocation error during command execution"
 }
 
+# Serial line prefixes sent by the GS firmware
+SERIAL_PREFIX_PACKET = "PACKET:"
+SERIAL_PREFIX_RSSI = "RSSI:"
+SERIAL_PREFIX_RADIO_ERROR = "RADIO error:"
+SERIAL_PREFIX_RADIO_SETTINGS = "RADIO settings:" # GS firmware reply after applying a RADIO command
+
+# Binary serial framing, negotiated with "SERIAL: BINARY" (text lines stay valid in both modes)
+# Frame: sync (2 bytes) - kind - payload length - payload - CRC-16/CCITT of kind, length and payload (big-endian)
+SERIAL_FRAME_SYNC = b"\xA5\x5A" # not valid ASCII, never found in text lines
+SERIAL_FRAME_HEADER_LENGTH = 4 # sync + kind + length
+SERIAL_FRAME_CRC_LENGTH = 2
+SERIAL_FRAME_CRC_INIT = 0xFFFF
+SERIAL_FRAME_PACKET = 0x01 # packet received by the GS (GS -> PC)
+SERIAL_FRAME_RSSI = 0x02 # radio report of the last packet: RSSI, SNR, frequency shift (GS -> PC)
+SERIAL_FRAME_RADIO_ERROR = 0x03 # radio error message (GS -> PC)
+SERIAL_FRAME_TEC = 0x04 # packet to transmit (PC -> GS)
+SERIAL_FRAME_RSSI_STRUCT = struct.Struct(">fff")
+SERIAL_LINE_MAX = 1024 # [bytes] longer text without a newline is split
+SERIAL_BUFFER_COMPACT = 4096 # [bytes] parsed bytes kept at the start of the RX buffer before compacting it
+
+# Serial link speed: the GS boots at SERIAL_BAUD_DEFAULT and switches after "SERIAL: BAUD <rate>"
+SERIAL_BAUD_DEFAULT = 9600
+SERIAL_BAUD_RATES = (9600, 57600, 115200, 230400, 460800, 921600) # rates accepted by the GS firmware
+SERIAL_BAUD_COMMAND = "SERIAL: BAUD {}\n" # request to the GS firmware
+SERIAL_PREFIX_BAUD = "SERIAL baud:" # GS firmware reply, sent at the old rate just before switching
+SERIAL_READ_TIMEOUT = 0.05 # [s] maximum wait of the reader thread when nothing is received
+
+# Serial mode negotiation
+SERIAL_BINARY_ENABLE = True # request binary frames when connecting, the GS stays in text mode if it does not reply
+SERIAL_MODE_TEXT = "TEXT"
+SERIAL_MODE_BINARY = "BINARY"
+SERIAL_MODE_COMMAND = "SERIAL: {}\n" # request to the GS firmware
+SERIAL_PREFIX_MODE = "SERIAL mode:" # GS firmware reply with the active mode
+SERIAL_PREFIX_ERROR = "SERIAL error:" # GS firmware reply to a SERIAL command it does not accept
+
+# Serial link setup: the GS is probed until it replies, it may still be booting after the reset when the port is opened
+SERIAL_PROBE_COMMAND = SERIAL_MODE_COMMAND.format(SERIAL_MODE_TEXT) # harmless request, answered with "SERIAL mode: TEXT"
+SERIAL_PROBE_INTERVAL = 1.0 # [s] wait before repeating the probe
+SERIAL_PROBE_TIMEOUT = 15.0 # [s] no reply: the link is left at the default rate in text mode
+SERIAL_REPLY_TIMEOUT = 1.0 # [s] wait for the reply to a SERIAL command, no baud reply: the GS stays at the default rate
+
+# Serial RX queue configuration
+SERIAL_RX_QUEUE_SIZE = 1024 # maximum number of RX events buffered between reader thread and GUI
+SERIAL_RX_BATCH_SIZE = 64 # maximum number of RX events handled per GUI update
+
+# RX duplicate and replay filter
+RX_DEDUP_WINDOW = 600.0 # [s] a packet received again within this time is a duplicate (radio repeats, other stations)
+RX_DEDUP_ENTRIES = 4096 # maximum number of packets remembered, the oldest are forgotten first
+RX_REPLAY_WINDOW = None # [s] maximum distance of the TX timestamp from the GS clock, None: not checked (the satellite clock restarts from 2025-01-01 at boot)
+
+# RX event kinds produced by the serial reader
+RX_EVENT_LINE = 0 # generic line, only shown in the serial console
+RX_EVENT_PACKET = 1 # packet decoded: data is the Packet
+RX_EVENT_RSSI = 2 # radio report of the last packet: data is (rssi, snr, freq_shift)
+RX_EVENT_RADIO_ERROR = 3 # radio error reported by the GS firmware: data is the line
+RX_EVENT_ERROR = 4 # line could not be parsed or decoded: data is the error message
+RX_EVENT_SERIAL_MODE = 5 # serial mode confirmed by the GS firmware: data is SERIAL_MODE_TEXT or SERIAL_MODE_BINARY
+RX_EVENT_SERIAL_BAUD = 6 # baud rate change confirmed by the GS firmware: data is the new rate
+RX_EVENT_RADIO_SETTINGS = 7 # radio settings applied by the GS firmware: data is the LoRaConfig
+RX_EVENT_MAC_ERROR = 8 # packet rejected, its MAC does not match: data is the Packet
+RX_EVENT_DUPLICATE = 9 # packet rejected, already received: data is the Packet
+RX_EVENT_REPLAY = 10 # packet rejected, TX timestamp outside the replay window: data is the Packet
+
+# RX event: kind - rx_time (UTC datetime) - raw line - parsed data - packet bytes (packets only)
+RxEvent = namedtuple("RxEvent", ["kind", "rx_time", "line", "data", "packet_bytes"])
+
 # Source codes for transmission
 TX_SOURCES = {
 	"RedPill": 0x01,
@@ -87,6 +202,8 @@ TEC_LORA_CONFIG = 0x19 # send LoRa configuration command
 TEC_LORA_PING = 0x1A # send LoRa ping status command
 
 TEC_CRY_EXP = 0x80 # execute crystals experiment command
+TEC_PICTURE_DOWNLOAD = 0xC1 # picture download command
+TEC_DOWNLOAD = 0xC2 # file download command
 
 # TEC_TASKS labels
 TEC_TASKS = {
@@ -108,8 +225,8 @@ TEC_TASKS = {
 	"Crystals experiment": TEC_CRY_EXP,
 	"Execute B": 133,
 	# DT
-	"Picture download": 193,
-	"Download": 194
+	"Picture download": TEC_PICTURE_DOWNLOAD,
+	"Download": TEC_DOWNLOAD
 }
 
 # TER task codes definitions
@@ -117,6 +234,7 @@ TER_BEACON = 0x30 # telemetry beacon reply
 TER_ACK = 0x31 # ACK reply
 TER_NACK = 0x32 # NACK reply
 TER_LORA_PING = 0x33 # LoRa ping state reply
+TER_DOWNLOAD = 0x34 # chunk of a downloaded file
 
 # TER_TASKS labels
 TER_TASKS = {
@@ -124,7 +242,9 @@ TER_TASKS = {
 	"Beacon": TER_BEACON,
 	"ACK": TER_ACK,
 	"NACK": TER_NACK,
-	"LoRa ping": TER_LORA_PING
+	"LoRa ping": TER_LORA_PING,
+	# DT
+	"Download data": TER_DOWNLOAD
 }
 
 # Input form configs (label, widget_type, optional widget args)
@@ -190,220 +310,110 @@ INPUT_FIELDS_CONFIG = {
 
 # ============= GUI HELPER FUNCTIONS =============
 
-# Compute HMAC-SHA256 and return first 4 bytes as uint32
-def hmac_mac(key_int, message: bytes) -> int:
-	"""Compute HMAC-SHA256 and return first 4 bytes as uint32: key_int - message"""
-	# Convert 32-bit integer key to bytes
-	key_bytes = key_int.to_bytes(4, byteorder='big')
-
-	# Compute HMAC-SHA256 and return first 4 bytes as uint32
-	mac = hmac.new(key_bytes, message, hashlib.sha256).digest()
-	return int.from_bytes(mac[:4], byteorder='big')
-
-# ============= PACKET FUNCTIONS =================
-
-# Build the payload based on type index and task name
-def build_payload(tec_code, input_widgets):
-	"""Build the payload based on TEC code and input widgets dictionary: tec_code - input_widgets"""
-
-	if tec_code == TEC_OBC_REBOOT:
-		payload = b''
-
-	elif tec_code == TEC_EXIT_STATE:
-		from_state = input_widgets["From state:"].value() & 0x0F
-		to_state = input_widgets["To state:"].value() & 0x0F
-		byte_val = (from_state << 4) | to_state
-		payload = bytes([byte_val])
-
-	elif tec_code == TEC_VAR_CHANGE:
-		address = input_widgets["Address:"].value() & 0xFF
-		value = input_widgets["Value:"].value() & 0xFF
-		payload = bytes([address, value])
-
-	elif tec_code == TEC_SET_TIME:
-		dt_widget = input_widgets["Date and Time:"]
-		qdt = dt_widget.dateTime()  # QDateTime object
-		unix_time = int(qdt.toSecsSinceEpoch())  # convert to UNIX timestamp (int)
-		payload = unix_time.to_bytes(4, byteorder='big')
-	
-	elif tec_code == TEC_EPS_REBOOT:
-		payload = b''
-
-	elif tec_code == TEC_ADCS_REBOOT:
-		payload = b''
-
-	elif tec_code == TEC_ADCS_TLE:
-		tle_data = input_widgets["TLE Data:"].toPlainText().strip()
-		tle_lines = tle_data.splitlines()
-		if len(tle_lines) < 2:
-			raise ValueError("TLE Data must contain two lines")
-
-		tle_line1 = tle_lines[0]
-		tle_line2 = tle_lines[1]
-
-		# Validate TLE lengths
-		if len(tle_line1) != 69 or len(tle_line2) != 69:
-			raise ValueError("TLE lines must be 69 characters long")
-
-		try:
-			epoch_year = int(tle_line1[18:20])
-			epoch_year += 2000 if epoch_year < 57 else 1900
-			epoch_day = float(tle_line1[20:32])
-			mm_dot = float(tle_line1[33:43])
-			mm_ddot = float(f"{tle_line1[44:50].strip()}e{tle_line1[50:52]}")
-			bstar = float(f"{tle_line1[53:59].strip()}e{tle_line1[59:61]}")
-			inclination = float(tle_line2[8:16])
-			raan = float(tle_line2[17:25])
-			eccentricity = float(f"0.{tle_line2[26:33].strip()}")
-			arg_perigee = float(tle_line2[34:42])
-			mean_anomaly = float(tle_line2[43:51])
-			mean_motion = float(tle_line2[52:63])
-			rev_number = int(tle_line2[63:68])
-		except Exception as e:
-			raise ValueError(f"Invalid TLE format: {e}")
-
-		# Pack into 43 bytes, big-endian
-		payload = struct.pack(
-			">HffffffffffI",  # > = big endian
-			epoch_year,
-			epoch_day,
-			mm_dot,
-			mm_ddot,
-			bstar,
-			inclination,
-			raan,
-			eccentricity,
-			arg_perigee,
-			mean_anomaly,
-			mean_motion,
-			rev_number
-		)
-
-	elif tec_code == TEC_LORA_STATE:
-		# TX State (1 byte)
-		tx_state = input_widgets["TX State:"].currentText()
-		if tx_state == "On":
-			tx_state_val = BYTE_TX_ON & 0b1111
-		elif tx_state == "Beacon off":
-			tx_state_val = BYTE_TX_NOBEACON & 0b1111
-		elif tx_state == "Off":
-			tx_state_val = BYTE_TX_OFF & 0b11
-		else:
-			raise ValueError(f"Invalid TX State: {tx_state}")
-		tx_state_byte = (tx_state_val << 4) |  tx_state_val
-
-		# Duration (3 bytes)
-		days = input_widgets["Days:"].value()
-		hours = input_widgets["Hours:"].value()
-		minutes = input_widgets["Minutes:"].value()
-		seconds = input_widgets["Seconds:"].value()
-		duration_total = (days * 86400) + (hours * 3600) + (minutes * 60) + seconds
-		duration_bytes = duration_total.to_bytes(3, 'big')  # 3 bytes
-
-		# Combine all into one payload
-		payload = bytes([tx_state_byte]) + duration_bytes
-
-	elif tec_code == TEC_LORA_CONFIG:
-		frequency_khz = int(input_widgets["Frequency:"].value() * 1000)
-		frequency_bytes = frequency_khz.to_bytes(3, 'big')
-
-		bandwidth = input_widgets["Bandwidth:"].currentText()
-		if bandwidth.endswith(" kHz"):
-			bandwidth = bandwidth[:-4]
-		if bandwidth == "62.5":
-			bandwidth_bits = 0b00
-		elif bandwidth == "125":
-			bandwidth_bits = 0b01
-		elif bandwidth == "250":
-			bandwidth_bits = 0b10
-		elif bandwidth == "500":
-			bandwidth_bits = 0b11
-		else:
-			raise ValueError(f"Invalid bandwidth value: {bandwidth}")
-		
-		sf = input_widgets["SF:"].value()
-		sf_bits = (sf - 6) & 0b111  # SF 6-12 maps to bits 0-6, 3 bits total
-
-		cr = input_widgets["CR:"].value()
-		cr_bits = (cr - 5) & 0b111  # CR 5-8 maps to bits 0-3, 3 bits total
-
-		sf_cr_byte = bytes([(bandwidth_bits << 6) | (sf_bits << 3) | cr_bits])
-
-		power = input_widgets["Power:"].value()
-		power_bits = (power + 9) & 0b11111 # Power -9 to +22 maps to bits 0-31, 5 bits total
-
-		reserved_bits = 0b000
-		power_byte = bytes([(power_bits << 3) | reserved_bits])
+# Keyed HMAC-SHA256: the keyed state is built once per key and copied for every message
+class HmacKey:
+	__slots__ = ("base",)
 
-		duration = input_widgets["Seconds:"].value()
-		duration_byte = bytes([duration & 0xFF])  # 1 byte for duration
+	def __init__(self, key_bytes):
+		self.base = hmac.new(key_bytes, digestmod=hashlib.sha256)
 
-		payload = frequency_bytes + sf_cr_byte + power_byte + duration_byte
+	# HMAC of the concatenation of the parts (bytes-like, memoryview slices are not copied)
+	def digest(self, *parts):
+		ctx = self.base.copy()
+		for part in parts:
+			ctx.update(part)
+		return ctx.digest()
 
-	elif tec_code == TEC_LORA_PING:
-		payload = b''
+HMAC_CONTEXTS = {} # 32-bit key -> HmacKey
 
-	elif tec_code == TEC_CRY_EXP:
-		# Glass state: Off, Dark, Light (3 bits)
-		glass_state = input_widgets["Glass:"].currentText()
-		if glass_state == "Off":
-			glass_val = 0b000
-		elif glass_state == "Dark":
-			glass_val = 0b001
-		elif glass_state == "Light":
-			glass_val = 0b010
-		else:
-			raise ValueError(f"Invalid Glass state: {glass_state}")
-
-		# Repeat glass_val twice (6 bits total)
-		glass_bits = (glass_val << 3) | glass_val
-
-		activation_time = input_widgets["Activation delay:"].time()
-		activation_secs = (activation_time.hour() * 3600 + activation_time.minute() * 60 + activation_time.second())
+def hmac_context(key_int):
+	"""Return the HmacKey of a 32-bit key, built on first use: key_int"""
+	context = HMAC_CONTEXTS.get(key_int)
+	if context is None:
+		# Convert 32-bit integer key to bytes
+		context = HmacKey(key_int.to_bytes(4, byteorder='big'))
+		HMAC_CONTEXTS[key_int] = context
+	return context
 
-		# Combine: 6 bits glass_bits + 18 bits activation_secs
-		glass_and_delay = (glass_bits << 18) | activation_secs
-		glass_and_delay_bytes = glass_and_delay.to_bytes(3, 'big')
-
-		# Photodiode: Yes/No (3 bits for future expansion)
-		photodiode = input_widgets["Photodiode:"].currentText()
-		if photodiode == "No":
-			diode_val = 0b000
-		elif photodiode == "Yes":
-			diode_val = 0b001
-		else:
-			raise ValueError(f"Invalid Photodiode state: {photodiode}")
-
-		# Picture: Yes/No (3 bits for future expansion)
-		picture = input_widgets["Picture:"].currentText()
-		if picture == "No":
-			picture_val = 0b000
-		elif picture == "Yes":
-			picture_val = 0b001
-		else:
-			raise ValueError(f"Invalid Picture state: {picture}")
+# Compute HMAC-SHA256 and return first 4 bytes as uint32
+def hmac_mac(key_int, message: bytes) -> int:
+	"""Compute HMAC-SHA256 and return first 4 bytes as uint32: key_int - message"""
+	return int.from_bytes(hmac_context(key_int).digest(message)[:4], byteorder='big')
 
-		# Combine: 3 bits diode + 3 bits picture
-		state_bits = (diode_val << 3) | picture_val
+# ============= PACKET FUNCTIONS =================
 
-		observation_time = input_widgets["Observation delay:"].time()
-		observation_secs = (observation_time.hour() * 3600 + observation_time.minute() * 60 + observation_time.second())
+# Read the TEC form widgets into plain values (label -> value)
+def read_input_values(input_widgets):
+	"""Read the TEC form widgets into plain values: input_widgets (label -> widget)
+	Times of day are returned in seconds since midnight, dates in UNIX time"""
+
+	values = {}
+	for label, widget in input_widgets.items():
+		if isinstance(widget, (QSpinBox, QDoubleSpinBox)):
+			values[label] = widget.value()
+		elif isinstance(widget, QComboBox):
+			values[label] = widget.currentText()
+		elif isinstance(widget, QPlainTextEdit):
+			values[label] = widget.toPlainText()
+		elif isinstance(widget, QTimeEdit): # before QDateTimeEdit, it is a subclass
+			t = widget.time()
+			values[label] = t.hour() * 3600 + t.minute() * 60 + t.second()
+		elif isinstance(widget, QDateTimeEdit):
+			values[label] = int(widget.dateTime().toSecsSinceEpoch())
+		elif isinstance(widget, QLineEdit):
+			values[label] = widget.text()
+	return values
+
+# TEC form to payload fields: field -> form label or function of the form values, or a function returning all the fields
+TEC_FORM_FIELDS = {
+	TEC_EXIT_STATE: {"from_state": "From state:", "to_state": "To state:"},
+	TEC_VAR_CHANGE: {"address": "Address:", "value": "Value:"},
+	TEC_SET_TIME: {"unix_time": "Date and Time:"},
+	TEC_ADCS_TLE: lambda form: pc.tle_values(form["TLE Data:"]),
+	TEC_LORA_STATE: {
+		"tx_state": "TX State:",
+		"duration": lambda form: form["Days:"] * 86400 + form["Hours:"] * 3600 + form["Minutes:"] * 60 + form["Seconds:"],
+	},
+	TEC_LORA_CONFIG: {
+		"frequency_mhz": "Frequency:",
+		"bandwidth_khz": lambda form: float(form["Bandwidth:"].removesuffix(" kHz")),
+		"sf": "SF:",
+		"cr": "CR:",
+		"TX_power_dbm": "Power:",
+		"duration": "Seconds:",
+	},
+	TEC_CRY_EXP: {
+		"glass": "Glass:",
+		"activation_delay": "Activation delay:",
+		"photodiode": "Photodiode:",
+		"picture": "Picture:",
+		"observation_delay": "Observation delay:",
+	},
+}
 
-		# Combine: 6 bits state_bits + 18 bits observation_secs
-		state_and_delay = (state_bits << 18) | observation_secs
-		state_and_delay_bytes = state_and_delay.to_bytes(3, 'big')
+# Map the TEC form values to the payload fields
+def payload_values(tec_code, form):
+	"""Return the payload fields of a TEC: tec_code - form (label -> plain value)"""
 
-		# Final payload: 6 bytes
-		payload = glass_and_delay_bytes + state_and_delay_bytes
+	mapping = TEC_FORM_FIELDS.get(tec_code)
+	if mapping is None:
+		return {}
+	if callable(mapping):
+		return mapping(form)
+	return {field: source(form) if callable(source) else form[source] for field, source in mapping.items()}
 
-	else:
-		payload = b''
+# Build the payload based on type index and task name
+def build_payload(tec_code, input_widgets):
+	"""Build the payload based on TEC code and input widgets dictionary: tec_code - input_widgets
+	The layouts are declared in payload_codec, TECs without one have no payload"""
 
-	return payload
+	return pc.encode_payload(tec_code, payload_values(tec_code, read_input_values(input_widgets)))
 
 # Build the full packet with header, payload, and ECC(for transmission)
-def build_packet(gs_text, tec_code, payload_bytes, ecc_enabled):
-	"""Build the full packet with header, payload, and ECC: gs_text - tec_code - payload_bytes - ecc_enabled"""
+def build_packet(gs_text, tec_code, payload_bytes, ecc_enabled, encode=False, sealed=True, unix_time=None):
+	"""Build the full packet with header, payload, and ECC: gs_text - tec_code - payload_bytes - ecc_enabled - encode - sealed - unix_time
+	The GS firmware applies RS ECC before transmission, set encode to get the radio frame here instead.
+	An unsealed packet has zero timestamp and MAC: seal it just before transmission (seal_packet, TecSealer)"""
 	
 	# === Byte 0: Station ID ===
 	if gs_text in TX_SOURCES:
@@ -422,39 +432,143 @@ def build_packet(gs_text, tec_code, payload_bytes, ecc_enabled):
 	if payload_length > PACKET_PAYLOAD_MAX:
 		raise ValueError(f"Payload too long (max {PACKET_PAYLOAD_MAX} bytes)")
 
-	# === Byte 4-7: UNIX timestamp ===
-	unix_time = int(datetime.now().timestamp())
-	bytes_time = unix_time.to_bytes(4, byteorder='big')
-
-	# === Byte 8-11: MAC ===
-	mac_placeholder = b'\x00\x00\x00\x00'
+	# === Byte 4-11: UNIX timestamp and MAC, zero until sealed ===
 	header_partial = bytes([
 		station,
 		ecc,
 		tec,
 		payload_length
 	])
-	packet_placeholder = header_partial + bytes_time + mac_placeholder + payload_bytes
+	packet = header_partial + bytes(8) + bytes(payload_bytes)
+
+	if sealed:
+		if unix_time is None:
+			unix_time = int(datetime.now().timestamp())
+		packet = seal_packet(packet, unix_time)
+	if encode and ecc_enabled:
+		packet = ecc_encode(packet)
+	return packet
+
+# Set the timestamp of a packet and compute its MAC
+def seal_packet(packet_bytes, unix_time, key=SECRET_KEY):
+	"""Return the packet with timestamp (bytes 4-7) and MAC (bytes 8-11) set: packet_bytes - unix_time - key"""
+
+	header = bytes(packet_bytes[:4]) + unix_time.to_bytes(4, byteorder='big')
+	payload = bytes(packet_bytes[PACKET_HEADER_LENGTH:])
+
+	# Compute MAC over the whole packet, MAC field set to zero
+	mac = hmac_mac(key, header + PACKET_MAC_ZERO + payload)
+	return header + mac.to_bytes(4, byteorder='big') + payload
+
+class TecSealer:
+	"""Seal packets at transmission time. The header carries whole seconds, so two TECs sealed in the same second
+	would share the timestamp: the seal time is kept strictly increasing instead, it leads the clock only while
+	more than one TEC per second is sent"""
+
+	def __init__(self, key=SECRET_KEY, clock=time.time):
+		self.key = key
+		self.clock = clock
+		self.last_time = 0
+
+	def next_time(self):
+		self.last_time = max(int(self.clock()), self.last_time + 1)
+		return self.last_time
+
+	def seal(self, packet_bytes):
+		return seal_packet(packet_bytes, self.next_time(), self.key)
+
+# Check the MAC of received packets
+class MacVerifier:
+	"""Verify the MAC of packets: recomputed over the packet with the MAC field set to zero and compared in constant time.
+	The keyed HMAC state is copied for every packet, verified and rejected count the packets checked"""
+
+	def __init__(self, key=SECRET_KEY):
+		self.key = key
+		self.context = hmac_context(key)
+		self.verified = 0
+		self.rejected = 0
+
+	# MAC of a packet (header and payload_length bytes of payload) as 4 bytes
+	def compute(self, packet_bytes, offset=0):
+		view = memoryview(packet_bytes)
+		end = offset + PACKET_HEADER_LENGTH + view[offset + 3]
+		if len(view) < end:
+			raise ValueError(f"Packet too short for payload: length {len(view) - offset} < expected {end - offset}")
+
+		return self.context.digest(view[offset:offset + 8], PACKET_MAC_ZERO, view[offset + PACKET_HEADER_LENGTH:end])[:4]
+
+	# True if the MAC of the packet matches, counted in verified or rejected
+	def verify(self, packet_bytes, offset=0):
+		try:
+			valid = hmac.compare_digest(self.compute(packet_bytes, offset), bytes(packet_bytes[offset + 8:offset + PACKET_HEADER_LENGTH]))
+		except (ValueError, IndexError):
+			valid = False # truncated packets can not carry a valid MAC
+
+		if valid:
+			self.verified += 1
+		else:
+			self.rejected += 1
+		return valid
+
+	# Verify many packets, e.g. an offline capture split in packets
+	def verify_many(self, packets):
+		"""Return the list of MAC checks: packets (iterable of bytes-like or HEX strings)"""
+		verify = self.verify
+		return [verify(bytes.fromhex(packet) if isinstance(packet, str) else packet) for packet in packets]
+
+	# Decode and verify a capture of packets stored back to back
+	def verify_capture(self, data):
+		"""Return (packets, valid): the Packet list of decode_many and the MAC check of each one: data (bytes-like)"""
+		packets = decode_many(data)
+		valid = []
+		offset = 0
+		for packet in packets:
+			valid.append(self.verify(data, offset))
+			offset += PACKET_HEADER_LENGTH + packet.payload_length
+		return packets, valid
+
+# Decoded packet: header fields and payload
+class Packet:
+	"""Packet header fields and payload_bytes, a memoryview into the decoded buffer (no copy: use bytes() to keep it
+	independent of the buffer). Fields are also readable as packet["ter"] like the dictionary returned before"""
+
+	__slots__ = ("station_id", "ecc_enabled", "ter", "payload_length", "timestamp", "mac", "payload_bytes")
+
+	def __init__(self, station_id, ecc_enabled, ter, payload_length, timestamp, mac, payload_bytes):
+		self.station_id = station_id
+		self.ecc_enabled = ecc_enabled
+		self.ter = ter
+		self.payload_length = payload_length
+		self.timestamp = timestamp
+		self.mac = mac
+		self.payload_bytes = payload_bytes
+
+	def __getitem__(self, key):
+		try:
+			return getattr(self, key)
+		except (AttributeError, TypeError):
+			raise KeyError(key) from None
 
-	# Compute MAC over the whole packet
-	mac = hmac_mac(SECRET_KEY, packet_placeholder)
-	bytes_mac = mac.to_bytes(4, byteorder='big')
+	def __len__(self):
+		return PACKET_HEADER_LENGTH + self.payload_length
 
-	# Build final packet
-	return header_partial + bytes_time + bytes_mac + payload_bytes
+	def __repr__(self):
+		return (f"Packet(station_id={self.station_id}, ecc_enabled={self.ecc_enabled}, ter=0x{self.ter:02X}, "
+				f"payload_length={self.payload_length}, timestamp={self.timestamp}, mac=0x{self.mac:08X}, payload={self.payload_bytes.hex(' ').upper()})")
 
-# Function to decode the packet
-def decode_packet(packet_bytes):
-	"""Decode the packet and return a dictionary with fields: packet_bytes"""
+# Function to decode the packet (starting at offset in a buffer)
+def decode_packet(packet_bytes, offset=0):
+	"""Decode the packet and return a Packet: packet_bytes (bytes-like, copied once if it is a list of ints) - offset"""
 
-	if len(packet_bytes) < PACKET_HEADER_LENGTH:
-		raise ValueError(f"Packet too short to decode: length {len(packet_bytes)} < {PACKET_HEADER_LENGTH}")
+	if not isinstance(packet_bytes, (bytes, bytearray, memoryview)):
+		packet_bytes = bytes(packet_bytes)
 
-	# Byte 0: Station ID (raw int)
-	station_id = packet_bytes[0]
+	available = len(packet_bytes) - offset
+	if available < PACKET_HEADER_LENGTH:
+		raise ValueError(f"Packet too short to decode: length {available} < {PACKET_HEADER_LENGTH}")
 
-	# Byte 1: ECC Flag (bool)
-	byte_ecc = packet_bytes[1]
+	# Header: station ID - ECC flag - TER - payload length - timestamp - MAC
+	station_id, byte_ecc, ter, payload_length, timestamp, mac = PACKET_HEADER_STRUCT.unpack_from(packet_bytes, offset)
 	if byte_ecc == BYTE_RS_ON:
 		ecc_enabled = True
 	elif byte_ecc == BYTE_RS_OFF:
@@ -462,197 +576,1238 @@ def decode_packet(packet_bytes):
 	else:
 		raise ValueError(f"Invalid ECC flag: 0x{byte_ecc:02X}")
 
-	# Byte 2: TER (raw int)
-	ter = packet_bytes[2]
-
-	# Byte 3: Payload length
-	payload_length = packet_bytes[3]
-
 	# Ensure entire packet is present
 	expected_len = PACKET_HEADER_LENGTH + payload_length
-	if len(packet_bytes) < expected_len:
-		raise ValueError(f"Packet too short for payload: length {len(packet_bytes)} < expected {expected_len}")
+	if available < expected_len:
+		raise ValueError(f"Packet too short for payload: length {available} < expected {expected_len}")
+
+	start = offset + PACKET_HEADER_LENGTH
+	payload_bytes = memoryview(packet_bytes)[start:start + payload_length]
+
+	return Packet(station_id, ecc_enabled, ter, payload_length, timestamp, mac, payload_bytes)
+
+# Decode a capture of packets stored back to back
+def decode_many(data):
+	"""Decode the packets stored back to back in a buffer and return the list of Packet: data (bytes-like)
+	The payloads are views into data, the buffer is never copied"""
+
+	view = memoryview(data if isinstance(data, (bytes, bytearray, memoryview)) else bytes(data))
+	unpack_from = PACKET_HEADER_STRUCT.unpack_from
+
+	packets = []
+	offset = 0
+	end = len(view)
+	while offset < end:
+		if end - offset < PACKET_HEADER_LENGTH:
+			raise ValueError(f"Packet at offset {offset} too short to decode: length {end - offset} < {PACKET_HEADER_LENGTH}")
+
+		station_id, byte_ecc, ter, payload_length, timestamp, mac = unpack_from(view, offset)
+		if byte_ecc != BYTE_RS_ON and byte_ecc != BYTE_RS_OFF:
+			raise ValueError(f"Packet at offset {offset}: invalid ECC flag: 0x{byte_ecc:02X}")
+
+		start = offset + PACKET_HEADER_LENGTH
+		offset = start + payload_length
+		if offset > end:
+			raise ValueError(f"Packet at offset {start - PACKET_HEADER_LENGTH} too short for payload: length {end - start} < expected {payload_length}")
+
+		packets.append(Packet(station_id, byte_ecc == BYTE_RS_ON, ter, payload_length, timestamp, mac, view[start:offset]))
+	return packets
+
+# ============= ECC FUNCTIONS =================
+
+# GF(256) tables: exponentials (doubled to skip the modulo), logarithms and full multiplication table
+def build_gf_tables():
+	"""Build the GF(256) tables used by rscode: returns (gf_exp, gf_log, gf_mul)"""
+
+	gf_exp = np.zeros(512, dtype=np.uint8)
+	gf_log = np.zeros(256, dtype=np.int32)
+	x = 1
+	for i in range(255):
+		gf_exp[i] = x
+		gf_log[x] = i
+		x <<= 1
+		if x & 0x100:
+			x ^= RS_PRIMITIVE_POLY
+	gf_exp[255:510] = gf_exp[0:255]
+
+	# gf_mul[a, b] = a * b, row a is the lookup table of "multiply by a"
+	log = gf_log[1:]
+	gf_mul = np.zeros((256, 256), dtype=np.uint8)
+	gf_mul[1:, 1:] = gf_exp[log[:, None] + log[None, :]]
+	return gf_exp, gf_log, gf_mul
+
+GF_EXP, GF_LOG, GF_MUL = build_gf_tables()
+
+# Generator polynomial (x + a^1)(x + a^2)...(x + a^NPAR), coefficients from degree 0
+def build_rs_generator(npar=RS_NPAR):
+	generator = [1]
+	for i in range(1, npar + 1):
+		root = int(GF_EXP[i])
+		product = [0] * (len(generator) + 1)
+		for j, coeff in enumerate(generator):
+			product[j] ^= int(GF_MUL[coeff, root])
+			product[j + 1] ^= coeff
+		generator = product
+	return generator
+
+RS_GENERATOR = build_rs_generator()
+
+# Encode data blocks into RS codewords
+def rs_encode_blocks(blocks):
+	"""Encode an (N, RS_DATA_BLOCK_SIZE) uint8 array into (N, RS_BLOCK_SIZE) codewords: blocks"""
+
+	blocks = np.asarray(blocks, dtype=np.uint8)
+
+	# Same LFSR as rscode encode_data, run on all the blocks at once
+	lfsr = np.zeros((RS_NPAR, len(blocks)), dtype=np.uint8)
+	for i in range(RS_DATA_BLOCK_SIZE):
+		feedback = blocks[:, i] ^ lfsr[RS_NPAR - 1]
+		for j in range(RS_NPAR - 1, 0, -1):
+			lfsr[j] = lfsr[j - 1] ^ GF_MUL[RS_GENERATOR[j], feedback]
+		lfsr[0] = GF_MUL[RS_GENERATOR[0], feedback]
+
+	# Codeword: data followed by parity, highest LFSR byte first
+	return np.concatenate([blocks, lfsr[::-1].T], axis=1)
+
+# Check and correct RS codewords
+def rs_decode_blocks(codewords):
+	"""Correct an (N, RS_BLOCK_SIZE) uint8 array of codewords: codewords
+	Return (corrected codewords, state) with state 0 = no errors, 1 = corrected, -1 = not correctable"""
+
+	codewords = np.array(codewords, dtype=np.uint8)
+	n = len(codewords)
+
+	# Syndromes S_j = c(a^(j+1)), as rscode decode_data
+	syndromes = np.zeros((RS_NPAR, n), dtype=np.uint8)
+	for j in range(RS_NPAR):
+		factor = GF_MUL[GF_EXP[j + 1]]
+		for i in range(RS_BLOCK_SIZE):
+			syndromes[j] = codewords[:, i] ^ factor[syndromes[j]]
+
+	state = np.zeros(n, dtype=np.int8)
+	wrong = np.flatnonzero(syndromes.any(axis=0))
+	if len(wrong) == 0:
+		return codewords, state
+
+	# Single error of value e at degree k: S1 = e * a^k, S2 = e * a^2k, so a^k = S2 / S1 and e = S1^2 / S2
+	s1 = syndromes[0, wrong].astype(np.int32)
+	s2 = syndromes[1, wrong].astype(np.int32)
+	valid = (s1 != 0) & (s2 != 0)
+	degree = (GF_LOG[s2] - GF_LOG[s1]) % 255
+	valid &= degree < RS_BLOCK_SIZE
+	value = GF_EXP[(2 * GF_LOG[s1] - GF_LOG[s2]) % 255]
+
+	fixed = wrong[valid]
+	position = RS_BLOCK_SIZE - 1 - degree[valid]
+	codewords[fixed, position] ^= value[valid]
+	state[fixed] = 1
+	state[wrong[~valid]] = -1
+	return codewords, state
+
+# Column-wise interleaving of the codewords of a packet, so a burst of errors is spread over all codewords
+def rs_interleave(codewords):
+	"""Interleave an (N, RS_BLOCK_SIZE) array of codewords into bytes: codewords"""
+	return np.ascontiguousarray(np.asarray(codewords, dtype=np.uint8).T).tobytes()
+
+def rs_deinterleave(data):
+	"""Split interleaved bytes into an (N, RS_BLOCK_SIZE) array of codewords: data"""
+	if len(data) % RS_BLOCK_SIZE != 0:
+		raise ValueError(f"Interleaved data length {len(data)} is not a multiple of {RS_BLOCK_SIZE}")
+	return np.frombuffer(bytes(data), dtype=np.uint8).reshape(RS_BLOCK_SIZE, -1).T
+
+# Check if RS ECC is applied to received data (same rule as the firmware)
+def is_data_ecc_enabled(data):
+	"""Infer ECC from the data length and the ECC flag: data"""
+	return len(data) > 1 and len(data) % RS_BLOCK_SIZE == 0 and data[1] != BYTE_RS_OFF
+
+# Encode a packet with RS ECC and interleaving
+def ecc_encode(packet_bytes):
+	"""Return the RS encoded and interleaved packet, padded to whole data blocks: packet_bytes"""
+	return ecc_encode_many([packet_bytes])[0]
+
+# Decode a RS encoded and interleaved packet
+def ecc_decode(data):
+	"""Return (decoded bytes, error code, corrected codewords): data
+	Decoded bytes keep the padding of the last data block, as in the firmware"""
+	return ecc_decode_many([data])[0]
+
+# Encode many packets: packets with the same number of blocks are encoded in one call
+def ecc_encode_many(packets):
+	"""Return the list of RS encoded and interleaved packets: packets"""
+
+	encoded = [None] * len(packets)
+	groups = {}
+	for index, packet in enumerate(packets):
+		num_blocks = max(1, -(-len(packet) // RS_DATA_BLOCK_SIZE))
+		groups.setdefault(num_blocks, []).append(index)
+
+	for num_blocks, indexes in groups.items():
+		size = num_blocks * RS_DATA_BLOCK_SIZE
+		data = np.full((len(indexes), size), RS_PADDING, dtype=np.uint8)
+		for row, index in enumerate(indexes):
+			packet = packets[index]
+			data[row, :len(packet)] = np.frombuffer(bytes(packet), dtype=np.uint8)
+
+		codewords = rs_encode_blocks(data.reshape(-1, RS_DATA_BLOCK_SIZE)).reshape(len(indexes), num_blocks, RS_BLOCK_SIZE)
+		# Interleave each packet: byte [col * num_blocks + row] is codeword[row][col]
+		interleaved = np.ascontiguousarray(codewords.transpose(0, 2, 1)).reshape(len(indexes), -1)
+		for row, index in enumerate(indexes):
+			encoded[index] = interleaved[row].tobytes()
+
+	return encoded
+
+# Decode many packets: packets with the same length are decoded in one call
+def ecc_decode_many(frames):
+	"""Return a list of (decoded bytes, error code, corrected codewords) for each frame: frames"""
+
+	decoded = [None] * len(frames)
+	groups = {}
+	for index, frame in enumerate(frames):
+		if len(frame) == 0 or len(frame) % RS_BLOCK_SIZE != 0:
+			decoded[index] = (bytes(frame), PACKET_ERR_LENGTH, 0)
+		else:
+			groups.setdefault(len(frame), []).append(index)
 
-	# Bytes 4-7: Timestamp (int)
-	bytes_time = packet_bytes[4:8]
-	timestamp = int.from_bytes(bytes_time, byteorder='big')
+	for length, indexes in groups.items():
+		num_blocks = length // RS_BLOCK_SIZE
+		data = np.frombuffer(b"".join(bytes(frames[index]) for index in indexes), dtype=np.uint8)
+		# Deinterleave each packet into its codewords
+		codewords = data.reshape(len(indexes), RS_BLOCK_SIZE, num_blocks).transpose(0, 2, 1).reshape(-1, RS_BLOCK_SIZE)
+		codewords, state = rs_decode_blocks(codewords)
 
-	# Bytes 8–11: MAC (int)
-	bytes_mac = packet_bytes[8:12]
-	mac = int.from_bytes(bytes_mac, byteorder='big')
+		payloads = codewords[:, :RS_DATA_BLOCK_SIZE].reshape(len(indexes), -1)
+		state = state.reshape(len(indexes), num_blocks)
+		for row, index in enumerate(indexes):
+			error = PACKET_ERR_DECODE if (state[row] < 0).any() else PACKET_ERR_NONE
+			decoded[index] = (payloads[row].tobytes(), error, int((state[row] > 0).sum()))
 
-	# Payload: list of ints
-	if payload_length > 0:
-		payload_bytes = list(packet_bytes[12:12 + payload_length])
-	else:
-		payload_bytes = []
-
-	return {
-		"station_id": station_id,
-		"ecc_enabled": ecc_enabled,
-		"ter": ter,
-		"payload_length": payload_length,
-		"mac": mac,
-		"timestamp": timestamp,
-		"payload_bytes": payload_bytes  # always a list of ints
-	}
+	return decoded
+
+# ============= SERIAL FUNCTIONS =================
+
+# Parse a line received from the GS serial port into a typed RX event
+def parse_serial_line(line, rx_time=None):
+	"""Parse a serial line (PACKET, RSSI, RADIO error) and return an RxEvent: line - rx_time"""
+
+	if rx_time is None:
+		rx_time = datetime.utcnow()
+
+	if line.startswith(SERIAL_PREFIX_PACKET):
+		try:
+			# bytes.fromhex skips the spaces between bytes
+			packet_bytes = bytes.fromhex(line[len(SERIAL_PREFIX_PACKET):])
+			decoded_packet = decode_packet(packet_bytes)
+		except Exception as e:
+			return RxEvent(RX_EVENT_ERROR, rx_time, line, f"Packet not decoded: {type(e).__name__}: {e}", None)
+		return RxEvent(RX_EVENT_PACKET, rx_time, line, decoded_packet, packet_bytes)
+
+	elif line.startswith(SERIAL_PREFIX_RSSI):
+		# Example line: "RSSI: -113.75 SNR: 9.20 dF: 1.02"
+		try:
+			parts = line.split()
+			report = (float(parts[1]), float(parts[3]), float(parts[5]))
+		except (IndexError, ValueError) as e:
+			return RxEvent(RX_EVENT_ERROR, rx_time, line, f"Failed to parse RSSI line: {e}", None)
+		return RxEvent(RX_EVENT_RSSI, rx_time, line, report, None)
+
+	elif line.startswith(SERIAL_PREFIX_RADIO_ERROR):
+		return RxEvent(RX_EVENT_RADIO_ERROR, rx_time, line, line, None)
+
+	elif line.startswith(SERIAL_PREFIX_RADIO_SETTINGS):
+		# Example line: "RADIO settings: F 436.00 MHz, BW 125.00 kHz, SF 10, CR 5, Power 10 dBm"
+		try:
+			parts = line.replace(",", " ").split()
+			config = LoRaConfig(float(parts[parts.index("BW") + 1]), int(parts[parts.index("SF") + 1]), int(parts[parts.index("CR") + 1]))
+		except (IndexError, ValueError) as e:
+			return RxEvent(RX_EVENT_ERROR, rx_time, line, f"Failed to parse radio settings line: {e}", None)
+		return RxEvent(RX_EVENT_RADIO_SETTINGS, rx_time, line, config, None)
+
+	elif line.startswith(SERIAL_PREFIX_MODE):
+		return RxEvent(RX_EVENT_SERIAL_MODE, rx_time, line, line[len(SERIAL_PREFIX_MODE):].strip(), None)
+
+	elif line.startswith(SERIAL_PREFIX_BAUD):
+		try:
+			baud = int(line[len(SERIAL_PREFIX_BAUD):])
+		except ValueError as e:
+			return RxEvent(RX_EVENT_ERROR, rx_time, line, f"Failed to parse baud line: {e}", None)
+		return RxEvent(RX_EVENT_SERIAL_BAUD, rx_time, line, baud, None)
+
+	return RxEvent(RX_EVENT_LINE, rx_time, line, None, None)
+
+# Build a binary serial frame
+def build_serial_frame(kind, payload):
+	"""Return the frame bytes for a frame kind and its payload: kind - payload"""
+
+	if len(payload) > 0xFF:
+		raise ValueError(f"Frame payload too long: {len(payload)} > 255 bytes")
+	body = bytes([kind, len(payload)]) + bytes(payload)
+	crc = binascii.crc_hqx(body, SERIAL_FRAME_CRC_INIT)
+	return SERIAL_FRAME_SYNC + body + crc.to_bytes(SERIAL_FRAME_CRC_LENGTH, byteorder='big')
+
+# Parse the payload of a binary frame into a typed RX event, the line is the text equivalent shown in the console
+def parse_serial_frame(kind, payload, rx_time):
+	"""Parse a frame (PACKET, RSSI, RADIO error) and return an RxEvent: kind - payload - rx_time"""
+
+	if kind == SERIAL_FRAME_PACKET:
+		packet_bytes = bytes(payload)
+		line = f"{SERIAL_PREFIX_PACKET} {packet_bytes.hex(' ').upper()}"
+		try:
+			decoded_packet = decode_packet(packet_bytes)
+		except Exception as e:
+			return RxEvent(RX_EVENT_ERROR, rx_time, line, f"Packet not decoded: {type(e).__name__}: {e}", None)
+		return RxEvent(RX_EVENT_PACKET, rx_time, line, decoded_packet, packet_bytes)
+
+	elif kind == SERIAL_FRAME_RSSI:
+		if len(payload) != SERIAL_FRAME_RSSI_STRUCT.size:
+			return RxEvent(RX_EVENT_ERROR, rx_time, "", f"Invalid RSSI frame length: {len(payload)}", None)
+		report = SERIAL_FRAME_RSSI_STRUCT.unpack(payload)
+		line = f"{SERIAL_PREFIX_RSSI} {report[0]:.2f} SNR: {report[1]:.2f} dF: {report[2]:.2f}"
+		return RxEvent(RX_EVENT_RSSI, rx_time, line, report, None)
+
+	elif kind == SERIAL_FRAME_RADIO_ERROR:
+		line = f"{SERIAL_PREFIX_RADIO_ERROR} {bytes(payload).decode(errors='ignore')}"
+		return RxEvent(RX_EVENT_RADIO_ERROR, rx_time, line, line, None)
+
+	return RxEvent(RX_EVENT_ERROR, rx_time, "", f"Unknown frame kind: 0x{kind:02X}", None)
+
+# Drop packets received twice or sealed outside the replay window
+class RxFilter:
+	"""Duplicate and replay filter: a packet is identified by source, TX timestamp and MAC.
+	Identities are kept in an LRU ordered by arrival, expired after window seconds and capped at max_entries,
+	so the check costs one dictionary lookup per packet. replay_window [s] bounds |TX timestamp - clock()|"""
+
+	def __init__(self, window=RX_DEDUP_WINDOW, max_entries=RX_DEDUP_ENTRIES, replay_window=RX_REPLAY_WINDOW, clock=time.time):
+		self.window = window
+		self.max_entries = max_entries
+		self.replay_window = replay_window
+		self.clock = clock
+		self.seen = OrderedDict() # (source, timestamp, MAC) -> arrival time, oldest first
+		self.duplicates = 0
+		self.replays = 0
+
+	# Event kind for a received packet: RX_EVENT_PACKET, RX_EVENT_DUPLICATE or RX_EVENT_REPLAY
+	def check(self, packet):
+		now = self.clock()
+
+		if self.replay_window is not None and abs(packet.timestamp - now) > self.replay_window:
+			self.replays += 1
+			return RX_EVENT_REPLAY
+
+		# Forget the packets older than the window
+		seen = self.seen
+		limit = now - self.window
+		while seen and next(iter(seen.values())) < limit:
+			seen.popitem(last=False)
+
+		key = (packet.station_id, packet.timestamp, packet.mac)
+		if key in seen:
+			seen[key] = now
+			seen.move_to_end(key)
+			self.duplicates += 1
+			return RX_EVENT_DUPLICATE
+
+		seen[key] = now
+		if len(seen) > self.max_entries:
+			seen.popitem(last=False)
+		return RX_EVENT_PACKET
+
+# Split the serial byte stream into RX events
+class SerialStreamParser:
+	"""Parse the bytes read from the GS serial port: binary frames and text lines can be mixed in the stream.
+	Bytes are appended to one bytearray and parsed in place, frames are checked through a memoryview.
+	Packets whose MAC does not match the key become RX_EVENT_MAC_ERROR events (key None: no check),
+	then rx_filter turns duplicates and replays into RX_EVENT_DUPLICATE and RX_EVENT_REPLAY events (None: no filter)"""
+
+	def __init__(self, key=SECRET_KEY, rx_filter=None):
+		self.buffer = bytearray()
+		self.start = 0 # first byte not parsed yet
+		self.crc_errors = 0
+		self.verifier = MacVerifier(key) if key is not None else None
+		self.rx_filter = rx_filter
+
+	# Reject a packet event whose MAC does not match, then duplicates and replays
+	def check_packet(self, event):
+		if event.kind != RX_EVENT_PACKET:
+			return event
+		if self.verifier is not None and not self.verifier.verify(event.packet_bytes):
+			return event._replace(kind=RX_EVENT_MAC_ERROR)
+		if self.rx_filter is not None:
+			kind = self.rx_filter.check(event.data)
+			if kind != RX_EVENT_PACKET:
+				return event._replace(kind=kind)
+		return event
+
+	# Add received bytes and return the RxEvents completed by them
+	def feed(self, data, rx_time=None):
+		if rx_time is None:
+			rx_time = datetime.utcnow()
+
+		buffer = self.buffer
+		buffer += data
+		events = []
+		pos = self.start
+		end = len(buffer)
+		sync = SERIAL_FRAME_SYNC[0]
+
+		with memoryview(buffer) as view:
+			while pos < end:
+				# Binary frame
+				if buffer[pos] == sync:
+					if end - pos < 2:
+						break # wait for the second sync byte
+					if buffer[pos + 1] != SERIAL_FRAME_SYNC[1]:
+						pos += 1 # stray byte
+						continue
+					if end - pos < SERIAL_FRAME_HEADER_LENGTH:
+						break
+					frame_end = pos + SERIAL_FRAME_HEADER_LENGTH + buffer[pos + 3] + SERIAL_FRAME_CRC_LENGTH
+					if end < frame_end:
+						break # wait for the rest of the frame
+
+					crc = (buffer[frame_end - 2] << 8) | buffer[frame_end - 1]
+					if binascii.crc_hqx(view[pos + 2:frame_end - 2], SERIAL_FRAME_CRC_INIT) != crc:
+						# Corrupted frame or sync found in noise: resynchronize from the next byte
+						self.crc_errors += 1
+						events.append(RxEvent(RX_EVENT_ERROR, rx_time, "", "Serial frame CRC error", None))
+						pos += 1
+						continue
+
+					events.append(self.check_packet(parse_serial_frame(buffer[pos + 2], view[pos + SERIAL_FRAME_HEADER_LENGTH:frame_end - 2], rx_time)))
+					pos = frame_end
+					continue
+
+				# Text line, ended by a newline or by the start of a frame
+				line_end = buffer.find(b"\n", pos)
+				frame_start = buffer.find(SERIAL_FRAME_SYNC[:1], pos)
+				if frame_start != -1 and (line_end == -1 or frame_start < line_end):
+					line_end = frame_start
+					next_pos = frame_start
+				elif line_end != -1:
+					next_pos = line_end + 1
+				elif end - pos > SERIAL_LINE_MAX:
+					line_end = next_pos = end
+				else:
+					break # wait for the end of the line
+
+				line = str(view[pos:line_end], "ascii", "ignore").strip()
+				if line:
+					events.append(self.check_packet(parse_serial_line(line, rx_time)))
+				pos = next_pos
+
+		# Drop the parsed bytes, moving the remaining ones only once in a while
+		if pos == end:
+			buffer.clear()
+			pos = 0
+		elif pos > SERIAL_BUFFER_COMPACT:
+			del buffer[:pos]
+			pos = 0
+		self.start = pos
+		return events
+
+# Serial link setup steps
+SERIAL_SETUP_PROBE = 0
+SERIAL_SETUP_BAUD = 1
+SERIAL_SETUP_MODE = 2
+SERIAL_SETUP_DONE = 3
+
+# Negotiate baud rate and serial mode with the GS firmware after opening the port
+class SerialLinkSetup:
+	"""Run by the serial reader thread after each read: update() follows the replies in the events just parsed,
+	writes the next request and switches the port rate as soon as the GS confirms it, between two reads.
+	The GS is probed every SERIAL_PROBE_INTERVAL until it replies, then asked for baud (no reply or SERIAL error:
+	it stays at SERIAL_BAUD_DEFAULT) and for binary mode. The setup notices are returned as RX_EVENT_ERROR events"""
+
+	def __init__(self, baud=SERIAL_BAUD_DEFAULT, binary=SERIAL_BINARY_ENABLE, clock=time.monotonic):
+		self.baud = baud
+		self.binary = binary
+		self.clock = clock
+		self.step = SERIAL_SETUP_PROBE
+		self.started = None
+		self.deadline = None # next probe, or end of the wait for the reply
+
+	@property
+	def done(self):
+		return self.step == SERIAL_SETUP_DONE
+
+	# Write a SERIAL command and wait for its reply
+	def request(self, serial_conn, step, command, now, wait=SERIAL_REPLY_TIMEOUT):
+		serial_conn.write(command.encode("utf-8"))
+		self.step = step
+		self.deadline = now + wait
+
+	# Next step once the GS answers at the current rate
+	def request_baud(self, serial_conn, now):
+		if self.baud != SERIAL_BAUD_DEFAULT:
+			self.request(serial_conn, SERIAL_SETUP_BAUD, SERIAL_BAUD_COMMAND.format(self.baud), now)
+		else:
+			self.request_mode(serial_conn, now)
+
+	def request_mode(self, serial_conn, now):
+		if self.binary:
+			self.request(serial_conn, SERIAL_SETUP_MODE, SERIAL_MODE_COMMAND.format(SERIAL_MODE_BINARY), now)
+		else:
+			self.step = SERIAL_SETUP_DONE
+
+	# Handle the events of one read and the timeouts, return the events with the setup notices appended
+	def update(self, serial_conn, events, now=None):
+		now = self.clock() if now is None else now
+		notices = []
+
+		for event in events:
+			# The GS switches right after its reply: follow it before the next read
+			if event.kind == RX_EVENT_SERIAL_BAUD:
+				serial_conn.baudrate = event.data
+				if self.step == SERIAL_SETUP_BAUD:
+					self.request_mode(serial_conn, now)
+			elif event.kind == RX_EVENT_SERIAL_MODE:
+				if self.step == SERIAL_SETUP_PROBE:
+					self.request_baud(serial_conn, now)
+				elif self.step == SERIAL_SETUP_MODE:
+					self.step = SERIAL_SETUP_DONE
+			elif self.step == SERIAL_SETUP_BAUD and event.line.startswith(SERIAL_PREFIX_ERROR):
+				notices.append(f"Baud rate {self.baud} refused, staying at {SERIAL_BAUD_DEFAULT}")
+				self.request_mode(serial_conn, now)
+
+		if self.step == SERIAL_SETUP_PROBE:
+			if self.started is None:
+				self.started = now
+			if now - self.started > SERIAL_PROBE_TIMEOUT:
+				notices.append(f"No reply from the GS, serial link left at {SERIAL_BAUD_DEFAULT} baud in text mode")
+				self.step = SERIAL_SETUP_DONE
+			elif self.deadline is None or now >= self.deadline:
+				self.request(serial_conn, SERIAL_SETUP_PROBE, SERIAL_PROBE_COMMAND, now, SERIAL_PROBE_INTERVAL)
+		elif self.step == SERIAL_SETUP_BAUD and now >= self.deadline:
+			notices.append(f"No reply to the baud rate request, staying at {SERIAL_BAUD_DEFAULT}")
+			self.request_mode(serial_conn, now)
+		elif self.step == SERIAL_SETUP_MODE and now >= self.deadline:
+			notices.append("No reply to the binary mode request, staying in text mode")
+			self.step = SERIAL_SETUP_DONE
+
+		if not notices:
+			return events
+		rx_time = datetime.utcnow()
+		return events + [RxEvent(RX_EVENT_ERROR, rx_time, "", notice, None) for notice in notices]
+
+# ============= REPLY FUNCTIONS =================
+
+# Status of a sent TEC after its reply (or lack of it)
+REPLY_WAITING = "WAITING"
+REPLY_ACK = "ACK"
+REPLY_INVALID_ACK = "INVALID ACK"
+REPLY_NACK = "NACK"
+REPLY_INVALID_NACK = "INVALID NACK"
+REPLY_DATA = "REPLY" # TER carrying the data requested by the TEC
+REPLY_TIMEOUT = "TIMEOUT"
+
+# Classify a TER received while waiting for the reply to a TEC
+def classify_reply(ter, payload_bytes, sent_tec):
+	"""Return (status, description) for a TER received after sending a TEC, None if the TER is not a reply: ter - payload_bytes - sent_tec"""
+
+	if ter == TER_ACK:
+		if list(payload_bytes) == [sent_tec]:
+			return REPLY_ACK, "executed successfully"
+		return REPLY_INVALID_ACK, f"seems to be executed, but ACK was invalid. PAYLOAD: {list(payload_bytes)}"
+
+	elif ter == TER_NACK:
+		if len(payload_bytes) == 2:
+			error_code = int.from_bytes(bytes(payload_bytes[1:2]), byteorder='big', signed=True)
+			return REPLY_NACK, PACKET_ERR_DESCRIPTION.get(error_code, f"Unknown error code: {error_code}")
+		return REPLY_INVALID_NACK, "Malformed NACK payload"
+
+	elif ter in TEC_DATA_REPLIES:
+		return REPLY_DATA, "executed successfully, requested data received"
+
+	return None
+
+# ============= LINK TIMING =================
+
+# LoRa modulation: bandwidth [kHz], spreading factor, coding rate (4/cr)
+class LoRaConfig(namedtuple("LoRaConfig", ["bw", "sf", "cr"])):
+	__slots__ = ()
+
+	def __str__(self):
+		return f"SF{self.sf} BW{self.bw:g} CR4/{self.cr}"
+
+LORA_DEFAULT_CONFIG = LoRaConfig(125.0, 10, 5) # BW, SF, CR of the GS and satellite firmware at boot
+
+# Time on air of a LoRa frame (Semtech AN1200.13), explicit header and CRC as set by RadioLib
+def lora_time_on_air(length, config, preamble=LORA_PREAMBLE_LENGTH):
+	"""Return the time on air [s] of a frame: length [bytes] - config (LoRaConfig) - preamble [symbols]"""
+
+	t_sym = (1 << config.sf) / (config.bw * 1000.0)
+	de = 1 if t_sym >= LORA_LDRO_SYMBOL_TIME else 0
+	n_payload = 8 + max(math.ceil((8 * length - 4 * config.sf + 28 + 16) / (4 * (config.sf - 2 * de))) * config.cr, 0)
+	return (preamble + 4.25) * t_sym + n_payload * t_sym
+
+# Length on air of a packet: the GS firmware adds the RS parity when the ECC flag is set
+def radio_frame_length(packet_bytes):
+	if len(packet_bytes) > 1 and packet_bytes[1] == BYTE_RS_ON:
+		return math.ceil(len(packet_bytes) / RS_DATA_BLOCK_SIZE) * RS_BLOCK_SIZE
+	return len(packet_bytes)
+
+# Time on air of a TEC and of its reply (a full packet for TECs replying with data, else a NACK)
+def tec_airtime(packet_bytes, config):
+	reply_length = PACKET_HEADER_LENGTH + (PACKET_PAYLOAD_MAX if packet_bytes[2] in TEC_DATA_TASKS else 2)
+	if len(packet_bytes) > 1 and packet_bytes[1] == BYTE_RS_ON:
+		reply_length = math.ceil(reply_length / RS_DATA_BLOCK_SIZE) * RS_BLOCK_SIZE
+	return lora_time_on_air(radio_frame_length(packet_bytes), config) + lora_time_on_air(reply_length, config)
+
+# Smoothed round trip statistics (RFC 6298) of the delay not spent on air
+class RttEstimator:
+	def __init__(self):
+		self.srtt = None
+		self.rttvar = None
+		self.backoff = 1 # doubled at each timeout, reset by a new sample
+		self.samples = 0
+
+	def update(self, delay):
+		if self.srtt is None:
+			self.srtt = delay
+			self.rttvar = delay / 2
+		else:
+			self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - delay)
+			self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * delay
+		self.backoff = 1
+		self.samples += 1
+
+	# Delay to wait besides the time on air
+	def delay(self):
+		if self.srtt is None:
+			return 2 * RTT_PROCESSING
+		return self.srtt + RTT_K * self.rttvar
+
+class LinkTiming:
+	"""Reply timeouts of the TECs: time on air of TEC and reply for the active LoRa configuration, plus a
+	round trip estimator per configuration fed with the replies (Karn: retransmitted TECs are not sampled)"""
+
+	def __init__(self, config=LORA_DEFAULT_CONFIG):
+		self.config = config
+		self.estimators = {} # LoRaConfig -> RttEstimator
+
+	@property
+	def estimator(self):
+		return self.estimators.setdefault(self.config, RttEstimator())
+
+	def set_config(self, config):
+		self.config = config
+
+	def airtime(self, packet_bytes):
+		return tec_airtime(packet_bytes, self.config)
+
+	# Reply timeout of a TEC [s]
+	def timeout(self, packet_bytes):
+		estimator = self.estimator
+		rto = self.airtime(packet_bytes) + estimator.delay()
+		return min(max(rto * estimator.backoff, RTO_MIN), RTO_MAX)
+
+	# Reply received after rtt [s] from the first transmission
+	def sample(self, packet_bytes, rtt):
+		self.estimator.update(max(0.0, rtt - self.airtime(packet_bytes)))
+
+	# No reply: the next transmissions wait longer
+	def on_timeout(self):
+		estimator = self.estimator
+		if estimator.backoff * 2 * RTO_MIN <= RTO_MAX:
+			estimator.backoff *= 2
+
+	# Current estimate for the status panel
+	def describe(self):
+		estimator = self.estimator
+		if estimator.srtt is None:
+			return f"{self.config}: no RTT samples, RTO {self.timeout(bytes(PACKET_HEADER_LENGTH)):.2f} s"
+		return (f"{self.config}: SRTT {estimator.srtt:.2f} s, RTTVAR {estimator.rttvar:.2f} s, "
+				f"RTO {self.timeout(bytes(PACKET_HEADER_LENGTH)):.2f} s ({estimator.samples} samples)")
+
+# ============= TEC PIPELINE =================
+
+# NACK errors caused by the link or by a full command queue: the TEC is sent again
+TEC_RETRY_ERRORS = (PACKET_ERR_RS, PACKET_ERR_DECODE, PACKET_ERR_LENGTH, PACKET_ERR_MAC, PACKET_ERR_CMD_FULL)
+
+# TECs not sent again after a timeout, only after a NACK in TEC_RETRY_ERRORS: the reply may be lost after the
+# satellite executed them (OBC reboot and LoRa config are ACKed before), and executing them twice is not harmless
+TEC_NO_TIMEOUT_RETRY = frozenset((TEC_OBC_REBOOT, TEC_EPS_REBOOT, TEC_ADCS_REBOOT, TEC_LORA_CONFIG, TEC_VAR_CHANGE))
+
+# TER that replies with data instead of an ACK -> task codes of the TECs it replies to
+TEC_DATA_REPLIES = {TER_LORA_PING: (TEC_LORA_PING,), TER_DOWNLOAD: (TEC_PICTURE_DOWNLOAD, TEC_DOWNLOAD)}
+TEC_DATA_TASKS = frozenset(code for codes in TEC_DATA_REPLIES.values() for code in codes)
+
+class PipelineTec:
+	"""A TEC submitted to the pipeline: status is REPLY_WAITING until a final reply or timeout"""
+
+	__slots__ = ("id", "label", "packet_bytes", "task_code", "timeout", "fixed_timeout", "seal", "attempts", "tx_time", "status", "description", "elapsed")
+
+	def __init__(self, tec_id, label, packet_bytes, timeout):
+		self.id = tec_id
+		self.label = label
+		self.packet_bytes = packet_bytes
+		self.task_code = packet_bytes[2]
+		self.timeout = timeout
+		self.fixed_timeout = False # timeout given at submission, else computed at each transmission
+		self.seal = True # sealed again at each transmission, packet_bytes is the last packet sent
+		self.attempts = 0
+		self.tx_time = None # monotonic time of the last transmission
+		self.status = REPLY_WAITING
+		self.description = "queued"
+		self.elapsed = None # [s] from the last transmission to the final reply
+
+	@property
+	def done(self):
+		return self.status != REPLY_WAITING
+
+class TecPipeline:
+	"""Sliding window of TECs waiting for a reply. Replies are matched out of order on the task code in the
+	ACK/NACK payload (oldest TEC first when the same task is in flight twice). Time is given by the caller
+	(monotonic seconds), so the same pipeline runs in the GUI timers and in the daemon event loop.
+	Without a fixed timeout the reply timeout comes from the LinkTiming, RX_TIMEOUT if there is none.
+	With a TecSealer the TECs are sealed (timestamp and MAC) when they leave, so they can be queued long before."""
+
+	def __init__(self, window=TEC_WINDOW, max_retries=TEC_MAX_RETRIES, turnaround=TEC_TX_TURNAROUND, timeouts=TEC_TIMEOUTS, link=None, sealer=None):
+		self.window_max = window
+		self.window = window # reduced when the satellite reports a full command queue
+		self.max_retries = max_retries
+		self.turnaround = turnaround
+		self.timeouts = timeouts
+		self.link = link
+		self.sealer = sealer
+		self.queue = deque() # waiting for a free slot, retries go first
+		self.in_flight = [] # sent, in TX order
+		self.last_tx = None
+		self.last_packet = None # bytes of the last TEC sent
+		self.next_id = 1
+		self.deadline = None # monotonic time by which the replies must arrive (end of the contact), None for no limit
+
+	# Add a TEC at the end of the queue
+	def submit(self, label, packet_bytes, timeout=None, seal=True):
+		tec = PipelineTec(self.next_id, label, bytes(packet_bytes), timeout if timeout is not None else self.timeout_of(packet_bytes))
+		tec.fixed_timeout = timeout is not None
+		tec.seal = seal and self.sealer is not None
+		self.next_id += 1
+		self.queue.append(tec)
+		return tec
+
+	# Next TEC to transmit now, None if the window is full, the queue is empty or the radio needs a pause
+	def next_to_send(self, now):
+		if not self.queue or len(self.in_flight) >= self.window:
+			return None
+		if self.last_tx is not None and now < self.next_tx_time():
+			return None
+		head = self.queue[0]
+		if not head.fixed_timeout:
+			head.timeout = self.timeout_of(head.packet_bytes) # the radio configuration or the RTT estimate may have changed
+		if self.deadline is not None and now + head.timeout > self.deadline:
+			return None
+
+		tec = self.queue.popleft()
+		if tec.seal:
+			tec.packet_bytes = self.sealer.seal(tec.packet_bytes)
+		tec.attempts += 1
+		tec.tx_time = now
+		tec.description = "waiting for reply" if tec.attempts == 1 else f"retry {tec.attempts - 1}"
+		self.in_flight.append(tec)
+		self.last_tx = now
+		self.last_packet = tec.packet_bytes
+		return tec
+
+	# Expire the TECs without reply: return those sent again or finished
+	def check_timeouts(self, now):
+		changed = []
+		for tec in [tec for tec in self.in_flight if now - tec.tx_time >= tec.timeout]:
+			self.in_flight.remove(tec)
+			if self.link is not None:
+				self.link.on_timeout()
+			if tec.task_code in TEC_NO_TIMEOUT_RETRY:
+				self.finish(tec, now, REPLY_TIMEOUT, f"no reply after {tec.attempts} attempts, not sent again: it may have been executed")
+			else:
+				self.retry_or_finish(tec, now, REPLY_TIMEOUT, f"no reply after {tec.attempts} attempts")
+			changed.append(tec)
+		return changed
+
+	# Match a received TER to a TEC in flight, return the TEC (None if the TER is not a reply)
+	def on_reply(self, ter, payload_bytes, now):
+		if ter in (TER_ACK, TER_NACK):
+			if not payload_bytes:
+				return None
+			task_codes = (payload_bytes[0],)
+		elif ter in TEC_DATA_REPLIES:
+			task_codes = TEC_DATA_REPLIES[ter]
+		else:
+			return None
+
+		tec = next((tec for tec in self.in_flight if tec.task_code in task_codes), None)
+		if tec is None:
+			return None # late reply of a TEC already finished
+		self.in_flight.remove(tec)
+		task_code = tec.task_code
+
+		status, description = classify_reply(ter, payload_bytes, task_code)
+		if self.link is not None and tec.attempts == 1 and status in (REPLY_ACK, REPLY_NACK, REPLY_DATA):
+			self.link.sample(tec.packet_bytes, now - tec.tx_time)
+		if status == REPLY_NACK and len(payload_bytes) == 2:
+			error_code = int.from_bytes(bytes(payload_bytes[1:2]), byteorder='big', signed=True)
+			if error_code == PACKET_ERR_CMD_FULL:
+				# The satellite holds fewer TECs than in flight: shrink the window
+				self.window = max(1, len(self.in_flight))
+			if error_code in TEC_RETRY_ERRORS:
+				self.retry_or_finish(tec, now, status, description)
+				return tec
+
+		# Reply received: the window can grow back by one TEC
+		if status in (REPLY_ACK, REPLY_DATA) and self.window < self.window_max:
+			self.window += 1
+		self.finish(tec, now, status, description)
+		return tec
+
+	def retry_or_finish(self, tec, now, status, description):
+		if tec.attempts <= self.max_retries:
+			tec.description = f"{status}: {description}, sending again"
+			self.queue.appendleft(tec)
+		else:
+			self.finish(tec, now, status, description)
+
+	def finish(self, tec, now, status, description):
+		tec.status = status
+		tec.description = description
+		tec.elapsed = now - tec.tx_time
+
+	# Take back the TECs waiting for a slot (retries included), e.g. at the end of a contact
+	def take_unsent(self):
+		unsent = list(self.queue)
+		self.queue.clear()
+		return unsent
+
+	# Time between the transmission of packet_bytes and the next TEC: the link is half-duplex, a TEC sent while
+	# the satellite replies to the previous one collides with the reply and both are lost
+	def tx_gap(self, packet_bytes):
+		airtime = self.link.airtime(packet_bytes) if self.link is not None else tec_airtime(packet_bytes, LORA_DEFAULT_CONFIG)
+		return airtime + self.turnaround
+
+	# Earliest time of the next transmission
+	def next_tx_time(self):
+		return self.last_tx + self.tx_gap(self.last_packet)
+
+	# Reply timeout of a packet
+	def timeout_of(self, packet_bytes):
+		if packet_bytes[2] in self.timeouts:
+			return self.timeouts[packet_bytes[2]]
+		if self.link is not None:
+			return self.link.timeout(packet_bytes)
+		return RX_TIMEOUT
+
+	# Time of the next timeout or transmission, None when idle
+	def next_deadline(self):
+		deadlines = [tec.tx_time + tec.timeout for tec in self.in_flight]
+		if self.queue and len(self.in_flight) < self.window:
+			tx_time = self.next_tx_time() if self.last_tx is not None else 0.0
+			if self.deadline is None or tx_time + self.queue[0].timeout <= self.deadline:
+				deadlines.append(tx_time)
+		return min(deadlines) if deadlines else None
+
+	@property
+	def idle(self):
+		return not self.queue and not self.in_flight
+
+# ============= TEC SCHEDULER =================
+
+# Contact window of a predicted pass (UTC)
+class ContactWindow(namedtuple("ContactWindow", ["aos", "los"])):
+	__slots__ = ()
+
+	@classmethod
+	def from_pass(cls, sat_pass):
+		"""Build from an orbit_simulator.SatellitePass or an (aos, los) pair"""
+		if hasattr(sat_pass, "aos") and hasattr(sat_pass.aos, "time"):
+			return cls(sat_pass.aos.time, sat_pass.los.time)
+		aos, los = sat_pass
+		return cls(aos, los)
+
+# Wall clock of the scheduler
+class SystemClock:
+	@staticmethod
+	def utcnow():
+		return datetime.utcnow()
+
+	@staticmethod
+	def monotonic():
+		return time.monotonic()
+
+# Clock for offline runs: time only moves with advance()
+class SimulatedClock:
+	def __init__(self, start):
+		self.start = start
+		self.elapsed = 0.0
+
+	def utcnow(self):
+		return self.start + timedelta(seconds=self.elapsed)
+
+	def monotonic(self):
+		return self.elapsed
+
+	def advance(self, seconds):
+		self.elapsed += seconds
+
+class TecScheduler:
+	"""Release the queued TECs to a TecPipeline during the predicted contact windows, from AOS + aos_margin.
+	A TEC leaves only if its reply can arrive los_margin before LOS; the others wait for the next pass, together
+	with the retries still in the pipeline when the contact ends"""
+
+	def __init__(self, pipeline, windows=(), clock=None, aos_margin=SCHEDULER_AOS_MARGIN, los_margin=SCHEDULER_LOS_MARGIN):
+		self.pipeline = pipeline
+		self.clock = clock if clock is not None else SystemClock()
+		self.aos_margin = timedelta(seconds=aos_margin)
+		self.los_margin = timedelta(seconds=los_margin)
+		self.windows = []
+		self.set_windows(windows)
+
+	# Replace the predicted passes (SatellitePass or (aos, los) pairs)
+	def set_windows(self, windows):
+		self.windows = sorted(ContactWindow.from_pass(window) for window in windows)
+
+	# Usable part of a contact window
+	def usable(self, window):
+		return window.aos + self.aos_margin, window.los - self.los_margin
+
+	# Contact window in use at now, None between passes
+	def current_window(self, now=None):
+		now = self.clock.utcnow() if now is None else now
+		for window in self.windows:
+			start, end = self.usable(window)
+			if start <= now < end:
+				return window
+		return None
+
+	# First contact window whose usable part has not ended yet
+	def next_window(self, now=None):
+		now = self.clock.utcnow() if now is None else now
+		return next((window for window in self.windows if self.usable(window)[1] > now), None)
+
+	# Decide what to send now
+	def step(self, packets):
+		"""Return (count, carried): number of TECs at the head of the queue to submit to the pipeline now, TECs taken back
+		from the pipeline to put at the head of the queue - packets: packet bytes of each queued TEC, in queue order"""
+
+		now = self.clock.utcnow()
+		window = self.current_window(now)
+
+		# Outside a contact nothing is sent, the pending retries wait for the next pass
+		if window is None:
+			self.pipeline.deadline = self.clock.monotonic()
+			return 0, self.pipeline.take_unsent()
+
+		# The pipeline sends nothing (retries included) whose reply would arrive after the usable end of the contact
+		end = self.usable(window)[1]
+		self.pipeline.deadline = self.clock.monotonic() + (end - now).total_seconds()
+
+		# Fill the free slots of the pipeline window, in queue order: a TEC whose reply would arrive too
+		# close to LOS stops the release (the TECs after it must not overtake it)
+		pipeline = self.pipeline
+		free = pipeline.window - len(pipeline.in_flight) - len(pipeline.queue)
+		tx_delay = 0.0 if pipeline.last_tx is None else max(0.0, pipeline.next_tx_time() - self.clock.monotonic())
+		tx_delay += sum(pipeline.tx_gap(tec.packet_bytes) for tec in pipeline.queue)
+		count = 0
+		for packet_bytes in packets:
+			if count >= free:
+				break
+			if now + timedelta(seconds=tx_delay + pipeline.timeout_of(packet_bytes)) > end:
+				break
+			tx_delay += pipeline.tx_gap(packet_bytes)
+			count += 1
+		return count, []
+
+	# Stop gating the pipeline, TECs are sent manually again
+	def stop(self):
+		self.pipeline.deadline = None
+
+	# Short description of the scheduler state for the GUI
+	def describe(self, now=None):
+		now = self.clock.utcnow() if now is None else now
+		window = self.current_window(now)
+		if window is not None:
+			return f"IN CONTACT: {format_duration((self.usable(window)[1] - now).total_seconds())} left"
+
+		window = self.next_window(now)
+		if window is None:
+			return "NO CONTACTS"
+		start = self.usable(window)[0]
+		return f"NEXT CONTACT: {format_duration((start - now).total_seconds())} ({start.strftime('%H:%M:%S')} UTC)"
+
+# Format seconds as HH:MM:SS
+def format_duration(seconds):
+	h, remainder = divmod(max(0, int(seconds)), 3600)
+	m, s = divmod(remainder, 60)
+	return f"{h:02}:{m:02}:{s:02}"
+
+# ============= FRAGMENTATION =================
+
+# Segment of a fragmented payload: data is a memoryview into the received payload
+# The CRC-32 of the whole payload tells a new transfer from an old one reusing the same 8 bits transfer ID
+Segment = namedtuple("Segment", ["transfer_id", "sequence", "count", "offset", "crc", "data"])
+
+# Split a payload into segment payloads, each one fitting a packet
+def split_payload(data, transfer_id, segment_size=SEGMENT_DATA_MAX):
+	"""Return the list of segment payloads (header + data) of data: transfer_id - 0..255, shared by all the segments"""
+
+	if not 0 <= transfer_id <= 0xFF:
+		raise ValueError(f"Transfer ID out of range: {transfer_id}")
+	if not 0 < segment_size <= SEGMENT_DATA_MAX:
+		raise ValueError(f"Segment size must be 1..{SEGMENT_DATA_MAX} bytes")
+
+	count = max(1, -(-len(data) // segment_size))
+	if count > SEGMENT_COUNT_MAX:
+		raise ValueError(f"Payload too long ({len(data)} bytes, max {SEGMENT_COUNT_MAX * segment_size})")
+
+	pack = SEGMENT_HEADER_STRUCT.pack
+	crc = binascii.crc32(data)
+	with memoryview(data) as view:
+		return [pack(transfer_id, sequence, count, offset, crc) + view[offset:offset + segment_size]
+			for sequence, offset in enumerate(range(0, count * segment_size, segment_size))]
+
+# Build the packets carrying a payload of any length
+def build_segment_packets(gs_text, tec_code, data, transfer_id, ecc_enabled, encode=False, sealed=True, unix_time=None, segment_size=SEGMENT_DATA_MAX):
+	return [build_packet(gs_text, tec_code, segment, ecc_enabled, encode, sealed, unix_time)
+		for segment in split_payload(data, transfer_id, segment_size)]
+
+# Read the segment header of a packet payload
+def parse_segment(payload_bytes):
+	if len(payload_bytes) < SEGMENT_HEADER_LENGTH:
+		raise ValueError(f"Segment too short ({len(payload_bytes)} bytes)")
+	transfer_id, sequence, count, offset, crc = SEGMENT_HEADER_STRUCT.unpack_from(payload_bytes)
+	if sequence >= count:
+		raise ValueError(f"Segment {sequence} out of {count}")
+	return Segment(transfer_id, sequence, count, offset, crc, memoryview(payload_bytes)[SEGMENT_HEADER_LENGTH:])
+
+class Reassembly:
+	"""One transfer being reassembled: the buffer is allocated once for count full segments when the first segment
+	arrives and each segment is copied at its offset, in any order. The length is known from the last segment,
+	the payload is checked against the CRC-32 of the segment headers"""
+
+	__slots__ = ("count", "crc", "buffer", "received", "received_count", "length", "last_time")
+
+	def __init__(self, count, now, crc, segment_max=SEGMENT_DATA_MAX):
+		self.count = count
+		self.crc = crc
+		self.buffer = bytearray(count * segment_max)
+		self.received = bytearray(count) # 1 for each segment received
+		self.received_count = 0
+		self.length = None
+		self.last_time = now
+
+	@property
+	def complete(self):
+		return self.received_count == self.count
+
+	# Segment of this transfer, not of another one with the same transfer ID
+	def matches(self, segment):
+		return segment.count == self.count and segment.crc == self.crc
+
+	# Copy a segment into the buffer, False if it was already received
+	def add(self, segment, now):
+		if not self.matches(segment):
+			raise ValueError(f"Segment {segment.sequence} of another transfer (CRC 0x{segment.crc:08X}, expected 0x{self.crc:08X})")
+		if self.received[segment.sequence]:
+			return False
+
+		end = segment.offset + len(segment.data)
+		if end > len(self.buffer):
+			raise ValueError(f"Segment {segment.sequence} beyond the transfer ({end} > {len(self.buffer)} bytes)")
+		if segment.sequence == self.count - 1:
+			self.length = end
+		elif self.length is not None and end > self.length:
+			raise ValueError(f"Segment {segment.sequence} beyond the end of the transfer")
+
+		self.buffer[segment.offset:end] = segment.data
+		self.received[segment.sequence] = 1
+		self.received_count += 1
+		self.last_time = now
+		return True
+
+	# Sequence numbers of the segments not received yet
+	def missing(self):
+		received = self.received
+		return [sequence for sequence in range(self.count) if not received[sequence]]
+
+	# Reassembled payload, once complete: ValueError if it does not match the CRC-32
+	def payload(self):
+		payload = bytes(memoryview(self.buffer)[:self.length])
+		if binascii.crc32(payload) != self.crc:
+			raise ValueError(f"Reassembled payload CRC mismatch (0x{binascii.crc32(payload):08X}, expected 0x{self.crc:08X})")
+		return payload
+
+class Reassembler:
+	"""Reassemble fragmented payloads, keyed by (source, transfer ID). Segments may arrive out of order or twice,
+	missing() lists the gaps of a transfer. Transfers idle for timeout seconds are dropped, as are the idle ones
+	beyond max_transfers. A segment with another CRC-32 or number of segments belongs to a new transfer reusing
+	the transfer ID: it restarts the transfer. Completed transfers are remembered for completed_window seconds,
+	so their late segments (radio repeats, other stations) count as duplicates instead of starting a new transfer.
+	The same payload sent again with the same transfer ID within that window is taken for a repeat"""
+
+	def __init__(self, timeout=REASSEMBLY_TIMEOUT, max_transfers=REASSEMBLY_TRANSFERS, completed_window=REASSEMBLY_COMPLETED_WINDOW, clock=time.monotonic):
+		self.timeout = timeout
+		self.max_transfers = max_transfers
+		self.completed_window = completed_window
+		self.clock = clock
+		self.transfers = OrderedDict() # (source, transfer ID) -> Reassembly, least recently updated first
+		self.recent = OrderedDict() # (source, transfer ID) -> (number of segments, CRC-32, completion time), oldest first
+		self.completed = 0
+		self.duplicates = 0
+		self.errors = 0
+		self.dropped = 0
+
+	# Drop the transfers idle for more than the timeout
+	def expire(self, now=None):
+		now = self.clock() if now is None else now
+		transfers = self.transfers
+		while transfers and now - next(iter(transfers.values())).last_time > self.timeout:
+			transfers.popitem(last=False)
+			self.dropped += 1
+		recent = self.recent
+		while recent and now - next(iter(recent.values()))[2] > self.completed_window:
+			recent.popitem(last=False)
+
+	# Add a segment, return the payload when its transfer is complete, None otherwise
+	def add(self, segment, source=0):
+		now = self.clock()
+		self.expire(now)
+
+		key = (source, segment.transfer_id)
+		transfer = self.transfers.get(key)
+		if transfer is None:
+			# Late segment of a transfer already completed
+			completed = self.recent.get(key)
+			if completed is not None and completed[:2] == (segment.count, segment.crc):
+				self.duplicates += 1
+				return None
+		if transfer is None or not transfer.matches(segment):
+			if transfer is not None:
+				self.dropped += 1
+			self.recent.pop(key, None)
+			transfer = self.transfers[key] = Reassembly(segment.count, now, segment.crc)
+			if len(self.transfers) > self.max_transfers:
+				self.transfers.popitem(last=False)
+				self.dropped += 1
+
+		try:
+			added = transfer.add(segment, now)
+		except ValueError:
+			self.errors += 1
+			raise
+		self.transfers.move_to_end(key)
+		if not added:
+			self.duplicates += 1
+			return None
+		if not transfer.complete:
+			return None
+
+		del self.transfers[key]
+		try:
+			payload = transfer.payload()
+		except ValueError:
+			self.errors += 1
+			raise
+		self.recent[key] = (transfer.count, transfer.crc, now)
+		self.completed += 1
+		return payload
+
+	# Add the segment carried by a received Packet
+	def add_packet(self, packet):
+		return self.add(parse_segment(packet.payload_bytes), packet.station_id)
+
+	# Sequence numbers missing from a transfer, None if it is not in progress
+	def missing(self, transfer_id, source=0):
+		transfer = self.transfers.get((source, transfer_id))
+		return transfer.missing() if transfer is not None else None
 
 # ============= CONVERSION FUNCTIONS ============= 
 
+# Lookup tables built once at import, read-only: code -> label and label -> code
+# TEC and TER can share a label ("LoRa ping"): the TER wins, as it is searched first
+TER_TEC_LABELS = MappingProxyType({**{code: label for label, code in TEC_TASKS.items()}, **{code: label for label, code in TER_TASKS.items()}})
+TER_TEC_IDS = MappingProxyType({**TEC_TASKS, **TER_TASKS})
+GS_LABELS = MappingProxyType({code: label for label, code in TX_SOURCES.items()})
+GS_IDS = MappingProxyType(dict(TX_SOURCES))
+
+# Labels of every byte value, for the vectorized mapping of codes read from the database
+TER_TEC_LABEL_TABLE = np.array([TER_TEC_LABELS.get(code, f"Unknown ({code})") for code in range(256)], dtype=object)
+GS_LABEL_TABLE = np.array([GS_LABELS.get(code, f"Unknown ({code})") for code in range(256)], dtype=object)
+
 # Functions to get labels of TER and TEC codes
 def get_ter_tec_label(code):
 	"""Get the label for a given TER or TEC code"""
 
-	# search in TER tasks first
-	for label, val in TER_TASKS.items():
-		if int(val) == code:
-			return label
-		
-	# then search in TEC tasks
-	for label, val in TEC_TASKS.items():
-		if int(val) == code:
-			return label
-	return f"Unknown ({code})"
+	label = TER_TEC_LABELS.get(code)
+	return label if label is not None else f"Unknown ({code})"
 
 # Functions to get IDs of TER and TEC labels
 def get_ter_tec_id(tec_label):
 	"""Get the ID for a given TEC or TER label"""
 
-	# search in TER tasks first
-	for label, val in TER_TASKS.items():
-		if label == tec_label:
-			return int(val)
-	
-	# then search in TEC tasks
-	for label, val in TEC_TASKS.items():
-		if label == tec_label:
-			return int(val)
-
-	return f"Unknown ({tec_label})"
+	code = TER_TEC_IDS.get(tec_label)
+	return code if code is not None else f"Unknown ({tec_label})"
 
 # Functions to get Ground Station labels and IDs
 def get_gs_label(station_id):
 	"""Get the Ground Station label for a given station ID: station_id"""
 
-	for label, val in TX_SOURCES.items():
-		if int(val) == station_id:
-			return label
-	return f"Unknown ({station_id})"
+	label = GS_LABELS.get(station_id)
+	return label if label is not None else f"Unknown ({station_id})"
 
 # Functions to get Ground Station IDs
 def get_gs_id(gs_label):
-
 	"""Get the Ground Station ID for a given station label: gs_label"""
-	for label, val in TX_SOURCES.items():
-		if label == gs_label:
-			return int(val)
-	return f"Unknown ({gs_label})"
+
+	code = GS_IDS.get(gs_label)
+	return code if code is not None else f"Unknown ({gs_label})"
+
+# Map many codes at once with a label table, codes outside a byte (or not integers) are looked up one by one
+def map_labels(codes, table, get_label):
+	codes = np.asarray(codes)
+	if codes.dtype.kind in "iu" and (codes.size == 0 or (codes.min() >= 0 and codes.max() < len(table))):
+		return table[codes]
+	return np.array([get_label(code) for code in codes.tolist()], dtype=object)
+
+# Labels of many TER/TEC codes (list or numpy array), as a numpy array
+def get_ter_tec_labels(codes):
+	"""Get the labels for many TER or TEC codes: codes"""
+	return map_labels(codes, TER_TEC_LABEL_TABLE, get_ter_tec_label)
+
+# Labels of many Ground Station IDs (list or numpy array), as a numpy array
+def get_gs_labels(station_ids):
+	"""Get the Ground Station labels for many station IDs: station_ids"""
+	return map_labels(station_ids, GS_LABEL_TABLE, get_gs_label)
 
 # ============= DATA EXTRACTION FROM HEX =============
 # Function for data extraction from HEX to save specific fields in the database
+# The layouts are declared in payload_codec, use pc.decode_payloads to decode many payloads of the same task at once
 
 # HOUSEKEEPING TER
 # LORA PONG
 def extract_lora_pong(payload_bytes):
 	"""Extract RSSI, SNR, and frequency shift from LORA_PONG payload: payload_bytes"""
 
-	rssi_bytes = bytes(payload_bytes[0:4])
-	rssi = struct.unpack(">f", rssi_bytes)[0]
-	snr_bytes = bytes(payload_bytes[4:8])
-	snr = struct.unpack(">f", snr_bytes)[0]
-	freq_shift_bytes = bytes(payload_bytes[8:12])
-	freq_shift = struct.unpack(">f", freq_shift_bytes)[0]
-
-	return {
-		"rssi": rssi,
-		"snr": snr,
-		"deltaf": freq_shift
-	}
+	return pc.decode_payload(TER_LORA_PING, payload_bytes)
 
 # NACK
 def extract_nack(payload_bytes):
 	"""Extract task_ID and error_code from NACK payload: payload_bytes"""
 
-	task_ID = payload_bytes[0]
-	error_code = int.from_bytes([payload_bytes[1]], byteorder='big', signed=True)
-
-	return {
-		"task_ID": task_ID,
-		"error_code": error_code
-	}
+	return pc.decode_payload(TER_NACK, payload_bytes)
 
 # ACK
 def extract_ack(payload_bytes):
 	"""Extract task_ID from ACK payload: payload_bytes"""
 
-	task_ID = payload_bytes[0]
-
-	return {
-		"task_ID": task_ID
-	}
+	return pc.decode_payload(TER_ACK, payload_bytes)
 
 # HOUSEKEEPING TEC
 # LORA STATE
 def extract_lora_state(payload_bytes):
 	"""Extract TX state and duration from LORA_STATE payload: payload_bytes"""
 
-	tx_state = bytes(payload_bytes[0])[0]
-	duration_bytes = bytes(payload_bytes[1:4])
-	duration = int.from_bytes(duration_bytes, byteorder='big')
-
-	return {
-		"tx_state": tx_state,
-		"duration": duration
-	}
+	return pc.decode_payload(TEC_LORA_STATE, payload_bytes)
 
 # LORA CONFIG
 def extract_lora_config(payload_bytes):
 	"""Extract frequency, bandwidth, SF, CR, power, and duration from LORA_CONFIG payload: payload_bytes"""
 
-	frequency_bytes = bytes(payload_bytes[0:3])
-	frequency_mhz = int.from_bytes(frequency_bytes, byteorder='big')/1000.0
-
-	sf_cr_byte = bytes(payload_bytes[3])[0]
-	bandwidth_bits = (sf_cr_byte >> 6) & 0b11
-	if bandwidth_bits == 0b00:
-		bandwidth = 62.5
-	elif bandwidth_bits == 0b01:
-		bandwidth = 125
-	elif bandwidth_bits == 0b10:
-		bandwidth = 250
-	elif bandwidth_bits == 0b11:
-		bandwidth = 500
-	else:
-		bandwidth = None
-
-	sf_bits = (sf_cr_byte >> 3) & 0b111
-	sf = sf_bits + 5
-
-	cr_bits = sf_cr_byte & 0b111
-	# Mappatura CR: 0b000 -> CR4/5, 0b001 -> CR4/6, 0b010 -> CR4/7, 0b011 -> CR4/8
-	if cr_bits == 0b000:
-		cr = "CR4/5"
-	elif cr_bits == 0b001:
-		cr = "CR4/6"
-	elif cr_bits == 0b010:
-		cr = "CR4/7"
-	elif cr_bits == 0b011:
-		cr = "CR4/8"
-	else:
-		cr = None  # Invalid CR bits
-
-	power_byte = bytes(payload_bytes[4])[0]
-	power_bits = (power_byte >> 3) & 0b11111
-	TX_power = power_bits - 9
-
-	duration_byte = bytes([payload_bytes[5]])
-	duration = int.from_bytes(duration_byte, byteorder='big')
-
-	return {
-		"frequency_mhz": frequency_mhz,
-		"bandwidth_khz": bandwidth,
-		"sf": sf,
-		"cr": cr,
-		"TX_power_dbm": TX_power,
-		"duration": duration
-	}
\ No newline at end of file
+	fields = pc.decode_payload(TEC_LORA_CONFIG, payload_bytes)
+	fields["cr"] = f"CR4/{fields['cr']}"
+	return fields
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""
+Bulk download of satellite files with selective repeat
+
+The GS asks for a file with a "Picture download" or "Download" TEC, the satellite streams it as numbered
+chunks in TER_DOWNLOAD packets: each chunk is a GS_task segment (transfer ID, sequence, number of chunks,
+byte offset, CRC-32 of the file). The GS keeps the bitmap of the chunks received and, once a burst is over, asks again only
+for the gaps with a bitmap in the next request. The partial file and its bitmap are saved at the end of
+each burst, so a download interrupted by LOS resumes at the next pass from the chunks still missing.
+
+Request payload: file ID (u16), transfer ID (u8), first chunk (u16), bitmap
+	bit i of the bitmap (MSB first) set: chunk first + i is requested
+	no bitmap: all the chunks from the first one to the end of the file
+
+	download = BulkDownload.resume("img_12.jpg", TEC_PICTURE_DOWNLOAD, file_id=12, transfer_id=1)
+	payload = download.request(now) -> payload of the TEC to send
+	download.add(segment, now) -> for each TER_DOWNLOAD segment of the transfer
+	download.poll(now) -> payload of the next request once the burst is over, None otherwise
+"""
+
+import json
+import os
+import struct
+import numpy as np
+
+try:
+	from . import GS_task as gt
+except ImportError:
+	import GS_task as gt
+
+# ========== CONSTANTS AND CONFIGURATION ==========
+
+DOWNLOAD_REQUEST_STRUCT = struct.Struct(">HBH") # file ID, transfer ID, first chunk requested
+DOWNLOAD_BITMAP_MAX = gt.PACKET_PAYLOAD_MAX - DOWNLOAD_REQUEST_STRUCT.size # [bytes] 93 bytes: 744 chunks per request
+DOWNLOAD_IDLE_CHUNKS = 4 # a burst is over when no chunk arrives for the time on air of this many chunks
+DOWNLOAD_IDLE_MIN = 3.0 # [s] minimum wait for the next chunk of a burst
+DOWNLOAD_PART_SUFFIX = ".part" # partial file, the bitmap is saved next to it in .part.json
+
+# ========== PROTOCOL ==========
+
+# Payload of a download TEC
+def build_request(file_id, transfer_id, first=0, bitmap=b""):
+	if len(bitmap) > DOWNLOAD_BITMAP_MAX:
+		raise ValueError(f"Bitmap too long ({len(bitmap)} bytes, max {DOWNLOAD_BITMAP_MAX})")
+	return DOWNLOAD_REQUEST_STRUCT.pack(file_id, transfer_id, first) + bytes(bitmap)
+
+# Read a download TEC payload: return (file ID, transfer ID, first chunk, bitmap)
+def parse_request(payload_bytes):
+	if len(payload_bytes) < DOWNLOAD_REQUEST_STRUCT.size:
+		raise ValueError(f"Download request too short ({len(payload_bytes)} bytes)")
+	file_id, transfer_id, first = DOWNLOAD_REQUEST_STRUCT.unpack_from(payload_bytes)
+	return file_id, transfer_id, first, bytes(payload_bytes[DOWNLOAD_REQUEST_STRUCT.size:])
+
+# Sequence numbers asked by a request, for a file of count chunks
+def requested_chunks(first, bitmap, count):
+	if not bitmap:
+		return np.arange(first, count)
+	chunks = np.flatnonzero(np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8))) + first
+	return chunks[chunks < count]
+
+# Wait for the next chunk of a burst with the LoRa configuration and round trip estimate of a LinkTiming
+def idle_timeout(link):
+	chunk_time = gt.lora_time_on_air(gt.PACKET_HEADER_LENGTH + gt.PACKET_PAYLOAD_MAX, link.config)
+	return max(DOWNLOAD_IDLE_MIN, DOWNLOAD_IDLE_CHUNKS * chunk_time + link.estimator.delay())
+
+# ========== GROUND STATION ==========
+
+class BulkDownload:
+	"""Download of one file: the chunks are reassembled in a gt.Reassembly, allocated when the first chunk tells
+	the number of chunks. Each request asks for the chunks missing from the first gap on, as one run to the end
+	of the file when nothing after the gap was received, else as a bitmap of up to DOWNLOAD_BITMAP_MAX bytes"""
+
+	def __init__(self, path, tec_code, file_id, transfer_id, idle_timeout=DOWNLOAD_IDLE_MIN):
+		self.path = path
+		self.tec_code = tec_code
+		self.file_id = file_id
+		self.transfer_id = transfer_id
+		self.idle_timeout = idle_timeout
+		self.transfer = None # gt.Reassembly, created by the first chunk
+		self.waiting = False # request sent, its burst is not over
+		self.requested = None # chunks asked by the last request, None: the whole file (size unknown)
+		self.burst_received = 0
+		self.last_time = None # time of the last request or chunk
+		self.requests = 0
+		self.duplicates = 0
+		self.pass_start = None # time of the first chunk of this pass
+		self.pass_bytes = 0
+
+	@property
+	def count(self):
+		return self.transfer.count if self.transfer is not None else None
+
+	@property
+	def received(self):
+		return self.transfer.received_count if self.transfer is not None else 0
+
+	@property
+	def complete(self):
+		return self.transfer is not None and self.transfer.complete
+
+	# Sequence numbers of the chunks not received yet, None while the size is unknown
+	def missing(self):
+		if self.transfer is None:
+			return None
+		return np.flatnonzero(np.frombuffer(self.transfer.received, dtype=np.uint8) == 0)
+
+	# Payload of the request for the chunks still missing
+	def request(self, now):
+		missing = self.missing()
+		if missing is None:
+			first, bitmap = 0, b""
+			self.requested = None
+		elif not len(missing):
+			raise ValueError("Download already complete")
+		else:
+			first = int(missing[0])
+			if len(missing) == self.count - first:
+				bitmap = b"" # everything after the first gap is missing
+				self.requested = len(missing)
+			else:
+				missing = missing[missing < first + 8 * DOWNLOAD_BITMAP_MAX]
+				flags = np.zeros(int(missing[-1]) - first + 1, dtype=np.uint8)
+				flags[missing - first] = 1
+				bitmap = np.packbits(flags).tobytes()
+				self.requested = len(missing)
+
+		self.waiting = True
+		self.burst_received = 0
+		self.last_time = now
+		self.requests += 1
+		return build_request(self.file_id, self.transfer_id, first, bitmap)
+
+	# Add a chunk of the transfer, False if it was already received
+	def add(self, segment, now):
+		if self.transfer is None:
+			self.transfer = gt.Reassembly(segment.count, now, segment.crc)
+		elif not self.transfer.matches(segment):
+			raise ValueError(f"Transfer {self.transfer_id}: {segment.count} chunks with CRC 0x{segment.crc:08X} instead of "
+							 f"{self.transfer.count} with CRC 0x{self.transfer.crc:08X}, the file changed")
+
+		self.last_time = now
+		if not self.transfer.add(segment, now):
+			self.duplicates += 1
+			return False
+
+		if self.pass_start is None:
+			self.pass_start = now
+		self.pass_bytes += len(segment.data)
+		self.burst_received += 1
+		return True
+
+	# The satellite sent everything requested, or stopped sending
+	def burst_over(self, now):
+		if not self.waiting:
+			return False
+		if self.requested is not None and self.burst_received >= self.requested:
+			return True
+		return now - self.last_time > self.idle_timeout
+
+	# Payload of the next request when the burst is over and chunks are missing, None otherwise
+	def poll(self, now):
+		if self.complete or not self.burst_over(now):
+			return None
+		self.save()
+		return self.request(now)
+
+	# Stop requesting (end of the contact or no reply), the next request resumes from the saved state
+	def pause(self):
+		self.waiting = False
+		self.pass_start = None
+		self.pass_bytes = 0
+		self.save()
+
+	# [bytes/s] received in this pass
+	def throughput(self, now):
+		if self.pass_start is None or now <= self.pass_start:
+			return 0.0
+		return self.pass_bytes / (now - self.pass_start)
+
+	def describe(self, now):
+		count = "?" if self.count is None else self.count
+		return f"{os.path.basename(self.path)}: {self.received}/{count} chunks, {self.throughput(now):.0f} B/s, {self.requests} requests"
+
+	# ========== PERSISTENCE ==========
+
+	@property
+	def part_path(self):
+		return self.path + DOWNLOAD_PART_SUFFIX
+
+	@property
+	def state_path(self):
+		return self.part_path + ".json"
+
+	# Save the partial file and the bitmap of the chunks received
+	def save(self):
+		if self.transfer is None:
+			return
+		transfer = self.transfer
+		state = {"tec": self.tec_code, "file_id": self.file_id, "transfer_id": self.transfer_id, "count": transfer.count,
+				 "crc": transfer.crc, "length": transfer.length, "received": np.packbits(np.frombuffer(transfer.received, dtype=np.uint8)).tobytes().hex()}
+
+		# The state is replaced last: a crash in between leaves the previous bitmap, whose chunks are in both files
+		with open(self.part_path, "wb") as f:
+			f.write(transfer.buffer)
+		with open(self.state_path + ".tmp", "w") as f:
+			json.dump(state, f)
+		os.replace(self.state_path + ".tmp", self.state_path)
+
+	# Download of path, continuing from its saved state if it is the same file and transfer
+	@classmethod
+	def resume(cls, path, tec_code, file_id, transfer_id, now=0.0, idle_timeout=DOWNLOAD_IDLE_MIN):
+		download = cls(path, tec_code, file_id, transfer_id, idle_timeout)
+		try:
+			with open(download.state_path) as f:
+				state = json.load(f)
+		except (OSError, ValueError):
+			return download
+		if (state["tec"], state["file_id"], state["transfer_id"]) != (tec_code, file_id, transfer_id) or "crc" not in state:
+			return download
+
+		transfer = gt.Reassembly(state["count"], now, state["crc"])
+		flags = np.unpackbits(np.frombuffer(bytes.fromhex(state["received"]), dtype=np.uint8))[:transfer.count]
+		with open(download.part_path, "rb") as f:
+			if f.readinto(transfer.buffer) != len(transfer.buffer):
+				return download # partial file truncated: start again
+		transfer.received[:] = flags.tobytes()
+		transfer.received_count = int(flags.sum())
+		transfer.length = state["length"]
+		download.transfer = transfer
+		return download
+
+	# Write the complete file and remove the partial one, return its length
+	def finish(self):
+		payload = self.transfer.payload()
+		with open(self.path, "wb") as f:
+			f.write(payload)
+		for path in (self.part_path, self.state_path):
+			if os.path.exists(path):
+				os.remove(path)
+		self.waiting = False
+		return len(payload)
+
+# ========== SATELLITE SIDE ==========
+
+class DownloadSource:
+	"""Answer download requests as the satellite does, for emulators: files - {file ID: bytes}"""
+
+	def __init__(self, files, chunk_size=gt.SEGMENT_DATA_MAX):
+		self.files = files
+		self.chunk_size = chunk_size
+		self.chunks = {} # (file ID, transfer ID) -> chunk payloads
+
+	# Chunk payloads to send for a request payload, in order
+	def serve(self, payload_bytes):
+		file_id, transfer_id, first, bitmap = parse_request(payload_bytes)
+		key = (file_id, transfer_id)
+		chunks = self.chunks.get(key)
+		if chunks is None:
+			if file_id not in self.files:
+				raise KeyError(f"Unknown file {file_id}")
+			chunks = self.chunks[key] = gt.split_payload(self.files[file_id], transfer_id, self.chunk_size)
+		return [chunks[sequence] for sequence in requested_chunks(first, bitmap, len(chunks))]
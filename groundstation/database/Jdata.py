@@ -3,9 +3,14 @@ from datetime import datetime
 import sys
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QPalette, QColor
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex
 import os
 import struct
+import csv
+import threading
+import queue
+from contextlib import contextmanager
+from pathlib import Path
 
 try:
     # Attempting execution as a module
@@ -25,14 +30,205 @@ DB_PATH = os.path.join(BASE_DIR, "SatelliteDB.db")
 # PACKET CONSTANTS
 PACKET_HEADER_LENGTH = 12 # 4 bytes for header + 4 bytes for MAC + 4 bytes for timestamp
 BYTE_RS_ON = 0xAA
-import pandas as pd
 BYTE_RS_OFF = 0x55
 
 # Connection flag
 connection = None
 
+# SQLite performance profile, applied to every connection
+# WAL lets Grafana and the DB viewer read while the GUI writes, NORMAL sync is safe in WAL mode
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000", # [KiB] 16 MB page cache
+    "PRAGMA mmap_size=268435456", # [bytes] 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Connection pool configuration
+DB_POOL_READERS = 4 # maximum number of read-only connections
+DB_STATEMENT_CACHE = 256 # prepared statements cached by each connection
+
+# Shared connection pool (see get_pool)
+pool = None
+
+# Packet viewer configuration
+VIEWER_PAGE_SIZE = 256 # rows fetched from the database each time the viewer scrolls to the end
+
+# Export configuration
+EXPORT_CHUNK_SIZE = 5000 # rows read from the database and written to the file at a time
+EXPORT_PARQUET_COMPRESSION = "zstd"
+EXPORT_TER_TABLES = ("LORA_PONG", "NACK", "ACK")
+
+# Indexes for the viewer and analysis filters (date range, source, TEC/TER type)
+DB_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_packets_gs_time ON packets (GS_time)",
+    "CREATE INDEX IF NOT EXISTS idx_packets_gs_date ON packets (GS_date, GS_time)",
+    "CREATE INDEX IF NOT EXISTS idx_packets_gs_date_key ON packets (COALESCE(GS_date, ''), GS_time)",
+    "CREATE INDEX IF NOT EXISTS idx_packets_source ON packets (source, GS_time)",
+    "CREATE INDEX IF NOT EXISTS idx_packets_tec_ter ON packets (tec_ter, GS_time)",
+)
+
+# A packet received twice (radio repeats, several stations) has the same source, TX time and MAC
+# Unsealed packets have MAC 0 and are not unique
+DB_UNIQUE_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_packets_unique ON packets (source, TX_time, mac) WHERE mac <> '0'"
+SQL_SELECT_DUPLICATES = """
+    SELECT id FROM packets WHERE mac <> '0' AND id NOT IN (
+        SELECT MIN(id) FROM packets WHERE mac <> '0' GROUP BY source, TX_time, mac
+    )
+"""
+DB_DUPLICATES_TABLE = "packets_duplicates" # copies saved before the unique index, with their own GS time, RSSI and SNR
+
+# ============ CONNECTION POOL ============
+
+class ConnectionPool:
+    """One writer connection and a pool of read-only connections on the same database file.
+    Connections are kept open, so their prepared statement cache survives between GUI actions"""
+
+    def __init__(self, path=DB_PATH, writer=None, max_readers=DB_POOL_READERS):
+        self.path = path
+        self.max_readers = max_readers
+
+        # Writer: a single connection, serialized by a lock so background ingest and GUI do not interleave transactions
+        self._writer = writer
+        self._writer_lock = threading.RLock()
+
+        # Readers: idle connections are kept in a queue, new ones are opened up to max_readers
+        self._readers = queue.LifoQueue()
+        self._readers_count = 0
+        self._readers_lock = threading.Lock()
+        self._all_readers = []
+
+    # Writer connection, used inside a "with" block
+    @contextmanager
+    def writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = configure_connection(sqlite3.connect(self.path, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE))
+            yield self._writer
+
+    # Read-only connection, used inside a "with" block and returned to the pool at the end
+    @contextmanager
+    def reader(self):
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            # Do not leave a read transaction open: it would block the WAL checkpoint
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if self._readers_count < self.max_readers:
+                self._readers_count += 1
+                uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE)
+                # journal_mode is stored in the database file and can not be set from a read-only connection
+                for pragma in DB_PRAGMAS[1:]:
+                    conn.execute(pragma)
+                self._all_readers.append(conn)
+                return conn
+
+        # All readers busy: wait for one to be returned
+        return self._readers.get()
+
+    # Close all connections
+    def close(self):
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+            self._readers = queue.LifoQueue()
+            self._readers_count = 0
+
+# Open the shared pool on the database of a writer connection
+def open_pool(conn):
+    """Create the shared pool using conn as writer connection: conn"""
+
+    global pool
+
+    # The file of the main database of the connection
+    path = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+
+    if pool is not None and pool._writer is not conn:
+        pool.close()
+    pool = ConnectionPool(path, conn)
+    return pool
+
+# Get the shared pool, opened on DB_PATH if init_db was not called
+def get_pool():
+    """Return the shared ConnectionPool used by the GUI and the database viewer"""
+
+    global pool
+
+    if pool is None:
+        pool = ConnectionPool(DB_PATH)
+    return pool
+
 # ============ DATABASE INITIALIZATION ============
 
+# Apply the performance profile to a connection
+def configure_connection(conn):
+    """Apply DB_PRAGMAS to the connection and return it"""
+
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# Migration of databases created before the GS_date column and the indexes
+def migrate_database(conn):
+    """Add the GS_date column, the indexes and the unique packet index to an existing packets table (safe to run more than once)"""
+
+    cursor = conn.cursor()
+
+    # A STORED generated column can not be added with ALTER TABLE, a VIRTUAL one is indexed the same way
+    cursor.execute("PRAGMA table_xinfo(packets)")
+    columns_info = cursor.fetchall()
+    if "GS_date" not in [row[1] for row in columns_info]:
+        cursor.execute("ALTER TABLE packets ADD COLUMN GS_date TEXT GENERATED ALWAYS AS (date(GS_time)) VIRTUAL")
+
+    for index in DB_INDEXES:
+        cursor.execute(index)
+
+    # Duplicated packets saved before the unique index: the first row of each packet stays, the other copies
+    # (heard by other stations, with their own measurements) are moved to DB_DUPLICATES_TABLE
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_packets_unique'")
+    if cursor.fetchone() is None:
+        cursor.execute("DROP TABLE IF EXISTS temp.duplicate_ids")
+        cursor.execute(f"CREATE TEMP TABLE duplicate_ids AS {SQL_SELECT_DUPLICATES}")
+        moved = cursor.execute("SELECT COUNT(*) FROM temp.duplicate_ids").fetchone()[0]
+        if moved:
+            # Stored columns only: GS_date is generated again from GS_time
+            columns = ", ".join(row[1] for row in columns_info if row[6] == 0)
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {DB_DUPLICATES_TABLE} AS SELECT {columns} FROM packets WHERE 0")
+            cursor.execute(f"INSERT INTO {DB_DUPLICATES_TABLE} ({columns}) SELECT {columns} FROM packets WHERE id IN (SELECT id FROM temp.duplicate_ids)")
+            cursor.execute("DELETE FROM packets WHERE id IN (SELECT id FROM temp.duplicate_ids)")
+
+            # The TER rows of a copy repeat the payload of the row kept
+            for table in EXPORT_TER_TABLES:
+                cursor.execute(f"DELETE FROM {table} WHERE id IN (SELECT id FROM temp.duplicate_ids)")
+            print(f"[INFO] Database migration: {moved} duplicated packets moved to {DB_DUPLICATES_TABLE}")
+        cursor.execute(DB_UNIQUE_INDEX)
+        cursor.execute("DROP TABLE temp.duplicate_ids")
+
+    # Last exported packet of each export format, for incremental exports
+    cursor.execute("CREATE TABLE IF NOT EXISTS export_state (format TEXT PRIMARY KEY, last_id INTEGER, exported_at TEXT)")
+
+    # Refresh the query planner statistics
+    cursor.execute("PRAGMA optimize")
+    conn.commit()
+
 # Database initialization and packet definition
 def database_initialization(path=DB_PATH):
     """Initialize the SQLite database and create the packets table if it doesn't exist."""
@@ -40,10 +236,10 @@ def database_initialization(path=DB_PATH):
     # A common table is defined for all the packets, specific tables are connected with the ID
     
     # If the database exists it will be opened, otherwise it will be created
-    conn = sqlite3.connect(path)
+    conn = configure_connection(sqlite3.connect(path, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE))
     cursor = conn.cursor()
     
-    # Packet table definition
+    # Packet table definition, GS_date is computed from GS_time for fast date filters
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS packets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,7 +254,8 @@ def database_initialization(path=DB_PATH):
             rssi REAL,
             snr REAL,
             deltaf REAL,
-            comment TEXT
+            comment TEXT,
+            GS_date TEXT GENERATED ALWAYS AS (date(GS_time)) STORED
         )
     ''')
     
@@ -95,6 +292,9 @@ def database_initialization(path=DB_PATH):
     # so it has to be re-created(attention to not lose data)
     
     conn.commit()
+
+    # Indexes (and GS_date column for databases created before it)
+    migrate_database(conn)
     return conn
 
 # Database check
@@ -115,6 +315,10 @@ def init_db(path=DB_PATH):
         # If the database exists, initialize it
         conn = database_initialization(path)
 
+    # Share the connection as writer of the pool
+    if isinstance(conn, sqlite3.Connection):
+        open_pool(conn)
+
     return conn
 
 # Window for database error visualization
@@ -336,15 +540,38 @@ def run_anyway_function(parent):
 
 # ============ DATABASE OPERATIONS ============
 
-# Saving function (save packet in database)
-def save_packet(conn, GS_time, HEX_str, rssi_str, snr_str, deltaf_str, comment = ""):
-    """conn, GS_time, HEX, rssi, snr, deltaf, comment [conn is the database definition --> use init_db()]"""
-
-    cursor = conn.cursor()
+# Prepared statements: constant SQL strings are compiled once and reused by the sqlite3 statement cache
+SQL_INSERT_PACKET = '''
+    INSERT INTO packets (
+        GS_time, HEX, source, ecc, tec_ter, pl_length, TX_time, mac, rssi, snr, deltaf, comment
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (source, TX_time, mac) WHERE mac <> '0' DO NOTHING
+'''
+SQL_INSERT_LORA_PONG = "INSERT INTO LORA_PONG (id, rssi, snr, deltaf) VALUES (?, ?, ?, ?)"
+SQL_INSERT_NACK = "INSERT INTO NACK (id, task_ID, error_code) VALUES (?, ?, ?)"
+SQL_INSERT_ACK = "INSERT INTO ACK (id, task_ID) VALUES (?, ?)"
+
+# Specific TER tables: TER code -> (insert statement, payload extraction function, extracted fields)
+TER_TABLES = {
+    gt.TER_LORA_PING: (SQL_INSERT_LORA_PONG, gt.extract_lora_pong, ("rssi", "snr", "deltaf")),
+    gt.TER_NACK: (SQL_INSERT_NACK, gt.extract_nack, ("task_ID", "error_code")),
+    gt.TER_ACK: (SQL_INSERT_ACK, gt.extract_ack, ("task_ID",)),
+}
+
+# Decode a packet and prepare the rows to insert
+def decode_packet_rows(GS_time, HEX_str, rssi_str, snr_str, deltaf_str, comment = ""):
+    """Return the packets row and the specific TER row (None if the TER has no table) without the packet ID:
+    GS_time, HEX, rssi, snr, deltaf, comment"""
+
+    # GS time as "YYYY-MM-DD HH:MM:SS" (or a datetime): the date filters and the viewer sorting rely on it
+    if not isinstance(GS_time, datetime):
+        try:
+            datetime.strptime(GS_time, "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            raise ValueError(f"Missing or invalid GS time: {GS_time!r}") from None
 
     # Convert HEX string to bytes
-    if isinstance(HEX_str, str):
-        HEX = bytes.fromhex(HEX_str)
+    HEX = bytes.fromhex(HEX_str) if isinstance(HEX_str, str) else bytes(HEX_str)
 
     # Convert str data in float
     rssi = float(rssi_str) if rssi_str else None
@@ -352,63 +579,118 @@ def save_packet(conn, GS_time, HEX_str, rssi_str, snr_str, deltaf_str, comment =
     deltaf = float(deltaf_str) if deltaf_str else None
 
     # Packet decoding
-    # Getting TER_TEC value from HEX
     HEX_decoded = gt.decode_packet(HEX)
 
-    # Getting the decoded values from HEX_decoded
-    ter_tec = HEX_decoded['ter']
-    source = HEX_decoded['station_id']
-    payload_bytes = HEX_decoded['payload_bytes']
-    pl_length = HEX_decoded['payload_length']
-    ecc = HEX_decoded['ecc_enabled']
-    mac = HEX_decoded['mac']
-    TX_time = datetime.utcfromtimestamp(HEX_decoded['timestamp']) # Convert UNIX to UTC datetime
+    # Getting the decoded values from HEX_decoded (the payload is a view into HEX)
+    ter_tec = HEX_decoded.ter
+    source = HEX_decoded.station_id
+    payload_bytes = HEX_decoded.payload_bytes
+    pl_length = HEX_decoded.payload_length
+    ecc = HEX_decoded.ecc_enabled
+    mac = HEX_decoded.mac
+    TX_time = datetime.utcfromtimestamp(HEX_decoded.timestamp) # Convert UNIX to UTC datetime
+
+    packet_row = (GS_time, HEX, source, ecc, ter_tec, pl_length, TX_time, mac, rssi, snr, deltaf, comment)
+
+    # Specific TER data extracted from the payload
+    ter_row = None
+    if ter_tec in TER_TABLES:
+        sql, extract, fields = TER_TABLES[ter_tec]
+        data = extract(payload_bytes)
+        ter_row = tuple(data[field] for field in fields)
+
+    return packet_row, ter_row
+
+# Saving function (save packet in database)
+def save_packet(conn, GS_time, HEX_str, rssi_str, snr_str, deltaf_str, comment = ""):
+    """conn, GS_time, HEX, rssi, snr, deltaf, comment [conn is the database definition --> use init_db()]
+    return the packet ID, None if the packet is already in the database"""
+
+    cursor = conn.cursor()
+    packet_row, ter_row = decode_packet_rows(GS_time, HEX_str, rssi_str, snr_str, deltaf_str, comment)
 
     # Creation of the packet from raw data
-    cursor.execute('''
-        INSERT INTO packets (
-            GS_time, HEX, source, ecc, tec_ter, pl_length, TX_time, mac, rssi, snr, deltaf, comment
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (GS_time, HEX, source, ecc, ter_tec, pl_length, TX_time, mac, rssi, snr, deltaf, comment))
+    cursor.execute(SQL_INSERT_PACKET, packet_row)
+
+    # Packet already in the database
+    if cursor.rowcount == 0:
+        return None
 
     # Getting the packet ID
     packet_id = cursor.lastrowid
 
-    # Saving the specific packet data
-    # SAVING TER DATA 
-    # Saving data from TER LORA PONG
-    if ter_tec == gt.TER_LORA_PONG:
-        data = gt.extract_lora_pong(payload_bytes)
-
-        # Insert data in the LORA_PONG table
-        cursor.execute('''
-            INSERT INTO LORA_PONG (id, rssi, snr, deltaf)
-            VALUES (?, ?, ?, ?)
-        ''', (packet_id, data['rssi'], data['snr'], data['deltaf']))
-
-    # Saving data from NACK
-    elif ter_tec == gt.TER_NACK:
-        data = gt.extract_nack(payload_bytes)
-
-        # Insert data in the ACK table
-        cursor.execute('''
-            INSERT INTO NACK (id, task_ID, error_code)
-            VALUES (?, ?, ?)
-        ''', (packet_id, data['task_ID'], data['error_code']))
-    
-    # Saving data from ACK
-    elif ter_tec == gt.TER_ACK:
-        data = gt.extract_ack(payload_bytes)
-
-        # Insert data in the ACK table
-        cursor.execute('''
-            INSERT INTO ACK (id, task_ID)
-            VALUES (?, ?)
-        ''', (packet_id, data['task_ID']))
+    # Saving the specific TER data (LORA_PONG, NACK, ACK)
+    if ter_row is not None:
+        sql = TER_TABLES[packet_row[4]][0]
+        cursor.execute(sql, (packet_id,) + ter_row)
 
     # Commit packet to database
     conn.commit()
 
+    return packet_id
+
+# Error of save_packets_bulk for a packet already in the database
+DUPLICATE_PACKET_ERROR = "Duplicate packet, already in the database"
+
+# Saving function for many packets in a single transaction
+def save_packets_bulk(conn, packets):
+    """conn, packets: iterable of (GS_time, HEX, rssi, snr, deltaf[, comment]) as for save_packet
+    return (ids, errors): ids aligned with packets (None if the packet was rejected or already saved), errors list of (index, message)"""
+
+    # Decode everything first, a bad packet is reported and skipped without aborting the batch
+    ids = []
+    errors = []
+    decoded = [] # (index, packet_row, ter_row)
+    for index, packet in enumerate(packets):
+        ids.append(None)
+        try:
+            packet_row, ter_row = decode_packet_rows(*packet)
+        except Exception as e:
+            errors.append((index, f"{type(e).__name__}: {e}"))
+            continue
+        decoded.append((index, packet_row, ter_row))
+
+    if not decoded:
+        return ids, errors
+
+    cursor = conn.cursor()
+    try:
+        # Take the write lock for the whole batch: no other rows are inserted meanwhile
+        if not conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM packets").fetchone()[0]
+        cursor.executemany(SQL_INSERT_PACKET, [packet_row for _, packet_row, _ in decoded])
+
+        # Duplicates are skipped by the unique index: the new rows follow the batch order, match them by source, TX time and MAC
+        inserted = cursor.execute("SELECT id, source, TX_time, mac FROM packets WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+        position = 0
+
+        # Group the specific TER rows by table
+        ter_rows = {}
+        for index, packet_row, ter_row in decoded:
+            if position < len(inserted) and inserted[position][1:] == (packet_row[2], str(packet_row[6]), str(packet_row[7])):
+                packet_id = inserted[position][0]
+                position += 1
+            else:
+                errors.append((index, DUPLICATE_PACKET_ERROR))
+                continue
+
+            ids[index] = packet_id
+            if ter_row is not None:
+                ter_rows.setdefault(TER_TABLES[packet_row[4]][0], []).append((packet_id,) + ter_row)
+        errors.sort()
+
+        for sql, rows in ter_rows.items():
+            cursor.executemany(sql, rows)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return ids, errors
+
 # Show all packets in terminal(usefull for debug operations)
 def show_all_packets(conn):
     cursor = conn.cursor()
@@ -423,23 +705,336 @@ def show_all_packets(conn):
     for row in rows:
         print(f"{row[0]:<3} | {row[1]:<20} | {str(row[2])[:10]:<10} | {str(row[3])[:8]:<8} | {str(row[4])[:8]:<8} | {str(row[5])[:8]:<8} | {row[6]:<6} | {row[7]:<10} | {str(row[8]):<13} | {row[9]:<6} | {row[10]:<6} | {row[11]:<7} | {row[12]}")
 
+# ============ EXPORT ============
+
+# Export a table as a sequence of chunks: open, write(rows) for each chunk, close; finish after the last table
+# open gets the column names and their declared SQLite types
+class CsvExporter:
+    """One CSV file per table, next to the requested path (<name>_<table>.csv)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.files = []
+        self.file = None
+        self.writer = None
+
+    def open(self, table, columns, types):
+        table_path = self.path.with_name(f"{self.path.stem}_{table}{self.path.suffix}")
+        self.file = open(table_path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.files.append(table_path)
+
+    def write(self, rows):
+        # BLOB values (packet HEX) are written as hex strings
+        self.writer.writerows([value.hex() if isinstance(value, bytes) else value for value in row] for row in rows)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def finish(self):
+        pass
+
+class ExcelExporter:
+    """Single workbook with a sheet per table, written in openpyxl write-only mode (rows are not kept in memory)"""
+
+    def __init__(self, path):
+        from openpyxl import Workbook # optional dependency, only needed for Excel exports
+        self.path = Path(path)
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+
+    def open(self, table, columns, types):
+        self.sheet = self.workbook.create_sheet(table)
+        self.sheet.append(columns)
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.append([value.hex() if isinstance(value, bytes) else value for value in row])
+
+    def close(self):
+        # The workbook is saved once, after the last table
+        pass
+
+    def finish(self):
+        self.workbook.save(self.path)
+
+class ParquetExporter:
+    """One compressed Parquet file per table (<name>_<table>.parquet), written a row group per chunk"""
+
+    def __init__(self, path):
+        import pyarrow # optional dependency, only needed for Parquet exports
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = Path(path)
+        self.table_path = None
+        self.columns = None
+        self.types = None
+        self.writer = None
+
+    def open(self, table, columns, types):
+        self.table_path = self.path.with_name(f"{self.path.stem}_{table}{self.path.suffix}")
+        self.columns = columns
+        self.types = [self.arrow_type(declared) for declared in types]
+        self.writer = None
+
+    # Arrow type of a declared SQLite column type, following the SQLite affinity rules
+    # None for BLOB and untyped columns: their type is taken from the data
+    def arrow_type(self, declared):
+        declared = (declared or "").upper()
+        if "INT" in declared:
+            return self.pa.int64()
+        if "CHAR" in declared or "CLOB" in declared or "TEXT" in declared:
+            return self.pa.string()
+        if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+            return self.pa.float64()
+        return None
+
+    def write(self, rows):
+        data = {name: [row[i] for row in rows] for i, name in enumerate(self.columns)}
+        if self.writer is None:
+            # Schema from the declared column types, so a column that is NULL in the first chunk keeps its type
+            # BLOB columns take the type of the first chunk, stored as strings while still empty
+            chunk = self.pa.table(data)
+            fields = []
+            for field, declared in zip(chunk.schema, self.types):
+                if declared is not None:
+                    field = field.with_type(declared)
+                elif self.pa.types.is_null(field.type):
+                    field = field.with_type(self.pa.string())
+                fields.append(field)
+            self.writer = self.pq.ParquetWriter(self.table_path, self.pa.schema(fields), compression=EXPORT_PARQUET_COMPRESSION)
+        self.writer.write_table(self.pa.table(data, schema=self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def finish(self):
+        pass
+
+# Supported export formats, chosen from the file extension
+EXPORTERS = {
+    ".csv": CsvExporter,
+    ".xlsx": ExcelExporter,
+    ".parquet": ParquetExporter,
+}
+
+# Build the WHERE clause on the packets table used by the exports
+def packet_filter(from_date=None, to_date=None, sources=None, types=None, since_id=None):
+    """Return (where, params): dates are "yyyy-MM-dd" strings (inclusive), sources and types are lists of IDs,
+    since_id keeps only the packets saved after that packet ID"""
+
+    where = "1=1"
+    params = []
+    if from_date:
+        where += " AND packets.GS_date >= ?"
+        params.append(from_date)
+    if to_date:
+        where += " AND packets.GS_date <= ?"
+        params.append(to_date)
+    if sources:
+        where += f" AND packets.source IN ({', '.join('?' * len(sources))})"
+        params.extend(sources)
+    if types:
+        where += f" AND packets.tec_ter IN ({', '.join('?' * len(types))})"
+        params.extend(types)
+    if since_id is not None:
+        where += " AND packets.id > ?"
+        params.append(since_id)
+    return where, params
+
+# ID of the last packet exported in a format, None if that format was never exported
+def get_last_export(conn, export_format):
+    row = conn.execute("SELECT last_id FROM export_state WHERE format = ?", (export_format,)).fetchone()
+    return row[0] if row else None
+
+# Remember the last exported packet for incremental exports
+def set_last_export(conn, export_format, last_id):
+    conn.execute("INSERT OR REPLACE INTO export_state (format, last_id, exported_at) VALUES (?, ?, ?)",
+                 (export_format, last_id, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+
+# Function to export packets to CSV, Excel or Parquet
+def export_packets(conn, path, from_date=None, to_date=None, sources=None, types=None, since_id=None,
+                   chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Stream the packets matching the filters and their TER rows to path, chunk_size rows at a time.
+    The format is taken from the extension of path (see EXPORTERS). progress(done, total) is called after each chunk.
+    Return (exported rows, ID of the last exported packet, since_id when there is nothing new)."""
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in EXPORTERS:
+        raise ValueError(f"Unsupported export format '{suffix}', use one of {', '.join(EXPORTERS)}")
+
+    where, params = packet_filter(from_date, to_date, sources, types, since_id)
+
+    # Packets saved while exporting are left to the next export, so every table sees the same packets
+    last_id = conn.execute(f"SELECT MAX(packets.id) FROM packets WHERE {where}", params).fetchone()[0]
+    if last_id is None:
+        last_id = since_id
+    else:
+        where += " AND packets.id <= ?"
+        params.append(last_id)
+
+    # Packets first, then the TER tables joined on the exported packets
+    queries = [("packets", f"SELECT * FROM packets WHERE {where} ORDER BY packets.id")]
+    for table in EXPORT_TER_TABLES:
+        queries.append((table, f"SELECT {table}.* FROM {table} JOIN packets ON packets.id = {table}.id WHERE {where} ORDER BY {table}.id"))
+
+    # Total for the progress report, answered by the indexes
+    total = 0
+    for _, query in queries:
+        total += conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+    exporter = EXPORTERS[suffix](path)
+    done = 0
+    for table, query in queries:
+        # Declared column types, generated columns included
+        declared = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+        cursor = conn.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        exporter.open(table, columns, [declared.get(column, "") for column in columns])
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                exporter.write(rows)
+                done += len(rows)
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            exporter.close()
+    exporter.finish()
+
+    return done, last_id
+
 # Function to export packets to Excel
 def export_tables_to_excel(conn, excel_path="packets_export.xlsx"):
     """Export all tables to a single Excel file with multiple sheets."""
+    return export_packets(conn, excel_path)
 
-    # Packet and table definition
-    tables = ["packets", "LORA_PONG", "NACK", "ACK"]
+# ============ DATABASE GUI ============
 
-    # Export the tables in different sheets of the same Excel file
-    with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
-        for table in tables:
-            try:
-                df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-                df.to_excel(writer, sheet_name=table, index=False)
-            except Exception as e:
-                print(f"[ERROR] Impossible to export {table}: {e}")
+# Table model of the packets table, rows are fetched page by page while scrolling
+class PacketTableModel(QAbstractTableModel):
+    """Packets list for the viewer: filtering and sorting run in SQLite, pages are read with keyset pagination
+    so the cost of opening and scrolling does not depend on the size of the table"""
+
+    # Full packet row, as used by the viewer detail panels
+    COLUMNS_SQL = "id, GS_time, HEX, source, ecc, tec_ter, pl_length, TX_time, mac, rssi, snr, deltaf, comment"
+
+    # Displayed columns: (header, index in the packet row, SQL sort keys, labels of the codes or None)
+    # Sort keys follow the indexes created by database_initialization, so a page is an index range scan,
+    # and are never NULL so the keyset comparison does not skip rows (id is always the last key):
+    # GS_date is NULL for rows saved with an invalid GS_time before it was checked
+    VIEW_COLUMNS = (
+        ("ID", 0, (), None),
+        ("Type", 5, ("tec_ter", "GS_time"), gt.get_ter_tec_labels),
+        ("Gs ID", 3, ("source", "GS_time"), gt.get_gs_labels),
+        ("Date", 1, ("COALESCE(GS_date, '')", "GS_time"), None),
+        ("Comment", 12, ("COALESCE(comment, '')",), None),
+    )
+
+    def __init__(self, parent=None, page_size=VIEWER_PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.rows = []
+        self.display = [] # displayed text of the rows, built once per page
+        self.where_sql = "1=1"
+        self.where_params = []
+        self.sort_column = 3
+        self.sort_order = Qt.DescendingOrder
+        self.exhausted = False
+        self.last_key = None
+
+    # Set the WHERE clause (with ? placeholders) and reload from the first page
+    def set_filter(self, where_sql, params):
+        self.where_sql = where_sql
+        self.where_params = list(params)
+        self.reload()
+
+    # Drop the loaded rows and fetch the first page
+    def reload(self):
+        self.beginResetModel()
+        self.rows = []
+        self.display = []
+        self.exhausted = False
+        self.last_key = None
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    # Full packet row at a given view row
+    def packet(self, row):
+        return self.rows[row]
+
+    # Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.VIEW_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.display[index.row()][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.VIEW_COLUMNS[section][0]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
 
-# ============ DATABASE GUI ============
+        sort_keys = self.VIEW_COLUMNS[self.sort_column][2] + ("id",)
+        direction, compare = ("DESC", "<") if self.sort_order == Qt.DescendingOrder else ("ASC", ">")
+
+        # Keyset pagination: continue after the sort keys of the last loaded row instead of using OFFSET
+        query = f"SELECT {self.COLUMNS_SQL}, {', '.join(sort_keys)} FROM packets WHERE ({self.where_sql})"
+        params = list(self.where_params)
+        if self.last_key is not None:
+            query += f" AND ({', '.join(sort_keys)}) {compare} ({', '.join('?' * len(sort_keys))})"
+            params.extend(self.last_key)
+        query += " ORDER BY " + ", ".join(f"{key} {direction}" for key in sort_keys) + " LIMIT ?"
+        params.append(self.page_size)
+
+        with get_pool().reader() as conn:
+            page = conn.execute(query, params).fetchall()
+
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+
+        n_columns = len(page[0]) - len(sort_keys)
+        self.last_key = page[-1][n_columns:]
+        rows = [row[:n_columns] for row in page]
+
+        # Displayed text: codes are mapped to labels for the whole page at once
+        columns = []
+        for _, position, _, labels in self.VIEW_COLUMNS:
+            values = [row[position] for row in rows]
+            columns.append(labels(values) if labels is not None else ["" if value is None else str(value) for value in values])
+
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(rows)
+        self.display.extend(zip(*columns))
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.reload()
 
 # Create the GUI for database visualization
 def open_database():
@@ -489,7 +1084,7 @@ def open_database():
             QPushButton:hover { background-color: #e67e22; }
             QLineEdit, QComboBox, QDateEdit { background-color: #fff; color: #333; border: 1px solid #bbb; }
             QLabel { color: #333; }
-            QTableWidget { background-color: #fff; color: #333; }
+            QTableWidget, QTableView { background-color: #fff; color: #333; }
             """)
 
             # Top: filters/search bar
@@ -544,15 +1139,19 @@ def open_database():
             # Main grid: 2x2 below the search bar
             grid = QGridLayout()
 
-            # Top-left: full filtered packet list (ID, type, date, comment)
-            self.left_top_table = QTableWidget()
-            self.left_top_table.setColumnCount(5)
-            self.left_top_table.setHorizontalHeaderLabels(["ID", "Type", "Gs ID", "Date", "Comment"])
+            # Top-left: full filtered packet list (ID, type, date, comment), loaded lazily while scrolling
+            self.packet_model = PacketTableModel(self)
+            self.left_top_table = QTableView()
+            self.left_top_table.setModel(self.packet_model)
             self.left_top_table.verticalHeader().setVisible(False)
             self.left_top_table.setSelectionBehavior(QAbstractItemView.SelectRows)
             self.left_top_table.setSelectionMode(QAbstractItemView.SingleSelection)
             self.left_top_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-            self.left_top_table.cellClicked.connect(self.on_left_table_select)
+            self.left_top_table.clicked.connect(lambda index: self.on_left_table_select(index.row(), index.column()))
+
+            # Sorting is done by the model in SQLite, newest packets first by default
+            self.left_top_table.horizontalHeader().setSortIndicator(3, Qt.DescendingOrder)
+            self.left_top_table.setSortingEnabled(True)
 
             # Bottom-left: last saved packet
             self.left_bottom_group = QGroupBox("Last saved packet")
@@ -579,8 +1178,8 @@ def open_database():
             
             # Function to export to excel with GUI notification
             def export_to_excel_db_gui():
-                conn = sqlite3.connect(DB_PATH)
-                export_tables_to_excel(conn)
+                with get_pool().reader() as conn:
+                    export_tables_to_excel(conn)
                 QMessageBox.information(self, "Export to Excel", "Data exported successfully.")
 
             # Connect the export button to the export function
@@ -615,8 +1214,6 @@ def open_database():
             main_v.addLayout(grid)
             self.setLayout(main_v)
 
-            # Internal buffers
-            self.packets = []
             # Improve spacing and indentation for the top-left section
             grid.setHorizontalSpacing(12)
             grid.setVerticalSpacing(12)
@@ -626,10 +1223,10 @@ def open_database():
             # Columns: 0 ID, 1 Type, 2 Gs ID, 3 Date, 4 Comment
             header = self.left_top_table.horizontalHeader()
             try:
-                # Set reasonable default widths
-                header.setSectionResizeMode(0, header.ResizeToContents)
-                header.setSectionResizeMode(1, header.ResizeToContents)
-                header.setSectionResizeMode(2, header.ResizeToContents)
+                # Set reasonable default widths (ResizeToContents would scan every loaded row at each page)
+                for col, width in ((0, 70), (1, 70), (2, 70)):
+                    header.setSectionResizeMode(col, header.Interactive)
+                    self.left_top_table.setColumnWidth(col, width)
                 # Make Date column fixed wider so timestamps are shown
                 header.setSectionResizeMode(3, header.Fixed)
                 self.left_top_table.setColumnWidth(3, 260)
@@ -646,28 +1243,25 @@ def open_database():
         # Function to load packets from DB applying search/date filters
         def load_data(self):
             """Load packets from DB applying search/date filters and populate left_top_table and last packet."""
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-            query = "SELECT id, GS_time, HEX, source, ecc, tec_ter, pl_length, TX_time, mac, rssi, snr, deltaf, comment FROM packets WHERE 1=1"
+            where = "1=1"
             params = []
 
             # Date range filter
             from_date = self.date_from.date().toString("yyyy-MM-dd")
             to_date = self.date_to.date().toString("yyyy-MM-dd")
-            query += " AND date(GS_time) >= ? AND date(GS_time) <= ?"
+            where += " AND GS_date >= ? AND GS_date <= ?"
             params.extend([from_date, to_date])
 
             # Search input: comment
             s = self.search_input.text().strip()
             if s:
-                query += " AND comment LIKE ?"
+                where += " AND comment LIKE ?"
                 params.append(f"%{s}%")
 
             # Searching for GS id
             gs_id = self.gs_id_input.currentText()
             if gs_id and gs_id != "All GS IDs":
-                query += " AND source = ?"
+                where += " AND source = ?"
                 params.append(gt.get_gs_id(gs_id))
 
             # Filter by TEC or TER types
@@ -675,49 +1269,30 @@ def open_database():
             if s_type and s_type == "All Types":
                 pass
             if s_type and s_type != "All Types":
-                query += " AND tec_ter = ?"
+                where += " AND tec_ter = ?"
                 params.append(gt.get_ter_tec_id(s_type))
 
-            query += " ORDER BY GS_time DESC"
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            self.packets = rows
-
-            # Populate left_top_table
-            self.left_top_table.setRowCount(len(rows))
-            for i, pkt in enumerate(rows):
-                pkt_id = str(pkt[0])
-                tec_ter = str(pkt[5])
-                gs_time = str(pkt[1])
-                gs_id = str(pkt[3])
-                comment = str(pkt[12]) if pkt[12] is not None else ""
-                self.left_top_table.setItem(i, 0, QTableWidgetItem(pkt_id))
-                self.left_top_table.setItem(i, 1, QTableWidgetItem(tec_ter))
-                self.left_top_table.setItem(i, 2, QTableWidgetItem(gs_id))
-                self.left_top_table.setItem(i, 3, QTableWidgetItem(gs_time))
-                self.left_top_table.setItem(i, 4, QTableWidgetItem(comment))
-
-            # Load last saved packet into left_bottom
-            if rows:
-                last = rows[0]
+            # Populate left_top_table: the model fetches the first page, the rest while scrolling
+            self.packet_model.set_filter(where, params)
+
+            # Load last saved packet into left_bottom (independent of the table sorting)
+            with get_pool().reader() as conn:
+                last = conn.execute(f"SELECT {PacketTableModel.COLUMNS_SQL} FROM packets WHERE {where} ORDER BY GS_time DESC LIMIT 1", params).fetchone()
+            if last:
                 self.show_last_packet(last)
             else:
                 self.last_packet_text.setPlainText("No packets found")
 
-            conn.close()
-
         # Function to show TEC and TER types in the research bar
         def populate_type_combo(self):
             try:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT tec_ter FROM packets ORDER BY tec_ter")
-                rows = cursor.fetchall()
-                for r in rows:
-                    val = str(r[0])
-                    if val not in [self.type_combo.itemText(i) for i in range(self.type_combo.count())]:
-                        self.type_combo.addItem(gt.get_ter_tec_label(r[0]))
-                conn.close()
+                with get_pool().reader() as conn:
+                    rows = conn.execute("SELECT DISTINCT tec_ter FROM packets ORDER BY tec_ter").fetchall()
+                present = {self.type_combo.itemText(i) for i in range(self.type_combo.count())}
+                for label in gt.get_ter_tec_labels([r[0] for r in rows]):
+                    if label not in present:
+                        self.type_combo.addItem(label)
+                        present.add(label)
             except Exception:
                 # ignore if DB not accessible at populate time
                 pass
@@ -725,15 +1300,13 @@ def open_database():
         # Function to show GS IDs in the research bar
         def populate_gs_id_combo(self):
             try:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT source FROM packets ORDER BY source")
-                rows = cursor.fetchall()
-                for r in rows:
-                    val = str(r[0])
-                    if val not in [self.gs_id_input.itemText(i) for i in range(self.gs_id_input.count())]:
-                        self.gs_id_input.addItem(gt.get_gs_label(r[0]))
-                conn.close()
+                with get_pool().reader() as conn:
+                    rows = conn.execute("SELECT DISTINCT source FROM packets ORDER BY source").fetchall()
+                present = {self.gs_id_input.itemText(i) for i in range(self.gs_id_input.count())}
+                for label in gt.get_gs_labels([r[0] for r in rows]):
+                    if label not in present:
+                        self.gs_id_input.addItem(label)
+                        present.add(label)
             except Exception:
                 # ignore if DB not accessible at populate time
                 pass
@@ -783,9 +1356,9 @@ def open_database():
         def on_left_table_select(self, row, col):
 
             # Called when a packet row is selected in left_top_table
-            if row < 0 or row >= len(self.packets):
+            if row < 0 or row >= self.packet_model.rowCount():
                 return
-            pkt = self.packets[row]
+            pkt = self.packet_model.packet(row)
             self.show_packet_details(pkt)
 
         # Function to show detailed packet information in the right top section
@@ -862,14 +1435,13 @@ def open_database():
             self.related_table.setItem(0, 1, QTableWidgetItem(label))
             self.related_table.setItem(0, 2, QTableWidgetItem(""))
 
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
             # CHECK TER
+            with get_pool().reader() as conn:
+                row = conn.execute("SELECT rssi, snr, deltaf FROM LORA_PONG WHERE id = ?", (pkt_id,)).fetchone()
+                row_ack = conn.execute("SELECT task_ID FROM ACK WHERE id = ?", (pkt_id,)).fetchone()
+                row_nack = conn.execute("SELECT task_ID, error_code FROM NACK WHERE id = ?", (pkt_id,)).fetchone()
 
             # Check LORA_PONG
-            cursor.execute("SELECT rssi, snr, deltaf FROM LORA_PONG WHERE id = ?", (pkt_id,))
-            row = cursor.fetchone()
             if row:
                 r = self.related_table.rowCount()
                 self.related_table.insertRow(r)
@@ -888,8 +1460,6 @@ def open_database():
                 self.related_table.setItem(r, 2, QTableWidgetItem(""))
 
             # Check ACK
-            cursor.execute("SELECT task_ID FROM ACK WHERE id = ?", (pkt_id,))
-            row_ack = cursor.fetchone()
             if row_ack:
                 r = self.related_table.rowCount()
                 self.related_table.insertRow(r)
@@ -898,8 +1468,6 @@ def open_database():
                 self.related_table.setItem(r, 2, QTableWidgetItem(""))
 
             # Check NACK
-            cursor.execute("SELECT task_ID, error_code FROM NACK WHERE id = ?", (pkt_id,))
-            row_nack = cursor.fetchone()
             if row_nack:
                 r = self.related_table.rowCount()
                 self.related_table.insertRow(r)
@@ -912,8 +1480,6 @@ def open_database():
                 self.related_table.setItem(r, 1, QTableWidgetItem(str(row_nack[1])))
                 self.related_table.setItem(r, 2, QTableWidgetItem(""))
 
-            conn.close()
-
         # Function to delete selected packets from the database
         def delete_selected_packet(self):
             # Temporarily enable multi-selection for deletion
@@ -966,7 +1532,7 @@ def open_database():
             if not selected_rows:
                 # Just do nothing if none selected
                 return
-            pkt_ids = [self.packets[row.row()][0] for row in selected_rows]
+            pkt_ids = [self.packet_model.packet(row.row())[0] for row in selected_rows]
             pkt_ids_str = ', '.join(str(pid) for pid in pkt_ids)
             reply = QMessageBox.question(
                 self,
@@ -975,16 +1541,15 @@ def open_database():
                 QMessageBox.Yes | QMessageBox.No
             )
             if reply == QMessageBox.Yes:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                # Delete from all related tables for each packet id
-                for pid in pkt_ids:
-                    cursor.execute("DELETE FROM LORA_PONG WHERE id = ?", (pid,))
-                    cursor.execute("DELETE FROM ACK WHERE id = ?", (pid,))
-                    cursor.execute("DELETE FROM NACK WHERE id = ?", (pid,))
-                cursor.executemany("DELETE FROM packets WHERE id = ?", [(pid,) for pid in pkt_ids])
-                conn.commit()
-                conn.close()
+                ids = [(pid,) for pid in pkt_ids]
+                with get_pool().writer() as conn:
+                    # Delete from all related tables for each packet id
+                    cursor = conn.cursor()
+                    cursor.executemany("DELETE FROM LORA_PONG WHERE id = ?", ids)
+                    cursor.executemany("DELETE FROM ACK WHERE id = ?", ids)
+                    cursor.executemany("DELETE FROM NACK WHERE id = ?", ids)
+                    cursor.executemany("DELETE FROM packets WHERE id = ?", ids)
+                    conn.commit()
                 self.load_data()
 
             # Restore EXPORT TO EXCEL after the selection
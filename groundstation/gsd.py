@@ -0,0 +1,569 @@
+"""
+Headless ground station daemon
+
+Owns the serial port, the TEC queue, the packet decoder and the database writer, without any
+Qt display. Clients talk to it with newline-delimited JSON over TCP or a Unix socket:
+
+	{"cmd": "tec", "tec": "LoRa ping", "payload": "", "gs": "UniPD", "ecc": false}
+	{"cmd": "tec", "tec": "Exit state", "fields": {"from_state": 1, "to_state": 2}}
+	{"cmd": "packet", "hex": "11 55 1A 00 ...", "label": "LoRa ping", "seal": false}
+	{"cmd": "radio", "f": 436.0, "bw": 125.0, "sf": 10, "cr": 5, "power": 1}
+	{"cmd": "download", "tec": "Picture download", "file": 12, "path": "img_12.jpg", "transfer": 1}
+	{"cmd": "status"}
+	{"cmd": "subscribe"}
+
+Every request gets one JSON reply ({"ok": true, ...} or {"ok": false, "error": ...}).
+A "tec" payload is given as HEX or as the fields declared in payload_codec.
+TECs queued with "tec" get their timestamp and MAC when they are transmitted, "packet" is sent as is unless "seal" is true.
+After "subscribe" the connection also receives the RX stream and the TEC status as
+{"event": ...} lines, packets with a known payload layout carry the decoded "fields".
+A "download" runs until the file is complete: the gaps are requested again after each burst and the
+partial file is kept next to path, so the same request resumes it at the next pass.
+The GUI connects to the daemon through GsdClient when "gsd://host:port" is selected as its serial port.
+
+Usage: python -m groundstation.gsd --port COM5 [--baud 921600] [--tcp-port 5742] [--unix /tmp/gsd.sock]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+from collections import deque
+from datetime import datetime
+
+import serial
+
+try:
+	# Attempting execution as a module
+	from . import GS_task as gt
+	from . import payload_codec as pc
+	from . import bulk_download as bd
+	from .database import Jdata as jdb
+except ImportError:
+	# Fallback for direct execution as a script
+	import GS_task as gt
+	import payload_codec as pc
+	import bulk_download as bd
+	from database import Jdata as jdb
+
+# ========== CONSTANTS AND CONFIGURATION ==========
+
+GSD_HOST = "127.0.0.1" # TCP API only on the local machine by default
+GSD_PORT = 5742
+GSD_SUBSCRIBER_QUEUE = 1024 # [events] buffered per subscriber, a slow client loses events instead of stalling RX
+GSD_DB_FLUSH_INTERVAL = 1.0 # [s] received packets are saved in one transaction at this interval
+GSD_RSSI_WAIT = 0.5 # [s] time left to the RSSI report of a packet before saving it
+GSD_DB_COMMENT = "gsd"
+GSD_DOWNLOAD_POLL = 1.0 # [s] interval of the check for download bursts that stopped
+
+# Rejected packets: RX event kind -> (published event, stats counter)
+RX_REJECTS = {
+	gt.RX_EVENT_MAC_ERROR: ("mac_error", "mac_rejects"),
+	gt.RX_EVENT_DUPLICATE: ("duplicate", "duplicates"),
+	gt.RX_EVENT_REPLAY: ("replay", "replays"),
+}
+
+# Published rejected packet event -> RX event kind
+MESSAGE_REJECTS = {name: kind for kind, (name, _) in RX_REJECTS.items()}
+
+# ========== DAEMON ==========
+
+class GroundStationDaemon:
+	"""Serial link, TEC queue, reply matching and database writer of the ground station, driven by asyncio"""
+
+	def __init__(self, port, baud=gt.SERIAL_BAUD_RATES[-1], db_path=jdb.DB_PATH, host=GSD_HOST, tcp_port=GSD_PORT, unix_path=None, replay_window=gt.RX_REPLAY_WINDOW):
+		self.port = port
+		self.baud = baud
+		self.db_path = db_path
+		self.host = host
+		self.tcp_port = tcp_port
+		self.unix_path = unix_path
+
+		self.serial_conn = None
+		self.serial_binary = False
+		self.parser = gt.SerialStreamParser(rx_filter=gt.RxFilter(replay_window=replay_window))
+		self.link_setup = gt.SerialLinkSetup(baud)
+		self.link = gt.LinkTiming()
+		self.pipeline = gt.TecPipeline(link=self.link, sealer=gt.TecSealer())
+		self.pipeline_wake = None # set when the pipeline has something new to do
+		self.subscribers = set()
+		self.db_rows = deque() # [rx_time, row] waiting to be saved, row is completed by the RSSI report
+		self.last_row = None
+		self.downloads = {} # transfer ID -> [BulkDownload, GS label, ECC flag, PipelineTec of the last request]
+		self.stats = {"rx_packets": 0, "rx_errors": 0, "mac_rejects": 0, "duplicates": 0, "replays": 0, "tx_tecs": 0, "saved_packets": 0, "dropped_events": 0}
+
+	# Main entry point: open everything and serve until cancelled
+	async def run(self):
+		loop = asyncio.get_running_loop()
+		self.pipeline_wake = asyncio.Event()
+
+		# Database: same pool as the GUI, writes happen in a worker thread
+		if self.db_path:
+			conn = await loop.run_in_executor(None, jdb.database_initialization, self.db_path)
+			jdb.open_pool(conn)
+
+		self.serial_conn = await loop.run_in_executor(None, lambda: serial.Serial(self.port, gt.SERIAL_BAUD_DEFAULT, timeout=gt.SERIAL_READ_TIMEOUT))
+		print(f"[INFO] Connected to {self.port}")
+
+		servers = [await asyncio.start_server(self.handle_client, self.host, self.tcp_port)]
+		print(f"[INFO] API on {self.host}:{self.tcp_port}")
+		if self.unix_path and hasattr(asyncio, "start_unix_server"):
+			if os.path.exists(self.unix_path):
+				os.remove(self.unix_path)
+			servers.append(await asyncio.start_unix_server(self.handle_client, self.unix_path))
+			print(f"[INFO] API on {self.unix_path}")
+
+		tasks = [
+			asyncio.create_task(self.read_serial()),
+			asyncio.create_task(self.send_tecs()),
+			asyncio.create_task(self.watch_downloads()),
+		]
+		if self.db_path:
+			tasks.append(asyncio.create_task(self.write_db()))
+
+		try:
+			await asyncio.gather(*tasks)
+		finally:
+			for task in tasks:
+				task.cancel()
+			for server in servers:
+				server.close()
+			for download, _, _, _ in self.downloads.values():
+				download.pause()
+			self.serial_conn.close()
+			if self.db_path:
+				self.flush_db(force=True)
+
+	# ========== SERIAL ==========
+
+	async def write_serial(self, data):
+		await asyncio.get_running_loop().run_in_executor(None, self.serial_conn.write, data)
+
+	# Blocking read and parse of everything available, run in a worker thread
+	# The link is negotiated here once the GS answers (baud rate, then serial mode), the rate is switched between two reads
+	def read_events(self):
+		data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+		events = self.parser.feed(data, datetime.utcnow()) if data else []
+		return self.link_setup.update(self.serial_conn, events)
+
+	# Serial reader task
+	async def read_serial(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			for event in await loop.run_in_executor(None, self.read_events):
+				await self.handle_event(event)
+
+	# Handle an RX event: reply matching, database and subscribers
+	async def handle_event(self, event):
+		message = {"event": "line", "time": event.rx_time.isoformat(), "line": event.line}
+
+		if event.kind == gt.RX_EVENT_PACKET:
+			packet = event.data
+			self.stats["rx_packets"] += 1
+			message.update(event="packet", hex=event.packet_bytes.hex().upper(), station=packet.station_id, ter=packet.ter,
+						   label=gt.get_ter_tec_label(packet.ter), timestamp=packet.timestamp, payload=list(packet.payload_bytes))
+			try:
+				fields = pc.decode_payload(packet.ter, packet.payload_bytes)
+			except ValueError:
+				fields = None
+			if fields is not None:
+				message["fields"] = fields
+
+			# Reply to a TEC in flight
+			tec = self.pipeline.on_reply(packet.ter, packet.payload_bytes, asyncio.get_running_loop().time())
+			if tec is not None:
+				self.publish_tec_status(tec)
+				self.pipeline_wake.set()
+
+			if packet.ter == gt.TER_DOWNLOAD:
+				self.on_download_chunk(packet)
+
+			# Saved later, when the RSSI report has had time to arrive
+			self.last_row = [event.rx_time.strftime('%Y-%m-%d %H:%M:%S'), event.packet_bytes.hex(), None, None, None, GSD_DB_COMMENT]
+			self.db_rows.append((event.rx_time, self.last_row))
+
+		elif event.kind in RX_REJECTS:
+			# Forged, corrupted, duplicated or replayed packet: not saved and not matched with the TECs in flight
+			name, counter = RX_REJECTS[event.kind]
+			self.stats[counter] += 1
+			self.last_row = None # its RSSI report must not go to the previous packet
+			message.update(event=name, hex=event.packet_bytes.hex().upper(), ter=event.data.ter)
+
+		elif event.kind == gt.RX_EVENT_RSSI:
+			rssi, snr, freq_shift = event.data
+			message.update(event="rssi", rssi=rssi, snr=snr, deltaf=freq_shift)
+			if self.last_row is not None:
+				self.last_row[2:5] = [rssi, snr, freq_shift]
+				self.last_row = None
+
+		elif event.kind == gt.RX_EVENT_RADIO_ERROR:
+			message.update(event="radio_error")
+
+		elif event.kind == gt.RX_EVENT_ERROR:
+			self.stats["rx_errors"] += 1
+			message.update(event="error", error=event.data)
+
+		elif event.kind == gt.RX_EVENT_RADIO_SETTINGS:
+			self.link.set_config(event.data)
+			message.update(event="radio_settings", bw=event.data.bw, sf=event.data.sf, cr=event.data.cr)
+
+		elif event.kind == gt.RX_EVENT_SERIAL_MODE:
+			self.serial_binary = event.data == gt.SERIAL_MODE_BINARY
+			print(f"[INFO] Serial mode: {event.data}")
+
+		elif event.kind == gt.RX_EVENT_SERIAL_BAUD:
+			print(f"[INFO] Serial baud rate: {event.data}")
+
+		self.publish(message)
+
+	# ========== TEC QUEUE ==========
+
+	# Add a packet to the TEC pipeline, return its ID: unless seal is False, timestamp and MAC are set at transmission
+	def queue_tec(self, packet_bytes, label, seal=True):
+		tec = self.pipeline.submit(label, packet_bytes, seal=seal)
+		self.pipeline_wake.set()
+		return tec.id
+
+	# Publish the status of a TEC: final reply, timeout or retry
+	def publish_tec_status(self, tec):
+		if tec.done:
+			self.on_download_reply(tec)
+		self.publish({"event": "tec_status", "id": tec.id, "label": tec.label, "status": tec.status, "description": tec.description,
+					  "attempts": tec.attempts, "elapsed": None if tec.elapsed is None else round(tec.elapsed, 3)})
+
+	# TEC sender task: up to the pipeline window in flight, replies are matched in handle_event
+	async def send_tecs(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			now = loop.time()
+			for tec in self.pipeline.check_timeouts(now):
+				self.publish_tec_status(tec)
+
+			tec = self.pipeline.next_to_send(now)
+			while tec is not None:
+				if self.serial_binary:
+					data = gt.build_serial_frame(gt.SERIAL_FRAME_TEC, tec.packet_bytes)
+				else:
+					data = f"TEC: {tec.packet_bytes.hex(' ').upper()}\n".encode('utf-8')
+				await self.write_serial(data)
+				self.stats["tx_tecs"] += 1
+				self.publish({"event": "tec_sent", "id": tec.id, "label": tec.label, "time": datetime.utcnow().isoformat(),
+							  "hex": tec.packet_bytes.hex().upper(), "attempt": tec.attempts})
+				tec = self.pipeline.next_to_send(loop.time())
+
+			# Sleep until the next timeout or free TX slot, or until a reply or a new TEC arrives
+			deadline = self.pipeline.next_deadline()
+			self.pipeline_wake.clear()
+			try:
+				await asyncio.wait_for(self.pipeline_wake.wait(), None if deadline is None else max(0.0, deadline - loop.time()))
+			except asyncio.TimeoutError:
+				pass
+
+	# ========== DOWNLOADS ==========
+
+	# Start or resume a download, return its first request TEC
+	def start_download(self, path, tec_code, file_id, transfer_id, gs_text, ecc):
+		if transfer_id in self.downloads:
+			raise ValueError(f"Transfer {transfer_id} already in progress")
+		now = asyncio.get_running_loop().time()
+		download = bd.BulkDownload.resume(path, tec_code, file_id, transfer_id, now, bd.idle_timeout(self.link))
+
+		# Every chunk saved before a restart: only the file is left to write
+		if download.complete:
+			length = download.finish()
+			self.publish({"event": "download_complete", "transfer": transfer_id, "path": download.path, "bytes": length,
+						  "requests": download.requests, "duplicates": download.duplicates})
+			return download
+
+		# The job is registered once its first request is queued: a request that can not be built leaves nothing behind
+		job = [download, gs_text, ecc, None]
+		self.request_download(job, download.request(now))
+		self.downloads[transfer_id] = job
+		return download
+
+	# Queue a download request TEC
+	def request_download(self, job, payload):
+		download, gs_text, ecc, _ = job
+		packet_bytes = gt.build_packet(gs_text, download.tec_code, payload, ecc, sealed=False)
+		job[3] = self.pipeline.submit(gt.get_ter_tec_label(download.tec_code), packet_bytes)
+		self.pipeline_wake.set()
+
+	# TER_DOWNLOAD received: store the chunk, finish the file or ask for the gaps when the burst is over
+	def on_download_chunk(self, packet):
+		try:
+			segment = gt.parse_segment(packet.payload_bytes)
+		except ValueError as e:
+			print(f"[ERROR] Download chunk: {e}")
+			return
+		job = self.downloads.get(segment.transfer_id)
+		if job is None:
+			return # chunk of a download already finished or not started here
+		download = job[0]
+		now = asyncio.get_running_loop().time()
+		try:
+			download.add(segment, now)
+		except ValueError as e:
+			del self.downloads[segment.transfer_id]
+			download.pause()
+			self.publish({"event": "download_failed", "transfer": segment.transfer_id, "path": download.path, "error": str(e)})
+			return
+
+		if download.complete:
+			del self.downloads[segment.transfer_id]
+			length = download.finish()
+			self.publish({"event": "download_complete", "transfer": segment.transfer_id, "path": download.path, "bytes": length,
+						  "requests": download.requests, "duplicates": download.duplicates})
+			return
+
+		payload = download.poll(now)
+		if payload is not None:
+			self.request_download(job, payload)
+
+	# End of a download request: the burst starts with the reply, without reply (timeout or NACK)
+	# the partial file is kept for the next pass
+	def on_download_reply(self, tec):
+		for transfer_id, job in list(self.downloads.items()):
+			if job[3] is not tec:
+				continue
+			if tec.status in (gt.REPLY_ACK, gt.REPLY_DATA):
+				job[0].last_time = max(job[0].last_time, asyncio.get_running_loop().time())
+			else:
+				del self.downloads[transfer_id]
+				job[0].pause()
+				self.publish({"event": "download_paused", "transfer": transfer_id, "path": job[0].path,
+							  "received": job[0].received, "count": job[0].count, "reason": tec.description})
+
+	# Ask again for the gaps of the bursts that stopped before the end
+	async def watch_downloads(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			await asyncio.sleep(GSD_DOWNLOAD_POLL)
+			now = loop.time()
+			for job in list(self.downloads.values()):
+				download, _, _, tec = job
+				if tec is None or not tec.done:
+					continue # the burst starts when the request is answered
+				download.idle_timeout = bd.idle_timeout(self.link)
+				payload = download.poll(now)
+				if payload is not None:
+					self.request_download(job, payload)
+
+	# ========== DATABASE ==========
+
+	# Save the packets whose RSSI report had time to arrive (all of them if force)
+	def flush_db(self, force=False):
+		now = datetime.utcnow()
+		rows = []
+		while self.db_rows and (force or (now - self.db_rows[0][0]).total_seconds() >= GSD_RSSI_WAIT):
+			rows.append(tuple(self.db_rows.popleft()[1]))
+		if not rows:
+			return
+
+		with jdb.get_pool().writer() as conn:
+			ids, errors = jdb.save_packets_bulk(conn, rows)
+		self.stats["saved_packets"] += len(rows) - len(errors)
+		for index, error in errors:
+			print(f"[ERROR] Packet {rows[index][1]} not saved: {error}")
+
+	# Database writer task
+	async def write_db(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			await asyncio.sleep(GSD_DB_FLUSH_INTERVAL)
+			try:
+				await loop.run_in_executor(None, self.flush_db)
+			except Exception as e:
+				print(f"[ERROR] Database write failed: {e}")
+
+	# ========== API ==========
+
+	# Send an event to all subscribers
+	def publish(self, message):
+		for queue in self.subscribers:
+			if queue.full():
+				self.stats["dropped_events"] += 1
+			else:
+				queue.put_nowait(message)
+
+	# Execute one API request and return the reply
+	def handle_request(self, request):
+		cmd = request.get("cmd")
+
+		if cmd == "tec":
+			tec = request["tec"]
+			tec_code = gt.TEC_TASKS[tec] if isinstance(tec, str) else int(tec)
+			if "fields" in request:
+				payload = pc.encode_payload(tec_code, request["fields"])
+			else:
+				payload = bytes.fromhex(request.get("payload", ""))
+			packet_bytes = gt.build_packet(request.get("gs", "UniPD"), tec_code, payload, bool(request.get("ecc", False)), sealed=False)
+			label = tec if isinstance(tec, str) else gt.get_ter_tec_label(tec_code)
+			return {"ok": True, "id": self.queue_tec(packet_bytes, label), "hex": packet_bytes.hex().upper()}
+
+		elif cmd == "packet":
+			packet_bytes = bytes.fromhex(request["hex"])
+			gt.decode_packet(packet_bytes) # reject malformed packets before queueing
+			label = request.get("label") or gt.get_ter_tec_label(packet_bytes[2])
+			return {"ok": True, "id": self.queue_tec(packet_bytes, label, seal=bool(request.get("seal", False)))}
+
+		elif cmd == "download":
+			tec = request.get("tec", "Download")
+			tec_code = gt.TEC_TASKS[tec] if isinstance(tec, str) else int(tec)
+			if tec_code not in gt.TEC_DATA_REPLIES[gt.TER_DOWNLOAD]:
+				raise ValueError(f"Not a download TEC: {tec}")
+			file_id = int(request["file"])
+			transfer_id = int(request.get("transfer", file_id & 0xFF))
+			if not 0 <= file_id <= 0xFFFF:
+				raise ValueError(f"File ID out of range: {file_id}")
+			if not 0 <= transfer_id <= 0xFF:
+				raise ValueError(f"Transfer ID out of range: {transfer_id}")
+			download = self.start_download(request["path"], tec_code, file_id, transfer_id, request.get("gs", "UniPD"), bool(request.get("ecc", False)))
+			return {"ok": True, "transfer": transfer_id, "received": download.received, "count": download.count}
+
+		elif cmd == "radio":
+			line = f"RADIO: {float(request['f']):.3f} {float(request['bw']):.2f} {int(request['sf'])} {int(request['cr'])} {int(request['power'])}\n"
+			asyncio.get_running_loop().create_task(self.write_serial(line.encode('utf-8')))
+			return {"ok": True}
+
+		elif cmd == "status":
+			return {"ok": True, "port": self.port, "baud": self.serial_conn.baudrate, "binary": self.serial_binary,
+					"queued": len(self.pipeline.queue), "waiting_reply": len(self.pipeline.in_flight), "window": self.pipeline.window, "link": self.link.describe(), "subscribers": len(self.subscribers),
+					"downloads": [job[0].describe(asyncio.get_running_loop().time()) for job in self.downloads.values()], **self.stats}
+
+		raise ValueError(f"Unknown command: {cmd}")
+
+	# One API connection: requests in, replies and subscribed events out
+	async def handle_client(self, reader, writer):
+		events = None
+		sender = None
+
+		async def send_events():
+			while True:
+				message = await events.get()
+				writer.write((json.dumps(message) + "\n").encode('utf-8'))
+				await writer.drain()
+
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				try:
+					request = json.loads(line)
+					if request.get("cmd") == "subscribe":
+						if events is None:
+							events = asyncio.Queue(GSD_SUBSCRIBER_QUEUE)
+							self.subscribers.add(events)
+							sender = asyncio.create_task(send_events())
+						reply = {"ok": True}
+					else:
+						reply = self.handle_request(request)
+				except Exception as e:
+					reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+				writer.write((json.dumps(reply) + "\n").encode('utf-8'))
+				await writer.drain()
+		except ConnectionError:
+			pass
+		finally:
+			if events is not None:
+				self.subscribers.discard(events)
+				sender.cancel()
+			writer.close()
+
+# ========== CLIENT ==========
+
+class GsdClient:
+	"""Blocking client of the daemon API, for scripts and viewers"""
+
+	def __init__(self, host=GSD_HOST, port=GSD_PORT, unix_path=None, timeout=None):
+		if unix_path:
+			self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			self.sock.connect(unix_path)
+		else:
+			self.sock = socket.create_connection((host, port))
+		self.sock.settimeout(timeout)
+		self.file = self.sock.makefile("rwb")
+		self.pending = deque() # events received while waiting for a reply
+		self.subscribed = False
+
+	# Send a request and wait for its reply
+	def request(self, cmd, **args):
+		self.file.write((json.dumps({"cmd": cmd, **args}) + "\n").encode('utf-8'))
+		self.file.flush()
+		while True:
+			message = self.read_message()
+			if "event" in message:
+				self.pending.append(message)
+			else:
+				return message
+
+	def read_message(self):
+		line = self.file.readline()
+		if not line:
+			raise ConnectionError("Daemon closed the connection")
+		return json.loads(line)
+
+	# Receive the RX stream and TEC status events from now on
+	def subscribe(self):
+		if not self.subscribed:
+			self.request("subscribe")
+			self.subscribed = True
+
+	# Subscribe and yield the RX stream and TEC status events
+	def events(self):
+		self.subscribe()
+		while True:
+			while self.pending:
+				yield self.pending.popleft()
+			yield self.read_message()
+
+	def close(self):
+		self.file.close()
+		self.sock.close()
+
+# Published event of the RX stream -> RxEvent as produced by SerialStreamParser, None for the TEC and download events
+def message_to_event(message):
+	kind = message["event"]
+	rx_time = datetime.fromisoformat(message["time"]) if "time" in message else datetime.utcnow()
+	line = message.get("line", "")
+
+	if kind == "packet" or kind in MESSAGE_REJECTS:
+		packet_bytes = bytes.fromhex(message["hex"])
+		return gt.RxEvent(MESSAGE_REJECTS.get(kind, gt.RX_EVENT_PACKET), rx_time, line, gt.decode_packet(packet_bytes), packet_bytes)
+	elif kind == "rssi":
+		return gt.RxEvent(gt.RX_EVENT_RSSI, rx_time, line, (message["rssi"], message["snr"], message["deltaf"]), None)
+	elif kind == "radio_error":
+		return gt.RxEvent(gt.RX_EVENT_RADIO_ERROR, rx_time, line, line, None)
+	elif kind == "error":
+		return gt.RxEvent(gt.RX_EVENT_ERROR, rx_time, line, message["error"], None)
+	elif kind == "radio_settings":
+		return gt.RxEvent(gt.RX_EVENT_RADIO_SETTINGS, rx_time, line, gt.LoRaConfig(message["bw"], message["sf"], message["cr"]), None)
+	elif kind == "line":
+		return gt.parse_serial_line(line, rx_time)
+	return None
+
+# ========== MAIN ==========
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Headless ground station daemon")
+	parser.add_argument("--port", required=True, help="serial port of the GS LoRa board")
+	parser.add_argument("--baud", type=int, default=gt.SERIAL_BAUD_RATES[-1], choices=gt.SERIAL_BAUD_RATES)
+	parser.add_argument("--db", default=jdb.DB_PATH, help="database path, empty to disable saving")
+	parser.add_argument("--host", default=GSD_HOST)
+	parser.add_argument("--tcp-port", type=int, default=GSD_PORT)
+	parser.add_argument("--unix", default=None, help="path of an additional Unix socket API")
+	parser.add_argument("--replay-window", type=float, default=gt.RX_REPLAY_WINDOW,
+						help="reject packets whose TX timestamp is further than this from the GS clock [s]")
+	args = parser.parse_args(argv)
+
+	daemon = GroundStationDaemon(args.port, args.baud, args.db or None, args.host, args.tcp_port, args.unix, args.replay_window)
+	try:
+		asyncio.run(daemon.run())
+	except KeyboardInterrupt:
+		print("[INFO] Stopped")
+	except serial.SerialException as e:
+		print(f"[ERROR] Serial port failed: {e}")
+
+if __name__ == "__main__":
+	main()
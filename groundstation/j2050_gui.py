@@ -1,10 +1,14 @@
 import struct
 import sys
+import os
+import time
+import socket
 from pyparsing import line
 import serial
 import serial.tools.list_ports
 
 from datetime import datetime
+from collections import deque, namedtuple
 
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QColor
@@ -61,9 +65,17 @@ try:
 except ImportError:
     import GS_task as gt
 
-# ========== CONSTANTS AND CONFIGURATION ==========
+# Daemon client: the GUI can drive a running gsd instead of opening the serial port itself
+try:
+    from . import gsd
+except ImportError:
+    try:
+        import gsd
+    except Exception as _gsd_exc:
+        gsd = None
+        print(f"[WARN] daemon client import failed: {_gsd_exc}")
 
-RX_TIMEOUT = 5  # seconds to wait for a reply after sending a TEC
+# ========== CONSTANTS AND CONFIGURATION ==========
 
 # Packet configuration
 PACKET_HEADER_LENGTH = 12 # 4 bytes for header + 4 bytes for MAC + 4 bytes for timestamp
@@ -72,6 +84,11 @@ PACKET_PAYLOAD_MAX = 98  # maximum payload length in bytes
 # MAC configuration		
 SECRET_KEY = 0xA1B2C3D4
 
+# Daemon connection: selected as a serial port, "gsd://host:port"
+GSD_PORT_PREFIX = "gsd://"
+
+SCHEDULER_TOOLTIP = "Send the queued TECs during the predicted contacts, unsent TECs wait for the next pass"
+
 # Fixed bytes configuration
 BYTE_RS_OFF = 0x55
 BYTE_RS_ON = 0xAA
@@ -338,9 +355,10 @@ def ask_for_comment(parent=None, id_in_table = 0):
 
 # Function to export the table content to the database
 def export_table_to_db(table: QTableWidget):
+	"""Return (ids, errors) of save_packets_bulk, with the error indexes mapped to the table rows.
+	Only the rows saved or already in the database are removed from the table"""
 
 	# Checking boolean variable 
-	check_message = False # To check if the comment insertion was cancelled
 	white_comment = False # To check if the comment was insert but it is None
 	add_to_all_check = False # To check if the user wants to add the comment to all the packets
 
@@ -349,26 +367,34 @@ def export_table_to_db(table: QTableWidget):
 	# Counting columns number to determine the table type
 	col_count = table.columnCount()
 
+	# Packets to save, written to the database in a single transaction at the end, and their table rows
+	packets = []
+	rows = []
+
 	# For each row of the table, extract data, make a packet and send it to database
 	for row in reversed(range(table.rowCount())):
 
 		# TEC table
 		if col_count == 3:
 			# tec_label = table.item(row, 0).text() if table.item(row, 0) else ""
-			time = table.item(row, 1).text() if table.item(row, 1) else "0"
+			time = table.item(row, 1).text() if table.item(row, 1) else ""
 			hex_str = table.item(row, 2).text() if table.item(row, 2) else ""
 			rssi = snr = deltaf = None
 
 		# TER table
 		elif col_count == 6:
 			# tec_label = table.item(row, 0).text() if table.item(row, 0) else ""
-			time = table.item(row, 1).text() if table.item(row, 1) else "0"
+			time = table.item(row, 1).text() if table.item(row, 1) else ""
 			rssi = table.item(row, 2).text() if table.item(row, 2) else "0"
 			snr = table.item(row, 3).text() if table.item(row, 3) else "0"
 			deltaf = table.item(row, 4).text() if table.item(row, 4) else "0"
 			hex_str = table.item(row, 5).text() if table.item(row, 5) else ""
 		else:
 			continue  # add here if is made a new table
+
+		# TEC not transmitted yet (no TX time): it stays in the table
+		if not time:
+			continue
 		
 		# Asking for comment
 		if add_to_all_check is False:
@@ -376,35 +402,26 @@ def export_table_to_db(table: QTableWidget):
 		else: 
 			white_comment = False
 
-		# Different scenarios
+		# If the user cancels, skip saving this packet
 		if comment is None and white_comment is False:
-			# If the user cancels, skip saving this packet
-			check_message = True
 			continue 
-		elif comment == "" and white_comment is True:
-			# If the user didn't insert a comment, use a default one
-			check_message = True
 
-			# Clear the single row
-			remove_table_row(table, row)
-		elif comment is not None and comment != "":
-			# Clear the single row
-			remove_table_row(table, row)
+		# Queue the single row for the database
+		packets.append((time, hex_str, rssi, snr, deltaf, comment))
+		rows.append(row)
 
-		# Save the single row in database
-		jdb.save_packet(
-			db_conn,
-			time,
-			hex_str,
-			rssi,
-			snr,
-			deltaf,
-			comment
-		)
+	# Save all rows in database, rows that can not be decoded are reported in errors
+	# A failed transaction raises before any row is removed, so the table is kept
+	with jdb.get_pool().writer() as conn:
+		ids, errors = jdb.save_packets_bulk(conn, packets)
+
+	# Clear the rows in the database (rows are in descending order: removing one does not move the next ones)
+	duplicates = {index for index, error in errors if error == jdb.DUPLICATE_PACKET_ERROR}
+	for index, row in enumerate(rows):
+		if ids[index] is not None or index in duplicates:
+			remove_table_row(table, row)
 
-	# Clear all the table if the comment insertion wasn't cancelled(to delete all if some rows wasn't delete before)
-	if check_message == False or add_to_all_check == True:
-		clear_table(table)
+	return ids, sorted((rows[index], error) for index, error in errors)
 
 # Function to open the database GUI
 def open_database_GUI():
@@ -412,6 +429,157 @@ def open_database_GUI():
 	# Open a new window to show the database content
 	jdb.open_database()
 
+# ========== SERIAL READER THREAD ==========
+
+class SerialReader(QThread):
+	"""Read the serial port in background, parse lines and frames and queue RX events for the GUI"""
+
+	# Emitted once per batch of new events, the GUI drains the queue with take_events()
+	events_ready = pyqtSignal()
+	# Emitted when the serial port fails, with the error message
+	failed = pyqtSignal(str)
+
+	def __init__(self, serial_conn, baud=gt.SERIAL_BAUD_DEFAULT, parent=None):
+		super().__init__(parent)
+		self.serial_conn = serial_conn
+		self.parser = gt.SerialStreamParser(rx_filter=gt.RxFilter())
+		# Baud rate and serial mode negotiation, the rate is switched here between two reads
+		self.link_setup = gt.SerialLinkSetup(baud)
+
+		# Bounded queue: append/popleft on a deque are atomic, so no lock is needed between threads
+		self.events = deque(maxlen=gt.SERIAL_RX_QUEUE_SIZE)
+		self.dropped_events = 0
+		self.notify_pending = False
+		self.running = False
+
+	# Thread loop: split the byte stream into lines and frames and hand typed events to the GUI
+	def run(self):
+		self.running = True
+		while self.running:
+			try:
+				# Everything already received, or wait for one byte up to the port timeout
+				data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+				events = self.parser.feed(data, datetime.utcnow()) if data else []
+				events = self.link_setup.update(self.serial_conn, events)
+			except Exception as e:
+				if self.running:
+					self.failed.emit(str(e))
+				return
+
+			if not events:
+				continue
+
+			# Oldest events are discarded when the GUI can not keep up
+			overflow = len(self.events) + len(events) - self.events.maxlen
+			if overflow > 0:
+				self.dropped_events += overflow
+			self.events.extend(events)
+
+			# Only one signal in flight: the GUI takes everything queued meanwhile
+			if not self.notify_pending:
+				self.notify_pending = True
+				self.events_ready.emit()
+
+	# Stop the thread loop and wait for it to exit
+	def stop(self):
+		self.running = False
+		self.wait()
+
+	# Take up to max_events events from the queue (GUI thread)
+	def take_events(self, max_events=gt.SERIAL_RX_BATCH_SIZE):
+		self.notify_pending = False
+		batch = []
+		while self.events and len(batch) < max_events:
+			batch.append(self.events.popleft())
+		return batch
+
+# ========== DAEMON READER THREAD ==========
+
+# TEC of the daemon pipeline, as shown by report_tec_status: its ID ("gsd", daemon ID) does not clash with the local pipeline IDs
+DaemonTec = namedtuple("DaemonTec", ["id", "label", "status", "description", "attempts", "elapsed"], defaults=(None, "", 1, None))
+
+class DaemonReader(QThread):
+	"""Subscribe to a running gsd and queue its RX stream for the GUI, as SerialReader does for the serial port.
+	The daemon matches the replies itself: its TEC events (tec_sent, tec_status, download_*) are queued as dicts"""
+
+	events_ready = pyqtSignal()
+	failed = pyqtSignal(str)
+
+	def __init__(self, host, port, parent=None):
+		super().__init__(parent)
+		self.client = gsd.GsdClient(host, port)
+		self.client.subscribe() # before any TEC is queued, so that none of its events is missed
+		self.parser = None # packets are checked by the daemon, which keeps the counters
+		self.events = deque(maxlen=gt.SERIAL_RX_QUEUE_SIZE)
+		self.dropped_events = 0
+		self.notify_pending = False
+		self.running = False
+
+	def run(self):
+		self.running = True
+		try:
+			for message in self.client.events():
+				event = gsd.message_to_event(message)
+				if len(self.events) == self.events.maxlen:
+					self.dropped_events += 1
+				self.events.append(event if event is not None else message)
+				if not self.notify_pending:
+					self.notify_pending = True
+					self.events_ready.emit()
+		except Exception as e:
+			if self.running:
+				self.failed.emit(str(e))
+
+	# Close the subscription, which ends the blocking read of the thread loop
+	def stop(self):
+		self.running = False
+		try:
+			self.client.sock.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+		self.wait()
+		self.client.close()
+
+	def take_events(self, max_events=gt.SERIAL_RX_BATCH_SIZE):
+		self.notify_pending = False
+		batch = []
+		while self.events and len(batch) < max_events:
+			batch.append(self.events.popleft())
+		return batch
+
+# ========== DATABASE EXPORT THREAD ==========
+
+class ExportWorker(QThread):
+	"""Stream the database to a CSV, Excel or Parquet file in background, reporting the progress to the GUI"""
+
+	# Exported rows and total rows
+	progress = pyqtSignal(int, int)
+	# Emitted at the end with the number of exported rows
+	done = pyqtSignal(int)
+	# Emitted when the export fails, with the error message
+	failed = pyqtSignal(str)
+
+	def __init__(self, path, filters, incremental, parent=None):
+		super().__init__(parent)
+		self.path = path
+		self.filters = filters
+		self.incremental = incremental
+
+	def run(self):
+		export_format = os.path.splitext(self.path)[1].lower()
+		try:
+			# Read-only connection from the pool: the GUI keeps saving packets meanwhile
+			with jdb.get_pool().reader() as conn:
+				since_id = jdb.get_last_export(conn, export_format) if self.incremental else None
+				count, last_id = jdb.export_packets(conn, self.path, since_id=since_id, progress=self.progress.emit, **self.filters)
+			if last_id is not None:
+				with jdb.get_pool().writer() as conn:
+					jdb.set_last_export(conn, export_format, last_id)
+		except Exception as e:
+			self.failed.emit(str(e))
+			return
+		self.done.emit(count)
+
 # ========== MAIN WINDOW CLASS ==========
 
 class MainWindow(QWidget):
@@ -429,9 +597,16 @@ class MainWindow(QWidget):
 
 		# Core state
 		self.serial_conn = None
+		self.serial_reader = None
+		self.gsd_client = None # requests to the daemon when connected through gsd instead of the serial port
+		self.serial_binary = False # binary frames confirmed by the GS firmware
+		self.skip_rssi = False # RSSI report of a rejected packet still to come
 		self.tec_queue = []
 		self.created_widgets = {}
-		self.sent_tecs = []
+		self.link_timing = gt.LinkTiming() # reply timeouts from the LoRa airtime and the measured RTT
+		self.tec_pipeline = gt.TecPipeline(link=self.link_timing, sealer=gt.TecSealer()) # TECs are sealed when they leave
+		self.sent_tec_items = {} # pipeline TEC ID -> first item of its row in sent_tec_table
+		self.tec_scheduler = gt.TecScheduler(self.tec_pipeline)
 		self.new_line_pending = True
 
 		# Initialize Panels and Layouts
@@ -439,17 +614,14 @@ class MainWindow(QWidget):
 		self.init_right_panel()
 
 		# Setup timers
-		self.serial_timer = QTimer()
-		self.serial_timer.timeout.connect(self.read_serial)
+		self.pipeline_timer = QTimer()
+		self.pipeline_timer.setInterval(100)
+		self.pipeline_timer.timeout.connect(self.run_tec_pipeline)
 
-		self.queue_timer = QTimer()
-		self.queue_timer.setSingleShot(True)
-		self.queue_timer.setInterval(1000)
-		self.queue_timer.timeout.connect(self.enable_add_to_queue_button)
-
-		self.timeout_timer = QTimer()
-		self.timeout_timer.setInterval(1000)
-		self.timeout_timer.timeout.connect(self.check_tec_timeout)
+		self.scheduler_timer = QTimer()
+		self.scheduler_timer.setInterval(1000)
+		self.scheduler_timer.timeout.connect(self.run_tec_scheduler)
+		self.scheduler_timer.start()
 
 		# Enable or disable the database buttons if the database class cannot be accessed
 		self.DB_button_enable()
@@ -501,6 +673,19 @@ class MainWindow(QWidget):
 		self.execute_next_tec_button.clicked.connect(self.execute_next_tec)
 		self.execute_next_tec_button.setEnabled(False)
 
+		self.execute_all_tec_button = QPushButton("Execute All")
+		self.execute_all_tec_button.clicked.connect(self.execute_all_tecs)
+		self.execute_all_tec_button.setEnabled(False)
+
+		# Pass scheduler: the queue is executed automatically during the predicted contacts
+		self.load_passes_button = QPushButton("Load Passes")
+		self.load_passes_button.clicked.connect(self.load_passes)
+
+		self.scheduler_checkbox = QCheckBox("Execute at AOS")
+		self.scheduler_checkbox.setToolTip(SCHEDULER_TOOLTIP)
+
+		self.scheduler_status = QLabel("NO CONTACTS")
+
 		self.last_tec_status = QLabel("NO COMMS")
 		self.last_tec_status.setAlignment(Qt.AlignCenter)
 		self.last_tec_status.setStyleSheet("background-color: lightgray; color: black; font-weight: bold; padding: 5px;")
@@ -559,7 +744,15 @@ class MainWindow(QWidget):
 		btn_row.addWidget(self.abort_next_tec_button)
 		btn_row.addWidget(self.abort_last_tec_button)
 		queued_layout.addLayout(btn_row)
-		queued_layout.addWidget(self.execute_next_tec_button)
+		exec_row = QHBoxLayout()
+		exec_row.addWidget(self.execute_next_tec_button)
+		exec_row.addWidget(self.execute_all_tec_button)
+		queued_layout.addLayout(exec_row)
+		scheduler_row = QHBoxLayout()
+		scheduler_row.addWidget(self.load_passes_button)
+		scheduler_row.addWidget(self.scheduler_checkbox)
+		scheduler_row.addWidget(self.scheduler_status, 1)
+		queued_layout.addLayout(scheduler_row)
 		queued_group.setLayout(queued_layout)
 
 		last_group = QGroupBox("Last TEC Status")
@@ -599,6 +792,10 @@ class MainWindow(QWidget):
 		# Status Messages
 		status_group = QGroupBox("Status Messages")
 		status_layout = QVBoxLayout()
+		self.link_timing_label = QLabel("")
+		self.link_timing_label.setToolTip("Round trip estimate of the LoRa configuration in use, RTO of a TEC without payload")
+		self.update_link_timing_label()
+		status_layout.addWidget(self.link_timing_label)
 		self.status_console = QTextEdit()
 		self.status_console.setReadOnly(True)
 		self.clear_status_button = QPushButton("Clear")
@@ -625,6 +822,11 @@ class MainWindow(QWidget):
 		self.port_selector = QComboBox()
 		self.refresh_ports()
 
+		# Baud rate requested to the GS after connecting
+		self.baud_selector = QComboBox()
+		self.baud_selector.addItems([str(baud) for baud in gt.SERIAL_BAUD_RATES])
+		self.baud_selector.setCurrentText(str(gt.SERIAL_BAUD_RATES[-1]))
+
 		self.refresh_button = QPushButton("Refresh Ports")
 		self.refresh_button.clicked.connect(self.refresh_ports)
 
@@ -637,6 +839,7 @@ class MainWindow(QWidget):
 
 		serial_comm_form = QFormLayout()
 		serial_comm_form.addRow("Select COM Port:", self.port_selector)
+		serial_comm_form.addRow("Baud rate:", self.baud_selector)
 		serial_comm_layout.addLayout(serial_comm_form)
 
 		serial_comm_buttons = QHBoxLayout()
@@ -823,18 +1026,76 @@ class MainWindow(QWidget):
 		self.open_db_button.clicked.connect(open_database_GUI)
 		db_tab_layout.addWidget(self.open_db_button)
 
-		# Function to export all tables to an excel file
+		# Export filters: date range, ground station, TEC/TER type and only new packets
+		export_filter_row = QHBoxLayout()
+		self.export_date_check = QCheckBox("From")
+		self.export_date_from = QDateEdit(QDate.currentDate().addMonths(-1))
+		self.export_date_from.setCalendarPopup(True)
+		self.export_date_to = QDateEdit(QDate.currentDate())
+		self.export_date_to.setCalendarPopup(True)
+		self.export_gs_combo = QComboBox()
+		self.export_gs_combo.addItem("All GS IDs")
+		self.export_gs_combo.addItems(gt.TX_SOURCES.keys())
+		self.export_type_combo = QComboBox()
+		self.export_type_combo.addItem("All Types")
+		self.export_type_combo.addItems(list(gt.TER_TASKS.keys()) + list(gt.TEC_TASKS.keys()))
+		self.export_incremental_check = QCheckBox("Only new since last export")
+		export_filter_row.addWidget(self.export_date_check)
+		export_filter_row.addWidget(self.export_date_from)
+		export_filter_row.addWidget(QLabel("To"))
+		export_filter_row.addWidget(self.export_date_to)
+		export_filter_row.addWidget(self.export_gs_combo)
+		export_filter_row.addWidget(self.export_type_combo)
+		export_filter_row.addWidget(self.export_incremental_check)
+		export_filter_row.addStretch()
+		db_tab_layout.addLayout(export_filter_row)
+
+		# Function to export the database tables to an Excel, CSV or Parquet file in background
 		def export_all_tables():
-			try:
-				jdb.export_tables_to_excel(self.db_conn)
-				self.log_status("Database exported successfully")
-			except Exception as e:
-				self.log_status("Export Error", str(e), QMessageBox.Critical)
-
-		# Export Database button
-		self.export_db_button = QPushButton("Export DB to Excel")
+			path, _ = QFileDialog.getSaveFileName(self, "Export database", "packets_export.xlsx", "Excel (*.xlsx);;CSV (*.csv);;Parquet (*.parquet)")
+			if not path:
+				return
+
+			filters = {}
+			if self.export_date_check.isChecked():
+				filters["from_date"] = self.export_date_from.date().toString("yyyy-MM-dd")
+				filters["to_date"] = self.export_date_to.date().toString("yyyy-MM-dd")
+			if self.export_gs_combo.currentIndex() > 0:
+				filters["sources"] = [gt.get_gs_id(self.export_gs_combo.currentText())]
+			if self.export_type_combo.currentIndex() > 0:
+				filters["types"] = [gt.get_ter_tec_id(self.export_type_combo.currentText())]
+
+			self.export_worker = ExportWorker(path, filters, self.export_incremental_check.isChecked(), self)
+			self.export_worker.progress.connect(on_export_progress)
+			self.export_worker.done.connect(on_export_done)
+			self.export_worker.failed.connect(on_export_failed)
+			self.export_db_button.setEnabled(False)
+			self.export_progress.setValue(0)
+			self.export_progress.show()
+			self.export_worker.start()
+
+		def on_export_progress(done, total):
+			self.export_progress.setMaximum(max(total, 1))
+			self.export_progress.setValue(done)
+
+		def on_export_done(count):
+			self.export_db_button.setEnabled(True)
+			self.export_progress.hide()
+			self.log_status(f"Database exported successfully ({count} rows)")
+
+		def on_export_failed(error):
+			self.export_db_button.setEnabled(True)
+			self.export_progress.hide()
+			self.log_status(f"[ERROR] Database export failed: {error}")
+
+		# Export Database button and progress
+		self.export_worker = None
+		self.export_db_button = QPushButton("Export DB")
 		self.export_db_button.clicked.connect(export_all_tables)
 		db_tab_layout.addWidget(self.export_db_button)
+		self.export_progress = QProgressBar()
+		self.export_progress.hide()
+		db_tab_layout.addWidget(self.export_progress)
 
 		# Function to set the database status rectangle
 		def set_db_status_rect(available, db_path=None):
@@ -910,28 +1171,92 @@ class MainWindow(QWidget):
 	# Connect to the selected serial port
 	def connect_serial(self):
 		port = self.port_selector.currentText()
+		if port.startswith(GSD_PORT_PREFIX):
+			self.connect_daemon(port)
+			return
 		try:
-			self.serial_conn = serial.Serial(port, 9600, timeout=0.1)
+			# The GS firmware always starts at the default rate (the board resets when the port is opened)
+			self.serial_conn = serial.Serial(port, gt.SERIAL_BAUD_DEFAULT, timeout=gt.SERIAL_READ_TIMEOUT)
 			self.set_serial_status(True)
 			self.connect_button.setText("Disconnect")
 			self.execute_next_tec_button.setEnabled(True)
+			self.execute_all_tec_button.setEnabled(True)
 			self.apply_lora_settings_btn.setEnabled(True)
 			# self.execute_next_tec_button.setStyleSheet("background-color: rgba(0, 255, 0, 128);")
 			self.log_status(f"[INFO] Connected to {port}")
-			self.serial_timer.start(100)
+
+			# Start the background reader, RX events are delivered to read_serial in batches
+			# The reader negotiates the link once the GS answers: baud rate first, then the serial mode at the new rate
+			# TECs are sent as text lines until the GS confirms the binary mode
+			self.serial_binary = False
+			self.serial_reader = SerialReader(self.serial_conn, int(self.baud_selector.currentText()))
+			self.serial_reader.events_ready.connect(self.read_serial)
+			self.serial_reader.failed.connect(self.on_serial_reader_failed)
+			self.serial_reader.start()
 		except Exception as e:
 			self.log_status(f"[ERROR] Could not connect: {e}")
 			self.set_serial_status(False)
 
+	# Connect to a running gsd: it owns the serial port, the TEC pipeline and the database writer
+	def connect_daemon(self, address):
+		host, _, port = address[len(GSD_PORT_PREFIX):].rpartition(":")
+		try:
+			if gsd is None:
+				raise RuntimeError("daemon client not available")
+			self.gsd_client = gsd.GsdClient(host, int(port))
+			status = self.gsd_client.request("status")
+			self.serial_reader = DaemonReader(host, int(port))
+		except Exception as e:
+			if self.gsd_client is not None:
+				self.gsd_client.close()
+				self.gsd_client = None
+			self.log_status(f"[ERROR] Could not connect to the daemon: {e}")
+			self.set_serial_status(False)
+			return
+
+		self.serial_binary = status["binary"]
+		self.set_serial_status(True)
+		self.connect_button.setText("Disconnect")
+		self.execute_next_tec_button.setEnabled(True)
+		self.execute_all_tec_button.setEnabled(True)
+		self.apply_lora_settings_btn.setEnabled(True)
+		self.link_timing_label.setText(f"Link: {status['link']}")
+
+		# The scheduler gates the local pipeline, the TECs sent through the daemon wait in its own pipeline
+		self.scheduler_checkbox.setChecked(False)
+		self.scheduler_checkbox.setEnabled(False)
+		self.scheduler_checkbox.setToolTip("Not available through the daemon: the TECs wait in its pipeline")
+		self.log_status(f"[INFO] Connected to the daemon at {host}:{port}: {status['port']} at {status['baud']} baud, "
+						f"{'binary' if status['binary'] else 'text'} mode, {status['queued'] + status['waiting_reply']} TECs in its pipeline")
+
+		# RX stream and TEC status of the daemon, delivered to read_serial in batches
+		self.serial_reader.events_ready.connect(self.read_serial)
+		self.serial_reader.failed.connect(self.on_serial_reader_failed)
+		self.serial_reader.start()
+
+	# The GS is reachable, through the serial port or the daemon
+	def link_open(self):
+		return self.gsd_client is not None or (self.serial_conn is not None and self.serial_conn.is_open)
+
 	# Disconnect from the serial port
 	def disconnect_serial(self):
-		if self.serial_conn:
-			self.serial_timer.stop()
-			self.serial_conn.close()
+		if self.serial_conn or self.gsd_client:
+			if self.serial_reader:
+				self.serial_reader.stop()
+				self.serial_reader = None
+			if self.gsd_client:
+				self.gsd_client.close()
+				self.gsd_client = None
+				self.scheduler_checkbox.setEnabled(True)
+				self.scheduler_checkbox.setToolTip(SCHEDULER_TOOLTIP)
+			else:
+				self.serial_conn.close()
+			self.serial_binary = False
 			self.set_serial_status(False)
 			self.connect_button.setText("Connect")
 			self.execute_next_tec_button.setEnabled(False)
 			self.execute_next_tec_button.setStyleSheet("")
+			self.execute_all_tec_button.setEnabled(False)
 			self.apply_lora_settings_btn.setEnabled(True)
 			self.apply_lora_settings_btn.setStyleSheet("")
 			self.log_status("[INFO] Disconnected")
@@ -942,72 +1267,101 @@ class MainWindow(QWidget):
 		ports = serial.tools.list_ports.comports()
 		for port in ports:
 			self.port_selector.addItem(port.device)
+		if gsd is not None:
+			self.port_selector.addItem(f"{GSD_PORT_PREFIX}{gsd.GSD_HOST}:{gsd.GSD_PORT}")
 
 	# Toggle serial connection state based on current status
 	def toggle_connection(self):
-		if self.serial_conn and self.serial_conn.is_open:
+		if self.link_open():
 			self.disconnect_serial()
 		else:
 			self.connect_serial()
 
-	# Read data from the serial port
+	# Handle the RX events queued by the serial reader thread
 	def read_serial(self):
-		if self.serial_conn:
-			try:
-				while self.serial_conn.in_waiting:
-					# Read a full line from serial and decode it
-					line = self.serial_conn.readline().decode(errors='ignore').strip()
-
-					if not line:
-						continue  # skip empty lines
-					
-					self.log_serial(f"[RX]: {line}")
-
-					if line.startswith("PACKET:"):
-
-						hex_str = line[len("PACKET:"):].strip()
-						hex_parts = hex_str.split()
-
-						try:
-							packet_bytes = bytes(int(h, 16) for h in hex_parts)
-							decoded_packet = gt.decode_packet(packet_bytes)
-
-							# Show decoded info for debug in status_console
-							self.log_status(f"[INFO] Packet decoded: {decoded_packet}")
-
-							# Pass to handler for ACK/NACK or other processing
-							self.handle_packet_reception(decoded_packet, packet_bytes)
-
-						except Exception as e:
-							error_type = type(e).__name__
-							error_msg = str(e)
-							tb = traceback.format_exc()
-							self.log_status(f"[ERROR] Packet not decoded: {error_type}: {error_msg}\n{tb}")
+		if not self.serial_reader:
+			return
 
-					elif line.startswith("RSSI:"):
-						try:
-							# Example line: "RSSI: -113.75 SNR: 9.20 dF: 1.02"
-							parts = line.split()
+		for event in self.serial_reader.take_events():
+			# TEC and download events of the daemon
+			if isinstance(event, dict):
+				self.handle_daemon_message(event)
+				continue
 
-							# Extract and convert values
-							rssi = float(parts[1])
-							snr = float(parts[3])
-							freq_shift = float(parts[5])
+			self.log_serial(f"[RX]: {event.line}")
 
-							# Update the top row of the received TER table, if it exists
-							if self.received_ter_table.rowCount() > 0:
-								self.received_ter_table.setItem(0, 2, QTableWidgetItem(f"{rssi:.2f}"))
-								self.received_ter_table.setItem(0, 3, QTableWidgetItem(f"{snr:.2f}"))
-								self.received_ter_table.setItem(0, 4, QTableWidgetItem(f"{freq_shift:.2f}"))
+			if event.kind == gt.RX_EVENT_PACKET:
+				self.skip_rssi = False
 
-						except (IndexError, ValueError) as e:
-							self.log_status(f"[ERROR] Failed to parse RSSI line: {e}")
-					elif line.startswith("RADIO error:"):
-						self.log_status(f"[ERROR] {line}")
+				# Show decoded info for debug in status_console
+				self.log_status(f"[INFO] Packet decoded: {event.data}")
 
-			except Exception as e:
-				self.log_status(f"[ERROR] Reading failed: {e}")
-				self.disconnect_serial()
+				# Pass to handler for ACK/NACK or other processing
+				try:
+					self.handle_packet_reception(event.data, event.packet_bytes, event.rx_time)
+				except Exception as e:
+					tb = traceback.format_exc()
+					self.log_status(f"[ERROR] Packet not handled: {type(e).__name__}: {e}\n{tb}")
+
+			elif event.kind in (gt.RX_EVENT_MAC_ERROR, gt.RX_EVENT_DUPLICATE, gt.RX_EVENT_REPLAY):
+				# Forged, corrupted, duplicated or replayed packet: not shown as received, not matched with the TECs waiting for reply
+				# The daemon keeps the counters: see its status
+				packet = event.data
+				parser = self.serial_reader.parser
+				if event.kind == gt.RX_EVENT_MAC_ERROR:
+					count = f" ({parser.verifier.rejected} rejected)" if parser else ""
+					self.log_status(f"[WARN] Packet rejected, invalid MAC: TER 0x{packet.ter:02X}, MAC 0x{packet.mac:08X}{count}")
+				elif event.kind == gt.RX_EVENT_DUPLICATE:
+					count = f" ({parser.rx_filter.duplicates} dropped)" if parser else ""
+					self.log_status(f"[INFO] Duplicate packet dropped: TER 0x{packet.ter:02X}, TX time {packet.timestamp}{count}")
+				else:
+					count = f" ({parser.rx_filter.replays} rejected)" if parser else ""
+					self.log_status(f"[WARN] Packet rejected, TX time {packet.timestamp} outside the replay window{count}")
+				self.skip_rssi = True # the next RSSI report belongs to the rejected packet
+
+			elif event.kind == gt.RX_EVENT_RSSI:
+				rssi, snr, freq_shift = event.data
+
+				# Update the top row of the received TER table, if it exists
+				if self.skip_rssi:
+					self.skip_rssi = False
+				elif self.received_ter_table.rowCount() > 0:
+					self.received_ter_table.setItem(0, 2, QTableWidgetItem(f"{rssi:.2f}"))
+					self.received_ter_table.setItem(0, 3, QTableWidgetItem(f"{snr:.2f}"))
+					self.received_ter_table.setItem(0, 4, QTableWidgetItem(f"{freq_shift:.2f}"))
+
+			elif event.kind == gt.RX_EVENT_RADIO_ERROR:
+				self.log_status(f"[ERROR] {event.line}")
+
+			elif event.kind == gt.RX_EVENT_ERROR:
+				self.log_status(f"[ERROR] {event.data}")
+
+			elif event.kind == gt.RX_EVENT_SERIAL_MODE:
+				self.serial_binary = event.data == gt.SERIAL_MODE_BINARY
+				self.log_status(f"[INFO] Serial mode: {event.data}")
+
+			elif event.kind == gt.RX_EVENT_SERIAL_BAUD:
+				# Already followed by the reader thread
+				self.log_status(f"[INFO] Serial baud rate: {event.data}")
+
+			elif event.kind == gt.RX_EVENT_RADIO_SETTINGS:
+				# The reply timeouts follow the modulation in use
+				self.link_timing.set_config(event.data)
+				self.update_link_timing_label()
+
+		# Report events lost because the queue was full
+		if self.serial_reader.dropped_events:
+			self.log_status(f"[WARN] RX queue full, {self.serial_reader.dropped_events} events dropped")
+			self.serial_reader.dropped_events = 0
+
+		# Leave the rest of the queue to the next event loop iteration to keep the GUI responsive
+		if self.serial_reader.events:
+			QTimer.singleShot(0, self.read_serial)
+
+	# Handle a failure of the serial reader thread
+	def on_serial_reader_failed(self, message):
+		self.log_status(f"[ERROR] Reading failed: {message}")
+		self.disconnect_serial()
 
 	# Send message to serial console with timestamp
 	def log_serial(self, message):
@@ -1025,13 +1379,24 @@ class MainWindow(QWidget):
 		# Format the line expected by ESP32
 		command_line = f"RADIO: {freq:.3f} {bw:.1f} {sf} {cr} {power}\n"
 
-		if self.serial_conn and self.serial_conn.isOpen():
+		if self.gsd_client is not None:
+			reply = self.gsd_client.request("radio", f=freq, bw=bw, sf=sf, cr=cr, power=power)
+			if not reply["ok"]:
+				self.log_status(f"[ERROR] Daemon refused the LoRa settings: {reply['error']}")
+				return
+			self.log_serial(f"[TX]: {command_line.strip()}")
+			self.log_status(f"[INFO] Updated LoRa settings: {freq:.3f} MHz, {bw:.1f} kHz, SF{sf}, CR{cr}, Power {power} dBm")
+		elif self.serial_conn and self.serial_conn.isOpen():
 			self.serial_conn.write(command_line.encode())
 			self.log_serial(f"[TX]: {command_line.strip()}")
 			self.log_status(f"[INFO] Updated LoRa settings: {freq:.3f} MHz, {bw:.1f} kHz, SF{sf}, CR{cr}, Power {power} dBm")
 		else:
 			self.log_status(f"[ERROR] Serial connection is not open. Cannot send command")
 
+	# Show the current reply timeout estimate
+	def update_link_timing_label(self):
+		self.link_timing_label.setText(f"Link: {self.link_timing.describe()}")
+
 	# Send message to status console with timestamp
 	def log_status(self, message):
 		timestamp = datetime.now().strftime("[%H:%M:%S]")
@@ -1050,42 +1415,43 @@ class MainWindow(QWidget):
 			f"background-color: {bg_color.name()}; color: {text_color.name()}; font-weight: bold; padding: 5px;"
 		)
 
-	# Set the last TEC status label with appropriate styles and updates sent TEC queue
-	def set_last_tec_status(self, status):
+	# Set the last TEC status label with appropriate styles and colour the row of the TEC in the sent TEC table
+	def set_last_tec_status(self, status, tec=None):
 		display_status = status.upper()
 		self.last_tec_status.setText(display_status)
 
-		# Update the status of the last TEC in self.sent_tecs
-		if self.sent_tecs:
-			# Update status of the most recent TEC (the last appended)
-			last = self.sent_tecs[-1]
-			self.sent_tecs[-1] = (last[0], last[1], display_status)
-
 		# Update the label style
 		bg_color, text_color = self.get_color_for_status(display_status)
 		self.last_tec_status.setStyleSheet(
 			f"background-color: {bg_color.name()}; color: {text_color.name()}; font-weight: bold; padding: 5px;"
 		)
 
-		# Now repaint the whole sent_tec_table, row by row, preserving each row's color based on stored status
-		for row_idx, (_, _, row_status) in enumerate(reversed(self.sent_tecs)):
-			bg, fg = self.get_color_for_status(row_status)
-			bg_transparent = QColor(bg)
-			bg_transparent.setAlpha(64)
-			for col in range(self.sent_tec_table.columnCount()):
-				item = self.sent_tec_table.item(row_idx, col)
-				if item:
-					item.setBackground(bg_transparent)
-					# item.setForeground(fg)
+		if tec is not None:
+			self.set_sent_tec_row_status(tec, display_status)
+
+	# Colour the row of a pipeline TEC, rows move when new TECs are inserted so they are found from their item
+	def set_sent_tec_row_status(self, tec, status):
+		item = self.sent_tec_items.get(tec.id)
+		row = item.row() if item is not None else -1
+		if row < 0:
+			return # row discarded from the table
+
+		bg, fg = self.get_color_for_status(status)
+		bg_transparent = QColor(bg)
+		bg_transparent.setAlpha(64)
+		for col in range(self.sent_tec_table.columnCount()):
+			cell = self.sent_tec_table.item(row, col)
+			if cell:
+				cell.setBackground(bg_transparent)
 
 	# Get the color for the status of the last TEC
 	def get_color_for_status(self, status):
 		status = status.upper()
-		if status == "NO COMMS":
+		if status == "NO COMMS" or status == "CARRIED OVER":
 			bg_color = QColor("lightgray")
 		elif status == "RECEIVED TEC":
 			bg_color = QColor(0, 176, 255)  # light blue
-		elif status.startswith("WAITING") or status == "NO REPLY":
+		elif status.startswith("WAITING") or status == "QUEUED" or status == "NO REPLY":
 			bg_color = QColor("orange")
 		elif status.startswith("ACK") or status.startswith("REPLY"):
 			bg_color = QColor("green")
@@ -1213,9 +1579,6 @@ class MainWindow(QWidget):
 
 	# Add the current packet to the TEC queue
 	def add_tec_to_queue(self):
-		self.queue_tec_button.setEnabled(False)
-		self.queue_timer.start()
-
 		tec_label = self.tec_task_selector.currentText()
 		tec_code = TEC_TASKS.get(tec_label, 0)
 		tec_name = get_task_label(TEC_TASKS, tec_code)
@@ -1259,11 +1622,13 @@ class MainWindow(QWidget):
 
 		try:
 			ecc_enabled = self.ecc_enable_radio.isChecked()
+			# Timestamp and MAC are set when the TEC is transmitted
 			packet_bytes = gt.build_packet(
 			self.gs_selector.currentText(),
 			tec_code,
 			payload,
-			ecc_enabled
+			ecc_enabled,
+			sealed=False
 			)
 			tec_hex = ' '.join(f"{b:02X}" for b in packet_bytes)
 		except Exception as e:
@@ -1275,10 +1640,6 @@ class MainWindow(QWidget):
 		self.update_tec_queue_display()
 		self.log_status(f"[INFO] Added TEC to queue")
 
-	# Throttle add to queue to ensure packet unix time is unique
-	def enable_add_to_queue_button(self):
-		self.queue_tec_button.setEnabled(True)
-
 	# Update the queue display in the table widget
 	def update_tec_queue_display(self):
 		self.queued_tec_table.setRowCount(len(self.tec_queue))
@@ -1307,112 +1668,258 @@ class MainWindow(QWidget):
 		self.update_tec_queue_display()
 		self.log_status(f"[INFO] Aborted TEC {removed_cmd[0]}")
 
-	# Execute the next TEC in the queue
+	# Execute the next TEC in the queue: it joins the TEC pipeline and leaves when a slot of the window is free
 	def execute_next_tec(self):
 		if not self.tec_queue:
 			self.log_status("[INFO] No TECs in queue")
 			return
 
-		if not self.serial_conn or not self.serial_conn.is_open:
+		if not self.link_open():
 			self.log_status("[ERROR] Not connected")
 			return
 
-		# Get the TEC details
-		tec_name = self.tec_queue[0][0]
-		tec_hex = self.tec_queue[0][1]
+		self.submit_tec(*self.tec_queue.pop(0))
+		self.update_tec_queue_display()
+		self.run_tec_pipeline()
 
-		try:
-			# Convert HEX back to bytes and send it
-			hex_bytes = bytes.fromhex(tec_hex)
-			hex_str = " ".join(f"{b:02X}" for b in hex_bytes)
-			line = f"TEC: {hex_str}\n"
-			self.serial_conn.write(line.encode('utf-8'))
+	# Execute all the TECs in the queue, in order
+	def execute_all_tecs(self):
+		if not self.tec_queue:
+			self.log_status("[INFO] No TECs in queue")
+			return
 
-			# Log TEC execution and display message on serial console
-			self.log_serial(f"[TX]: TEC: {tec_hex}")
+		if not self.link_open():
+			self.log_status("[ERROR] Not connected")
+			return
 
-			self.log_status(f"[INFO] Executed TEC {tec_name}")
+		for tec_name, tec_hex in self.tec_queue:
+			self.submit_tec(tec_name, tec_hex)
+		self.tec_queue.clear()
+		self.update_tec_queue_display()
+		self.run_tec_pipeline()
 
-			# Save task code from 3rd byte (index 2) of hex_bytes for ACK comparison
-			self.last_sent_tec = hex_bytes[2]
+	# Add a TEC to the pipeline and to the sent TEC table, the TX time is set when it is transmitted
+	def submit_tec(self, tec_name, tec_hex):
+		if self.gsd_client is not None:
+			self.submit_daemon_tec(tec_name, tec_hex)
+			return
 
-		except Exception as e:
-			self.log_status(f"[ERROR] Failed to send TEC {tec_name}: {e}")
+		tec = self.tec_pipeline.submit(tec_name, bytes.fromhex(tec_hex))
 
-		# Log sent TEC to history with "WAITING" status
-		tx_timestamp = datetime.utcnow()
-		
-		self.sent_tecs.append((tec_name, tx_timestamp, tec_hex, "WAITING"))
 		row = 0
 		self.sent_tec_table.insertRow(row)
-		self.sent_tec_table.setItem(row, 0, QTableWidgetItem(tec_name))
-		self.sent_tec_table.setItem(row, 1, QTableWidgetItem(tx_timestamp.strftime('%Y-%m-%d %H:%M:%S')))
+		name_item = QTableWidgetItem(tec_name)
+		self.sent_tec_table.setItem(row, 0, name_item)
+		self.sent_tec_table.setItem(row, 1, QTableWidgetItem(""))
 		self.sent_tec_table.setItem(row, 2, QTableWidgetItem(tec_hex))
+		self.sent_tec_items[tec.id] = name_item
+		self.set_sent_tec_row_status(tec, "QUEUED")
 
-		# Remove sent packet from queue
-		self.tec_queue.pop(0)
-		self.update_tec_queue_display()
+		self.pipeline_timer.start()
 
-		# Update last TEC status
-		self.last_tec_status_description.setText("Waiting for ACK/NACK/REPLY...")
-		self.set_last_tec_status(f"WAITING: 0 s")
-		self.last_tec_sent_time = datetime.now()
-		self.timeout_timer.start()
-		self.execute_next_tec_button.setEnabled(False) # disable until ACK/NACK/REPLY is received
+	# Queue a TEC in the daemon pipeline: it is sealed when it leaves, its progress comes back as daemon events
+	def submit_daemon_tec(self, tec_name, tec_hex):
+		try:
+			reply = self.gsd_client.request("packet", hex=tec_hex, label=tec_name, seal=True)
+		except Exception as e:
+			self.log_status(f"[ERROR] Failed to queue TEC {tec_name} on the daemon: {e}")
+			return
+		if not reply["ok"]:
+			self.log_status(f"[ERROR] Daemon refused TEC {tec_name}: {reply['error']}")
+			return
+
+		tec = DaemonTec(("gsd", reply["id"]), tec_name)
+		self.sent_tec_table.insertRow(0)
+		name_item = QTableWidgetItem(tec_name)
+		self.sent_tec_table.setItem(0, 0, name_item)
+		self.sent_tec_table.setItem(0, 1, QTableWidgetItem(""))
+		self.sent_tec_table.setItem(0, 2, QTableWidgetItem(tec_hex))
+		self.sent_tec_items[tec.id] = name_item
+		self.set_sent_tec_row_status(tec, "QUEUED")
+
+	# TEC and download events of the daemon
+	def handle_daemon_message(self, message):
+		event = message["event"]
+		if event == "tec_sent":
+			tec = DaemonTec(("gsd", message["id"]), message["label"], attempts=message["attempt"])
+			packet_bytes = bytes.fromhex(message["hex"])
+			self.log_serial(f"[TX]: TEC: {packet_bytes.hex(' ').upper()}")
+			self.log_status(f"[INFO] Executed TEC {tec.label} on the daemon" + (f" (attempt {tec.attempts})" if tec.attempts > 1 else ""))
+			self.show_tec_sent(tec, packet_bytes)
+		elif event == "tec_status":
+			self.report_tec_status(DaemonTec(("gsd", message["id"]), message["label"], message["status"], message["description"],
+											 message["attempts"], message["elapsed"]))
+		elif event.startswith("download"):
+			details = ", ".join(f"{key} {value}" for key, value in message.items() if key != "event")
+			self.log_status(f"[INFO] {event.replace('_', ' ').capitalize()}: {details}")
+
+	# Transmit a TEC of the pipeline
+	def send_tec(self, tec):
+		try:
+			if self.serial_binary:
+				self.serial_conn.write(gt.build_serial_frame(gt.SERIAL_FRAME_TEC, tec.packet_bytes))
+			else:
+				line = f"TEC: {tec.packet_bytes.hex(' ').upper()}\n"
+				self.serial_conn.write(line.encode('utf-8'))
+
+			# Log TEC execution and display message on serial console
+			self.log_serial(f"[TX]: TEC: {tec.packet_bytes.hex(' ').upper()}")
+			self.log_status(f"[INFO] Executed TEC {tec.label}" + (f" (attempt {tec.attempts})" if tec.attempts > 1 else ""))
+
+		except Exception as e:
+			self.log_status(f"[ERROR] Failed to send TEC {tec.label}: {e}")
+
+		self.show_tec_sent(tec, tec.packet_bytes)
+
+	# TX time and sealed packet of the last attempt of a TEC in its row
+	def show_tec_sent(self, tec, packet_bytes):
+		tec_hex = packet_bytes.hex(' ').upper()
+		item = self.sent_tec_items.get(tec.id)
+		if item is not None and item.row() >= 0:
+			self.sent_tec_table.setItem(item.row(), 1, QTableWidgetItem(datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')))
+			self.sent_tec_table.setItem(item.row(), 2, QTableWidgetItem(tec_hex))
+		self.set_last_tec_status("WAITING: 0 s", tec)
+
+	# Pipeline timer: expire TECs without reply, transmit while the window has free slots
+	def run_tec_pipeline(self):
+		now = time.monotonic()
+		for tec in self.tec_pipeline.check_timeouts(now):
+			self.report_tec_status(tec)
+
+		if self.serial_conn and self.serial_conn.is_open:
+			tec = self.tec_pipeline.next_to_send(now)
+			while tec is not None:
+				self.send_tec(tec)
+				tec = self.tec_pipeline.next_to_send(now)
+
+		if self.tec_pipeline.idle:
+			self.pipeline_timer.stop()
+		elif self.tec_pipeline.in_flight and self.last_tec_status.text().startswith("WAITING"):
+			# Keep the last reply on the label until the next TEC leaves
+			oldest = self.tec_pipeline.in_flight[0]
+			self.set_last_tec_status(f"WAITING: {round(now - oldest.tx_time)} s")
+			self.last_tec_status_description.setText(f"{len(self.tec_pipeline.in_flight)} TEC waiting for ACK/NACK/REPLY, "
+													 f"{len(self.tec_pipeline.queue)} queued (window {self.tec_pipeline.window})")
+
+	# Show the new status of a pipeline TEC: final reply, timeout or retry
+	def report_tec_status(self, tec):
+		self.update_link_timing_label()
+		if tec.status == gt.REPLY_WAITING:
+			self.set_last_tec_status(f"WAITING: RETRY {tec.attempts}", tec)
+			self.last_tec_status_description.setText(f"TEC {tec.label}: {tec.description}")
+			self.log_status(f"[WARN] TEC {tec.label}: {tec.description}")
+		elif tec.status == gt.REPLY_ACK:
+			self.set_last_tec_status(f"ACK in {tec.elapsed:.2f} s", tec)
+			self.last_tec_status_description.setText(f"TEC {tec.label} executed successfully")
+			self.log_status(f"[INFO] ACK of {tec.label} received after {tec.elapsed:.2f} s")
+		elif tec.status == gt.REPLY_DATA:
+			self.set_last_tec_status(f"REPLY in {tec.elapsed:.2f} s", tec)
+			self.last_tec_status_description.setText(f"TEC {tec.label} executed successfully, requested data received")
+			self.log_status(f"[INFO] REPLY of {tec.label} received after {tec.elapsed:.2f} s")
+		elif tec.status == gt.REPLY_NACK:
+			self.set_last_tec_status("NACK", tec)
+			self.last_tec_status_description.setText(f"TEC {tec.label} was not executed. ERROR: {tec.description}")
+			self.log_status(f"[WARN] NACK of {tec.label} received. Error: {tec.description}")
+		elif tec.status == gt.REPLY_TIMEOUT:
+			self.set_last_tec_status("NO REPLY", tec)
+			self.last_tec_status_description.setText(f"TEC {tec.label}: {tec.description}, check if command in blind is enabled")
+			self.log_status(f"[WARN] Timeout: TEC {tec.label} {tec.description}")
+		else:
+			self.set_last_tec_status(tec.status, tec)
+			self.last_tec_status_description.setText(f"TEC {tec.label} {tec.description}")
+			self.log_status(f"[WARN] TEC {tec.label}: {tec.status}")
+
+
+	# ========== PASS SCHEDULER ==========
+
+	# Predict the passes of the next day over the selected ground station from a TLE
+	def load_passes(self):
+		tle, ok = QInputDialog.getMultiLineText(self, "Load Passes", "TLE lines:")
+		if not ok:
+			return
+
+		lines = [l.strip() for l in tle.strip().splitlines() if l.strip()]
+		lines = [l for l in lines if l.startswith(("1 ", "2 "))]
+		if len(lines) != 2:
+			self.log_status("[ERROR] Please enter both TLE lines")
+			return
+
+		try:
+			try:
+				from . import orbit_simulator as orbit
+			except ImportError:
+				import orbit_simulator as orbit
+			from sgp4.api import Satrec
+
+			# Stations without a known position use UniPD
+			station = self.gs_selector.currentText()
+			if station not in orbit.GROUND_STATIONS:
+				station = "UniPD"
+			lat, lon, alt, min_elev = orbit.GROUND_STATIONS[station]
+			satellite = Satrec.twoline2rv(lines[0], lines[1])
+			passes = orbit.predict_passes(satellite, datetime.utcnow(), orbit.PLAN_WINDOW, lat, lon, alt, min_elev)
+		except Exception as e:
+			self.log_status(f"[ERROR] Pass prediction failed: {e}")
+			return
+
+		self.tec_scheduler.set_windows(passes)
+		self.log_status(f"[INFO] Loaded {len(passes)} passes over {station}")
+		self.run_tec_scheduler()
+
+	# Scheduler timer: release the queued TECs to the pipeline during a contact
+	def run_tec_scheduler(self):
+		self.scheduler_status.setText(self.tec_scheduler.describe())
+		if not self.scheduler_checkbox.isChecked() or self.gsd_client is not None:
+			self.tec_scheduler.stop()
+			return
+		if not self.link_open():
+			return
+
+		packets = [bytes.fromhex(tec_hex) for _, tec_hex in self.tec_queue]
+		count, carried = self.tec_scheduler.step(packets)
+
+		# TECs still waiting in the pipeline at the end of the contact go back to the head of the queue
+		if carried:
+			self.tec_queue[:0] = [(tec.label, tec.packet_bytes.hex(' ').upper()) for tec in carried]
+			for tec in carried:
+				self.set_sent_tec_row_status(tec, "CARRIED OVER")
+			self.update_tec_queue_display()
+			self.log_status(f"[INFO] Contact ended, {len(carried)} TECs carried over to the next pass")
+
+		if count:
+			for _ in range(count):
+				self.submit_tec(*self.tec_queue.pop(0))
+			self.update_tec_queue_display()
+			self.run_tec_pipeline()
 
 
 	# ========== PACKET RECEPTION HANDLING ==========
 	
 	# Handle reception of a decoded packet
-	def handle_packet_reception(self, decoded_packet, packet_bytes):
-		self.timeout_timer.stop()  # stop timeout check
-		self.execute_next_tec_button.setEnabled(True)  # re-enable next execution button
-
+	def handle_packet_reception(self, decoded_packet, packet_bytes, rx_timestamp=None):
 		# Extract fields from the decoded packet
 		status = "UNKNOWN"
-		ter = decoded_packet["ter"]
-		payload = decoded_packet["payload_bytes"]
+		ter = decoded_packet.ter
+		payload = decoded_packet.payload_bytes
 		
-		# TER is received, it is a reply to a command sent
+		# TER is received, it can be a reply to a TEC in the pipeline
 		if ter in TER_TASKS.values():
 			ter_tec_label = get_task_label(TER_TASKS, ter)
 
-			# Get the label of the last TEC sent
-			label_item = self.sent_tec_table.item(0, 0)  # Column 1: TEC label
-			tec_sent_label = label_item.text() if label_item else f"0x{ter:02X}"
-			
-			# Update ACK/NACK status of the last TEC
-			elapsed = (datetime.now() - self.last_tec_sent_time).total_seconds()
-
-			if ter == TER_ACK:
-				if payload == [self.last_sent_tec]:
-					status = f"ACK in {elapsed:.2f} s"
-					self.last_tec_status_description.setText(f"TEC {tec_sent_label} executed successfully")
-					self.log_status(f"[INFO] ACK received after {elapsed:.2f} s")
+			tec = self.tec_pipeline.on_reply(ter, payload, time.monotonic()) if self.gsd_client is None else None
+			if self.gsd_client is not None:
+				# Matched by the daemon pipeline, reported by its tec_status events
+				status = None
 
-				else:
-					status = "INVALID ACK"
-					self.last_tec_status_description.setText(f"TEC {tec_sent_label} seems to be executed, but ACK was invalid. PAYLOAD: {payload}")
-					self.log_status(f"[WARN] Malformed ACK payload {payload} received after {elapsed:.2f} s")
-
-			elif ter == TER_NACK:
-				if len(payload) == 2:
-					status = "NACK"
-					error_code = int.from_bytes([payload[1]], byteorder='big', signed=True)
-					status_msg = PACKET_ERR_DESCRIPTION.get(error_code, f"Unknown error code: {error_code}")
-
-					self.last_tec_status_description.setText(f"TEC {tec_sent_label} was not executed. ERROR: {status_msg}")
-					self.log_status(f"[WARN] NACK received. Error: {status_msg}")
-				
-				else:
-					status = "INVALID NACK"
-					self.last_tec_status_description.setText("Malformed NACK payload")
-					self.log_status("[ERROR] Malformed NACK payload")
+			elif tec is not None:
+				status = None
+				self.report_tec_status(tec)
+				self.run_tec_pipeline() # a slot of the window is free
 
-			elif ter == TER_LORA_PING:
-				status = f"REPLY in {elapsed:.2f} s"
-				self.last_tec_status_description.setText(f"TEC {tec_sent_label} executed successfully, requested data received")
-				self.log_status(f"[INFO] REPLY received after {elapsed:.2f} s")
+			elif ter in (TER_ACK, TER_NACK, TER_LORA_PING):
+				status = "UNEXPECTED TER"
+				self.last_tec_status_description.setText(f"Received {ter_tec_label} not matching any TEC waiting for reply. PAYLOAD: {payload.hex(' ').upper()}")
+				self.log_status(f"[WARN] Received {ter_tec_label} not matching any TEC waiting for reply")
 
 			else:
 				status = "UNEXPECTED TER"
@@ -1426,10 +1933,12 @@ class MainWindow(QWidget):
 			ter_tec_label = get_task_label(TEC_TASKS, tec)
 			self.last_tec_status_description.setText(f"Received TEC {ter_tec_label}")
 		
-		self.set_last_tec_status(status)
+		if status is not None:
+			self.set_last_tec_status(status)
 
 		# Add to received TERs table
-		rx_timestamp = datetime.utcnow()
+		if rx_timestamp is None:
+			rx_timestamp = datetime.utcnow()
 
 		self.received_ter_table.insertRow(0)
 		self.received_ter_table.setItem(0, 0, QTableWidgetItem(ter_tec_label))
@@ -1440,19 +1949,6 @@ class MainWindow(QWidget):
 		ter_tec_hex = ' '.join(f"{b:02X}" for b in packet_bytes)
 		self.received_ter_table.setItem(0, 5, QTableWidgetItem(ter_tec_hex))
 
-	# Check if the last TEC sent has timed out
-	def check_tec_timeout(self):
-		elapsed = (datetime.now() - self.last_tec_sent_time).total_seconds()
-		if elapsed > RX_TIMEOUT:
-			self.timeout_timer.stop()
-			self.execute_next_tec_button.setEnabled(True)  # re-enable next execution button
-			self.set_last_tec_status("NO REPLY")
-			self.last_tec_status_description.setText(f"No reply received after {RX_TIMEOUT} s, check if command in blind is enabled")
-			self.log_status(f"[WARN] Timeout: No reply received after {RX_TIMEOUT} s")
-		else:
-			self.set_last_tec_status(f"WAITING: {round(elapsed)} s")
-
-
 	# ========== PACKET VISUALIZATION ==========
 
 	# Display the content of the selected TER
@@ -1485,23 +1981,23 @@ class MainWindow(QWidget):
 			ter_label = item_label.text() if item_label else "TER error"
 
 			try:
-				packet_bytes = [int(byte, 16) for byte in ter_hex.split()]
-				ter_decoded = gt.decode_packet(packet_bytes)
+				ter_decoded = gt.decode_packet(bytes.fromhex(ter_hex))
 			except Exception as e:
 				self.ter_content_display.append(f"[Error decoding TER: {e}]")
+				continue
 
 
 			# Adding source and ECC status
-			source_label = next((name for name, code in TX_SOURCES.items() if code == ter_decoded['station_id']), f"Unknown {ter_decoded['station_id']}")
-			ecc_label = "Enabled" if ter_decoded['ecc_enabled'] else "Disabled"
+			source_label = gt.get_gs_label(ter_decoded.station_id)
+			ecc_label = "Enabled" if ter_decoded.ecc_enabled else "Disabled"
 			html += f'<tr><td class="label" colspan="2">Source</td><td class="value"  colspan="2">{source_label}</td><td class="label" colspan="2">ECC</td><td class="value"  colspan="2">{ecc_label}</td></tr>'
 
 			# Adding TER and Payload Length
-			html += f'<tr><td class="label" colspan="2">TER</td><td class="value"  colspan="2">{ter_label}</td><td class="label" colspan="2">PL_LEN</td><td class="value"  colspan="2">{ter_decoded["payload_length"]}</td></tr>'
+			html += f'<tr><td class="label" colspan="2">TER</td><td class="value"  colspan="2">{ter_label}</td><td class="label" colspan="2">PL_LEN</td><td class="value"  colspan="2">{ter_decoded.payload_length}</td></tr>'
 
 			# Adding timestamps
 			rx_timestamp = self.received_ter_table.item(row, 1)
-			tx_timestamp = ter_decoded['timestamp']
+			tx_timestamp = ter_decoded.timestamp
 
 			if rx_timestamp and rx_timestamp.text():
 				rx_time_label = rx_timestamp.text()
@@ -1514,7 +2010,7 @@ class MainWindow(QWidget):
 				html += f'<tr><td class="label"  colspan="2">GS_time</td><td class="value" colspan="2">{rx_time_label}</td><td class="label"  colspan="2">TX_time</td><td class="value" colspan="2">{tx_time_label}</td></tr>'
 
 			# Adding MAC informations
-			html += f'<tr><td class="label" colspan="2">MAC</td><td class="value" colspan="6">{ter_decoded["mac"]}</td></tr>'
+			html += f'<tr><td class="label" colspan="2">MAC</td><td class="value" colspan="6">{ter_decoded.mac}</td></tr>'
 
 			# Adding HEX representation
 			html += f'<tr><td class="label" colspan="2">HEX</td><td class="value" colspan="6">{ter_hex}</td></tr>'
@@ -1531,13 +2027,10 @@ class MainWindow(QWidget):
 
 			try:
 				html += f'<tr><td class="label" colspan="8" style="text-align:center;">--- PAYLOAD DECODING ---</td></tr>'
-				packet_bytes = [int(byte, 16) for byte in ter_hex.split()]
-				ter_decoded = gt.decode_packet(packet_bytes)
-
 				# Display payload information
 				html += f'<tr><td class="label" colspan="2">PAYLOAD</td><td class="value" colspan="6">{ter_hex[PACKET_HEADER_LENGTH * 3:]}</td></tr>'
-				ter = ter_decoded['ter']
-				payload_bytes = ter_decoded['payload_bytes']
+				ter = ter_decoded.ter
+				payload_bytes = ter_decoded.payload_bytes
 
 				# Display TER-specific payload decoding
 				if ter == TER_BEACON:
@@ -1552,7 +2045,7 @@ class MainWindow(QWidget):
 				elif ter == TER_NACK:
 					if len(payload_bytes) == 2:
 						tec_requested = payload_bytes[0]
-						error_code = int.from_bytes([payload_bytes[1]], byteorder='big', signed=True)
+						error_code = gt.extract_nack(payload_bytes)["error_code"]
 						error_msg = PACKET_ERR_DESCRIPTION.get(error_code, f"Unknown error code: {error_code}")
 
 						html += f'<tr><td class="label" colspan="2">TEC not executed</td><td class="label" colspan="6">{tec_requested:02X}</td></tr>'
@@ -1562,12 +2055,8 @@ class MainWindow(QWidget):
 						html += f'<tr><td class="label" colspan="2">Error</td><td class="label" colspan="6">Malformed NACK payload</td></tr>'
 
 				elif ter == TER_LORA_PING:
-					rssi_bytes = bytes(payload_bytes[0:4])
-					rssi = struct.unpack(">f", rssi_bytes)[0]
-					snr_bytes = bytes(payload_bytes[4:8])
-					snr = struct.unpack(">f", snr_bytes)[0]
-					freq_shift_bytes = bytes(payload_bytes[8:12])
-					freq_shift = struct.unpack(">f", freq_shift_bytes)[0]
+					pong = gt.extract_lora_pong(payload_bytes)
+					rssi, snr, freq_shift = pong["rssi"], pong["snr"], pong["deltaf"]
 
 					html += f'<tr><td class="label" colspan="1">RSSI</td><td class="value" colspan="1">{rssi:.2f} dBm</td><td class="label" colspan="1">SNR</td><td class="value" colspan="2">{snr:.2f} dB</td><td class="label" colspan="1">DELTAF</td><td class="value" colspan="2">{freq_shift:.2f} Hz</td></tr>'
 
@@ -1589,10 +2078,18 @@ class MainWindow(QWidget):
 		# Check if the tables are empty or export to db
 		if (self.received_ter_table.rowCount() == 0 and  type == "received") or (self.sent_tec_table.rowCount() == 0 and type == "sent"):
 			self.log_status("[INFO] No packets to export")
-		elif type == "sent":
-			export_table_to_db(self.sent_tec_table)
-		elif type == "received":
-			export_table_to_db(self.received_ter_table)
+		else:
+			table = self.sent_tec_table if type == "sent" else self.received_ter_table
+			try:
+				ids, errors = export_table_to_db(table)
+			except Exception as e:
+				self.log_status(f"[ERROR] Export to DB failed: {e}")
+				return
+
+			saved = sum(1 for packet_id in ids if packet_id is not None)
+			self.log_status(f"[INFO] {saved} packets exported to DB")
+			for row, error in errors:
+				self.log_status(f"[ERROR] Packet {row + 1} not exported: {error}")
 
 	# Enable or disable the database buttons based on the DB_ENABLE flag
 	def DB_button_enable(self):
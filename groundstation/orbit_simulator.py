@@ -13,6 +13,8 @@ from matplotlib.figure import Figure
 from PyQt5.QtGui import QPalette, QColor
 from PyQt5.QtCore import Qt
 from matplotlib.animation import FuncAnimation
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
 
 # line1 = "1 25544U 98067A   20300.83097691  .00001534  00000-0  35580-4 0  9996"
 # line2 = "2 25544  51.6453  57.0843 0001671  64.9808  73.0513 15.49338189252428"
@@ -34,6 +36,23 @@ minimum_elevation_angle = 10 # Minimum elevation angle in degrees
 contact_time = []
 end_contact_time = []
 
+# Passes predicted by the last simulation (list of SatellitePass)
+predicted_passes = []
+
+# Pass prediction parameters
+PASS_COARSE_STEP = 60.0 # [s] step of the coarse elevation scan
+PASS_TOLERANCE = 0.1 # [s] time tolerance of AOS, TCA and LOS refinement
+
+# Contact planning parameters
+PLAN_WINDOW = 86400.0 # [s] time span of a single planning job
+PLAN_MARGIN = 1800.0 # [s] overlap between planning jobs, longer than any LEO pass
+
+# Ground stations for contact planning: label (as in GS_task.TX_SOURCES) -> (lat [deg], lon [deg], alt [km], min elevation [deg])
+# The Mobile station has no fixed position, add it with the coordinates of the campaign
+GROUND_STATIONS = {
+    "UniPD": (gs_lats, gs_lons, gs_altitude / 1000.0, minimum_elevation_angle),
+}
+
 # Check flag for first simulation
 simulation_flag = True
 
@@ -110,6 +129,239 @@ def latlonalt_to_ecef(lat, lon, alt):
 
     return np.array([x, y, z])
 
+# Function to rotate ECI coordinates to ECEF coordinates (works on arrays of positions)
+def eci_to_ecef(r_eci, gmst):
+    """Rotate ECI coordinates (3, N) to ECEF coordinates (3, N) - r_eci - gmst"""
+
+    x_eci, y_eci, z_eci = r_eci
+    cos_gmst = np.cos(gmst)
+    sin_gmst = np.sin(gmst)
+    x_ecef = x_eci * cos_gmst + y_eci * sin_gmst
+    y_ecef = -x_eci * sin_gmst + y_eci * cos_gmst
+    return np.array([x_ecef, y_ecef, z_eci])
+
+# Function to compute azimuth and elevation for arrays of satellite positions
+def look_angles(sat_ecef, gs_lat, gs_lon, gs_alt):
+    """Azimuth and elevation in degrees of ECEF positions (3, N) seen from a ground station - sat_ecef, gs_lat, gs_lon, gs_alt"""
+
+    # Distance vectors from ground station to satellite in ECEF coordinates
+    gs_ecef = latlonalt_to_ecef(gs_lat, gs_lon, gs_alt)
+    rho_x = sat_ecef[0] - gs_ecef[0]
+    rho_y = sat_ecef[1] - gs_ecef[1]
+    rho_z = sat_ecef[2] - gs_ecef[2]
+
+    # From ECEF to ENU
+    lat_rad = np.radians(gs_lat)
+    lon_rad = np.radians(gs_lon)
+    east = -np.sin(lon_rad)*rho_x + np.cos(lon_rad)*rho_y
+    north = -np.sin(lat_rad)*np.cos(lon_rad)*rho_x - np.sin(lat_rad)*np.sin(lon_rad)*rho_y + np.cos(lat_rad)*rho_z
+    up = np.cos(lat_rad)*np.cos(lon_rad)*rho_x + np.cos(lat_rad)*np.sin(lon_rad)*rho_y + np.sin(lat_rad)*rho_z
+
+    # Azimuth from north, clockwise
+    rho_norm = np.sqrt(rho_x**2 + rho_y**2 + rho_z**2)
+    azimuth = np.degrees(np.arctan2(east, north)) % 360.0
+    elevation = np.degrees(np.arcsin(up / rho_norm))
+    return azimuth, elevation
+
+# Function to propagate a satellite on arrays of Julian dates
+def propagate_track(satellite, jd, fr, gs_lat, gs_lon, gs_alt):
+    """Propagate with SGP4 on arrays of Julian dates and return a dictionary of arrays - satellite, jd, fr, gs_lat, gs_lon, gs_alt
+    (valid, lat, lon, alt, vel, azim, elev): entries where SGP4 failed are flagged in valid and set to NaN"""
+
+    # e is the error code array, r and v are (N, 3) position and velocity arrays in ECI coordinates
+    e, r, v = satellite.sgp4_array(np.asarray(jd, dtype=float), np.asarray(fr, dtype=float))
+    valid = e == 0
+
+    # Convert ECI coordinates to ECEF, latitude and longitude as whole-array operations
+    gmst = gmst_from_jd(jd + fr)
+    sat_ecef = eci_to_ecef(r.T, gmst)
+    r_norm = np.linalg.norm(r, axis=1)
+    lat = np.degrees(np.arcsin(sat_ecef[2] / r_norm))
+    lon = np.degrees(np.arctan2(sat_ecef[1], sat_ecef[0]))
+    azim, elev = look_angles(sat_ecef, gs_lat, gs_lon, gs_alt)
+
+    return {
+        "valid": valid,
+        "lat": lat,
+        "lon": lon,
+        "alt": r_norm - R_EARTH,
+        "vel": np.linalg.norm(v, axis=1),
+        "azim": azim,
+        "elev": elev
+    }
+
+# ============ PASS PREDICTION ============
+
+# Azimuth and elevation of the satellite at a given time
+class PassEvent(NamedTuple):
+    time: datetime
+    azimuth: float
+    elevation: float
+
+# Contact window: acquisition of signal, time of closest approach (max elevation) and loss of signal
+class SatellitePass(NamedTuple):
+    aos: PassEvent
+    tca: PassEvent
+    los: PassEvent
+
+    @property
+    def duration(self):
+        return (self.los.time - self.aos.time).total_seconds()
+
+# Find the time where func crosses zero between lo and hi (func(lo) and func(hi) have opposite signs)
+def find_crossing(func, lo, hi, tolerance=PASS_TOLERANCE):
+    """Bisection root finder on a bracketed sign change - func, lo, hi, tolerance"""
+
+    f_lo = func(lo)
+    while hi - lo > tolerance:
+        mid = 0.5 * (lo + hi)
+        f_mid = func(mid)
+        if (f_mid >= 0) == (f_lo >= 0):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+    return 0.5 * (lo + hi)
+
+# Find the time of the maximum of a unimodal function between lo and hi
+def find_maximum(func, lo, hi, tolerance=PASS_TOLERANCE):
+    """Golden-section search of the maximum - func, lo, hi, tolerance"""
+
+    inv_phi = (np.sqrt(5.0) - 1.0) / 2.0
+    c = hi - inv_phi * (hi - lo)
+    d = lo + inv_phi * (hi - lo)
+    f_c, f_d = func(c), func(d)
+    while hi - lo > tolerance:
+        if f_c > f_d:
+            hi, d, f_d = d, c, f_c
+            c = hi - inv_phi * (hi - lo)
+            f_c = func(c)
+        else:
+            lo, c, f_c = c, d, f_d
+            d = lo + inv_phi * (hi - lo)
+            f_d = func(d)
+    return 0.5 * (lo + hi)
+
+# Predict the passes of a satellite over a ground station
+def predict_passes(satellite, start_time, duration, gs_lat, gs_lon, gs_alt, min_elev, coarse_step=PASS_COARSE_STEP, tolerance=PASS_TOLERANCE):
+    """Return the list of SatellitePass in [start_time, start_time + duration] - satellite, start_time (UTC datetime), duration [s], gs_lat, gs_lon, gs_alt [km], min_elev [deg]
+    Passes already in progress at the start or still in progress at the end are clipped to the window bounds"""
+
+    jd0, fr0 = jday(start_time.year, start_time.month, start_time.day, start_time.hour, start_time.minute, start_time.second + start_time.microsecond*1e-6)
+
+    # Azimuth and elevation at offsets [s] from start_time
+    def look(offsets):
+        offsets = np.atleast_1d(np.asarray(offsets, dtype=float))
+        e, r, v = satellite.sgp4_array(np.full(offsets.shape, jd0), fr0 + offsets / 86400.0)
+        sat_ecef = eci_to_ecef(r.T, gmst_from_jd(jd0 + fr0 + offsets / 86400.0))
+        azim, elev = look_angles(sat_ecef, gs_lat, gs_lon, gs_alt)
+        elev[e != 0] = -90.0 # SGP4 failure counts as not visible
+        return azim, elev
+
+    def elevation_margin(offset):
+        return look(offset)[1][0] - min_elev
+
+    def event(offset):
+        azim, elev = look(offset)
+        return PassEvent(start_time + timedelta(seconds=float(offset)), float(azim[0]), float(elev[0]))
+
+    # Coarse scan of the elevation
+    offsets = np.arange(0.0, duration, coarse_step)
+    offsets = np.append(offsets, float(duration))
+    elev = look(offsets)[1]
+    margin = elev - min_elev
+    n = len(offsets)
+    if n < 2:
+        return []
+
+    # Local maxima of the coarse scan (window edges included): each pass has one,
+    # also a pass shorter than the coarse step shows up as a maximum below the threshold
+    is_peak = np.ones(n, dtype=bool)
+    is_peak[1:] &= elev[1:] >= elev[:-1]
+    is_peak[:-1] &= elev[:-1] > elev[1:]
+    peaks = np.flatnonzero(is_peak)
+
+    passes = []
+    for i in peaks:
+        # Refine the time of closest approach around the coarse maximum
+        lo = offsets[max(i - 1, 0)]
+        hi = offsets[min(i + 1, n - 1)]
+        t_tca = find_maximum(elevation_margin, lo, hi, tolerance)
+        if elevation_margin(t_tca) < 0:
+            continue
+
+        # AOS: bracket between the last coarse step below the threshold and the TCA
+        below = np.flatnonzero((margin[:i] < 0) & (offsets[:i] < t_tca))
+        if below.size:
+            t_aos = find_crossing(elevation_margin, offsets[below[-1]], t_tca, tolerance)
+        else:
+            t_aos = 0.0
+
+        # LOS: bracket between the TCA and the first coarse step below the threshold
+        below = np.flatnonzero((margin[i + 1:] < 0) & (offsets[i + 1:] > t_tca))
+        if below.size:
+            t_los = find_crossing(elevation_margin, t_tca, offsets[i + 1 + below[0]], tolerance)
+        else:
+            t_los = float(duration)
+
+        # Skip a maximum already covered by the previous pass
+        if passes and t_aos <= (passes[-1].los.time - start_time).total_seconds():
+            continue
+
+        passes.append(SatellitePass(event(t_aos), event(t_tca), event(t_los)))
+
+    return passes
+
+# ============ CONTACT PLANNING ============
+
+# Contact of a satellite with a ground station
+class PlannedContact(NamedTuple):
+    satellite: str
+    station: str
+    window: SatellitePass
+
+# Run a single planning job (satellite x station x time window), executed in a worker process
+def plan_contacts_job(job):
+    """Predict the passes of one job and return them as PlannedContact - job: (satellite, tle_line1, tle_line2, station, station_params, core_start, core_end)"""
+
+    sat_name, tle_line1, tle_line2, station, (lat, lon, alt, min_elev), core_start, core_end = job
+    satellite = Satrec.twoline2rv(tle_line1, tle_line2)
+
+    # Predict on a window extended by PLAN_MARGIN and keep the passes whose TCA is in the core window,
+    # so a pass across two jobs is found complete and only once
+    start = core_start - timedelta(seconds=PLAN_MARGIN)
+    duration = (core_end - core_start).total_seconds() + 2 * PLAN_MARGIN
+    passes = predict_passes(satellite, start, duration, lat, lon, alt, min_elev)
+
+    return [PlannedContact(sat_name, station, p) for p in passes if core_start <= p.tca.time < core_end]
+
+# Plan the contacts of several satellites with several ground stations
+def plan_contacts(satellites, stations, start_time, duration, window=PLAN_WINDOW, max_workers=None):
+    """Return the contact schedule sorted by AOS - satellites: {name: (line1, line2)}, stations: {label: (lat, lon, alt [km], min_elev)},
+    start_time (UTC datetime), duration [s], window [s] of each job, max_workers of the process pool (1 runs in this process)"""
+
+    # One job for each satellite, station and time window
+    jobs = []
+    for sat_name, (tle_line1, tle_line2) in satellites.items():
+        for station, station_params in stations.items():
+            offset = 0.0
+            while offset < duration:
+                core_start = start_time + timedelta(seconds=offset)
+                core_end = start_time + timedelta(seconds=min(offset + window, duration))
+                jobs.append((sat_name, tle_line1, tle_line2, station, tuple(station_params), core_start, core_end))
+                offset += window
+
+    if max_workers == 1:
+        results = map(plan_contacts_job, jobs)
+        schedule = [contact for contacts in results for contact in contacts]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(plan_contacts_job, jobs)
+            schedule = [contact for contacts in results for contact in contacts]
+
+    # Merge everything in one schedule
+    schedule.sort(key=lambda contact: (contact.window.aos.time, contact.station, contact.satellite))
+    return schedule
+
 # Function to calculate the 3D distance between two points given their latitude, longitude, and altitude
 def distance_3d(lat1, lon1, alt1, lat2, lon2, alt2):
     """Calculate the 3D distance between two points given their latitude, longitude, and altitude - lat1, lon1, alt1, lat2, lon2, alt2"""
@@ -881,71 +1133,36 @@ class SatelliteSimApp(QMainWindow):
         global simulation_flag
         satellite = Satrec.twoline2rv(line1, line2)
 
-        in_contact = False  # No contact at the beginning
-
         # Get the epoch time from the TLE
         jd0, fr0 = satellite.jdsatepoch, satellite.jdsatepochF
 
         # Calculate the epoch datetime
         epoch_datetime = datetime(2000, 1, 1, 12) + timedelta(days=(jd0 + fr0 - 2451545.0))
-        start_time = epoch_datetime
 
+        # Time steps as offsets in seconds from the epoch
         if one_second_time_step:
-            time_steps = [start_time + timedelta(seconds=i) for i in range(0, MINUTES*60)]
+            offsets = np.arange(0, MINUTES*60, dtype=float)
         else:
-            time_steps = [start_time + timedelta(minutes=i) for i in range(0, MINUTES)]
-
-        latitudes = []
-        longitudes = []
-        altitudes = []
-        velocities_module = []
-        #conta = 0
-
-        for t in time_steps:
-            jd, fr = jday(t.year, t.month, t.day, t.hour, t.minute, t.second + t.microsecond*1e-6)
-            # e is the error code, r is the position vector in ECI coordinates, v is the velocity vector in ECI coordinates
-            e, r, v = satellite.sgp4(jd, fr) # Computing trajectory using SGP4 model
-            if e == 0:
-
-                # Convert ECI coordinates to latitude and longitude
-                gmst = gmst_from_jd(jd + fr)
-                lat, lon = eci_to_latlon(r, gmst)
-                latitudes.append(lat)
-                longitudes.append(lon)
-                altitudes.append(np.linalg.norm(r) - R_EARTH)
-                velocities_module.append(np.linalg.norm(v))
-                # Convert the satellite position in ECEF coordinates 
-                x_eci, y_eci, z_eci = r
-                x_ecef = x_eci * np.cos(gmst) + y_eci * np.sin(gmst)
-                y_ecef = -x_eci * np.sin(gmst) + y_eci * np.cos(gmst)
-                z_ecef = z_eci
-                sat_ecef = np.array([x_ecef, y_ecef, z_ecef])
-
-                # Computing the elevation angle 
-                elev = elevation_angle(sat_ecef, gs_lat, gs_lon, gs_alt)
-
-                # Verify the elevation angle with the minimum elevation angle setted by user
-                if elev >= min_elev and not in_contact:
-                    contact_time.append(t)
-                    in_contact = True
-                elif elev < min_elev and in_contact:
-                    end_contact_time.append(t)
-                    in_contact = False
-
-            #     # Calculate the distance from the ground station and ck if it's within range
-            #     distance = distance_3d(lat, lon, np.linalg.norm(r) - R_EARTH, gs_lats, gs_lons, 0)
-            #     if distance <= gs_range and ver == True:
-            #         print("CONNECTION: " + str(conta))
-            #         print(f"GS in range at {t} UTC")
-            #         ver = False
-            #         conta += 1
-            #     elif distance > gs_range and ver == False: 
-            #         print(f"GS out of range at {t} UTC")
-            #         ver = True
-            # else:
-            #     latitudes.append(np.nan)
-            #     longitudes.append(np.nan)
-            #     altitudes.append(np.nan)
+            offsets = np.arange(0, MINUTES, dtype=float) * 60.0
+
+        # Propagate the whole time span in one batch
+        jd = np.full(offsets.shape, jd0)
+        fr = fr0 + offsets / 86400.0
+        track = propagate_track(satellite, jd, fr, gs_lat, gs_lon, gs_alt)
+
+        # Keep only the steps where SGP4 succeeded
+        valid = track["valid"]
+        time_steps = np.datetime64(epoch_datetime, 'us') + (offsets[valid] * 1e6).astype('timedelta64[us]')
+        latitudes = track["lat"][valid]
+        longitudes = track["lon"][valid]
+        altitudes = track["alt"][valid]
+        velocities_module = track["vel"][valid]
+
+        # Contact windows from the pass predictor (AOS/LOS refined to PASS_TOLERANCE)
+        predicted_passes.clear()
+        predicted_passes.extend(predict_passes(satellite, epoch_datetime, offsets[-1], gs_lat, gs_lon, gs_alt, min_elev))
+        contact_time.extend(p.aos.time for p in predicted_passes)
+        end_contact_time.extend(p.los.time for p in predicted_passes)
 
         simulation_flag = False # Set the flag to false after the first simulation
 
@@ -1103,7 +1320,7 @@ class SatelliteSimApp(QMainWindow):
         simulation_vector = self.simulate_satellite(lat, lon, alt, min_elev, True, True, True, True)
 
         # Check if the TLE are not too old
-        if datetime.utcnow() > max(simulation_vector[2]):
+        if np.datetime64(datetime.utcnow(), 'us') > simulation_vector[2][-1]:
             self.show_error("Please update TLE lines(to old)")
             return
         
@@ -1129,8 +1346,8 @@ class SatelliteSimApp(QMainWindow):
         self.error_label.setVisible(False)
         
         # Find the index of the closest time to now
-        idx = np.argmin([abs((t - now).total_seconds()) for t in time_temp])
-        delta_t = (time_temp[idx+1] - time_temp[idx]).total_seconds()
+        idx = np.argmin(np.abs(time_temp - np.datetime64(now, 'us')))
+        delta_t = (time_temp[idx+1] - time_temp[idx]) / np.timedelta64(1, 's')
         sat_lat = lats_temp[idx]
         sat_lon = lons_temp[idx]
         sat_velocity = velocities_module[idx]
@@ -0,0 +1,384 @@
+"""
+TEC/TER payload codec
+
+Every TEC and TER with a payload declares its fields once: struct words, bit fields, offsets, scales
+and labels. Encoding and decoding are generated from that declaration with a precompiled
+struct.Struct and work on plain dicts, without Qt, so the GUI, the daemon and scripts share them.
+decode_array decodes a numpy array of same-type payloads column by column, for bulk re-decoding
+of the HEX saved in the database.
+
+	payload = encode_payload(TEC_LORA_CONFIG, {"frequency_mhz": 436.0, "bandwidth_khz": 125.0, "sf": 10, "cr": 5,
+												"TX_power_dbm": 10, "duration": 60})
+	decode_payload(TEC_LORA_CONFIG, payload) -> {"frequency_mhz": 436.0, "bandwidth_khz": 125.0, ...}
+"""
+
+import struct
+import numpy as np
+
+# ========== CONSTANTS AND CONFIGURATION ==========
+
+# Task codes with a payload (same values as GS_task)
+TEC_EXIT_STATE = 0x02
+TEC_VAR_CHANGE = 0x03
+TEC_SET_TIME = 0x04
+TEC_ADCS_TLE = 0x11
+TEC_LORA_STATE = 0x18
+TEC_LORA_CONFIG = 0x19
+TEC_CRY_EXP = 0x80
+TER_ACK = 0x31
+TER_NACK = 0x32
+TER_LORA_PONG = 0x33 # TER_LORA_PING in GS_task
+
+PACKET_HEADER_LENGTH = 12 # [bytes] header before the payload
+
+# Struct format characters and their big-endian numpy types, "u24" is a 3 bytes unsigned integer
+WORD_FORMATS = {
+	"B": (1, ">u1"),
+	"b": (1, ">i1"),
+	"H": (2, ">u2"),
+	"h": (2, ">i2"),
+	"u24": (3, None),
+	"I": (4, ">u4"),
+	"i": (4, ">i4"),
+	"f": (4, ">f4"),
+	"d": (8, ">f8"),
+}
+
+# ========== FIELD DEFINITIONS ==========
+
+# Value stored in some bits of a word
+class Bits:
+	"""Bit field: name - shift - width [bits] - offset (stored = value - offset) - scale (stored = value * scale)
+	labels: {label: stored value} for enumerations - repeat: copies of the value side by side, checked on decode"""
+
+	__slots__ = ("name", "shift", "width", "offset", "scale", "labels", "codes", "repeat", "copy_width", "copy_mask", "mask")
+
+	def __init__(self, name, shift, width, offset=0, scale=1, labels=None, repeat=1):
+		self.name = name
+		self.shift = shift
+		self.width = width
+		self.offset = offset
+		self.scale = scale
+		self.labels = labels
+		self.codes = {stored: label for label, stored in labels.items()} if labels else None
+		self.repeat = repeat
+		self.copy_width = width // repeat
+		self.copy_mask = (1 << self.copy_width) - 1
+		self.mask = (1 << width) - 1
+
+	# Value to stored bits, not shifted
+	def to_raw(self, value):
+		if self.labels is not None:
+			if value not in self.labels:
+				raise ValueError(f"Invalid {self.name}: {value!r} (valid: {', '.join(map(str, self.labels))})")
+			stored = self.labels[value]
+		else:
+			stored = round(value * self.scale) - self.offset
+
+		if not 0 <= stored <= self.copy_mask:
+			raise ValueError(f"{self.name} out of range: {value}")
+
+		raw = 0
+		for copy in range(self.repeat):
+			raw |= stored << (copy * self.copy_width)
+		return raw
+
+	# Stored bits (not shifted) to value
+	def from_raw(self, raw):
+		stored = raw & self.copy_mask
+		for copy in range(1, self.repeat):
+			if (raw >> (copy * self.copy_width)) & self.copy_mask != stored:
+				raise ValueError(f"{self.name} copies do not match: {raw:#x}")
+
+		if self.codes is not None:
+			return self.codes.get(stored, stored)
+		value = stored + self.offset
+		return value / self.scale if self.scale != 1 else value
+
+	# Vectorized from_raw on an integer array
+	def from_raw_array(self, raw):
+		stored = raw & self.copy_mask
+		for copy in range(1, self.repeat):
+			if np.any((raw >> (copy * self.copy_width)) & self.copy_mask != stored):
+				raise ValueError(f"{self.name} copies do not match")
+
+		if self.codes is not None:
+			lookup = [self.codes.get(code, code) for code in range(self.copy_mask + 1)]
+			numeric = all(isinstance(label, (int, float)) for label in lookup)
+			lookup = np.array(lookup, dtype=np.float64 if numeric else object)
+			return lookup[stored]
+		value = stored.astype(np.int64) + self.offset
+		return value / self.scale if self.scale != 1 else value
+
+# Word of the payload holding one or more bit fields
+class Word:
+	__slots__ = ("fmt", "bits", "size")
+
+	def __init__(self, fmt, *bits):
+		self.fmt = fmt
+		self.bits = bits
+		self.size = WORD_FORMATS[fmt][0]
+
+	@property
+	def struct_fmt(self):
+		return "3s" if self.fmt == "u24" else self.fmt
+
+	def pack(self, values):
+		raw = 0
+		for field in self.bits:
+			raw |= field.to_raw(values[field.name]) << field.shift
+		return raw.to_bytes(3, byteorder='big') if self.fmt == "u24" else raw
+
+	def unpack(self, raw, out):
+		if self.fmt == "u24":
+			raw = int.from_bytes(raw, byteorder='big')
+		for field in self.bits:
+			out[field.name] = field.from_raw((raw >> field.shift) & field.mask)
+
+	def unpack_array(self, column, out):
+		raw = column_to_ints(column, self.fmt)
+		for field in self.bits:
+			out[field.name] = field.from_raw_array((raw >> field.shift) & field.mask)
+
+# Word of the payload holding a single value (int or float)
+class Field:
+	__slots__ = ("name", "fmt", "bits", "size")
+
+	def __init__(self, name, fmt, offset=0, scale=1, labels=None):
+		self.name = name
+		self.fmt = fmt
+		self.size = WORD_FORMATS[fmt][0]
+		self.bits = Bits(name, 0, self.size * 8, offset, scale, labels) if fmt not in ("f", "d") else None
+
+	@property
+	def struct_fmt(self):
+		return "3s" if self.fmt == "u24" else self.fmt
+
+	def pack(self, values):
+		value = values[self.name]
+		if self.bits is None:
+			return float(value)
+		if self.fmt in ("b", "h", "i"):
+			return int(value) # signed words: range checked by struct
+		raw = self.bits.to_raw(value)
+		return raw.to_bytes(3, byteorder='big') if self.fmt == "u24" else raw
+
+	def unpack(self, raw, out):
+		if self.bits is None or self.fmt in ("b", "h", "i"):
+			out[self.name] = raw
+		elif self.fmt == "u24":
+			out[self.name] = self.bits.from_raw(int.from_bytes(raw, byteorder='big'))
+		else:
+			out[self.name] = self.bits.from_raw(raw)
+
+	def unpack_array(self, column, out):
+		if self.bits is None or self.fmt in ("b", "h", "i"):
+			with np.errstate(invalid="ignore"): # NaN payloads stay NaN
+				out[self.name] = column.view(WORD_FORMATS[self.fmt][1])[:, 0].astype(np.float64 if self.bits is None else np.int64)
+		else:
+			out[self.name] = self.bits.from_raw_array(column_to_ints(column, self.fmt))
+
+# Big-endian unsigned integers from the byte columns of a word
+def column_to_ints(column, fmt):
+	raw = np.zeros(column.shape[0], dtype=np.int64)
+	for i in range(column.shape[1]):
+		raw = (raw << 8) | column[:, i]
+	return raw
+
+# ========== CODEC ==========
+
+class PayloadCodec:
+	"""Payload layout of a TEC or TER: code - name - words (Field or Word), in payload order"""
+
+	def __init__(self, code, name, *words):
+		self.code = code
+		self.name = name
+		self.words = words
+		self.struct = struct.Struct(">" + "".join(word.struct_fmt for word in words))
+		self.size = self.struct.size
+		self.fields = tuple(field.name for word in words for field in (word.bits if isinstance(word, Word) else (word,)))
+
+	# Plain dict to payload bytes
+	def encode(self, values):
+		missing = [name for name in self.fields if name not in values]
+		if missing:
+			raise ValueError(f"{self.name}: missing fields {', '.join(missing)}")
+		try:
+			return self.struct.pack(*(word.pack(values) for word in self.words))
+		except struct.error as e:
+			raise ValueError(f"{self.name}: {e}")
+
+	# Payload bytes (bytes, bytearray, memoryview or list of ints) to plain dict
+	def decode(self, payload, offset=0):
+		if not isinstance(payload, (bytes, bytearray, memoryview)):
+			payload = bytes(payload)
+		if len(payload) - offset < self.size:
+			raise ValueError(f"{self.name}: payload too short ({len(payload) - offset} < {self.size} bytes)")
+
+		out = {}
+		for word, raw in zip(self.words, self.struct.unpack_from(payload, offset)):
+			word.unpack(raw, out)
+		return out
+
+	# Payloads of the same type as a uint8 array (n, size) to a dict of arrays
+	def decode_array(self, payloads):
+		payloads = np.asarray(payloads, dtype=np.uint8)
+		if payloads.ndim != 2 or payloads.shape[1] < self.size:
+			raise ValueError(f"{self.name}: expected an array of shape (n, {self.size})")
+
+		out = {}
+		offset = 0
+		for word in self.words:
+			word.unpack_array(np.ascontiguousarray(payloads[:, offset:offset + word.size]), out)
+			offset += word.size
+		return out
+
+# Registry: task code -> PayloadCodec
+PAYLOAD_CODECS = {}
+
+def register_codec(code, name, *words):
+	codec = PayloadCodec(code, name, *words)
+	PAYLOAD_CODECS[code] = codec
+	return codec
+
+# ========== PAYLOAD DEFINITIONS ==========
+
+# HOUSEKEEPING TEC
+register_codec(TEC_EXIT_STATE, "Exit state",
+	Word("B", Bits("from_state", 4, 4), Bits("to_state", 0, 4)))
+
+register_codec(TEC_VAR_CHANGE, "Variable change",
+	Field("address", "B"),
+	Field("value", "B"))
+
+register_codec(TEC_SET_TIME, "Set clock",
+	Field("unix_time", "I"))
+
+register_codec(TEC_ADCS_TLE, "TLE update",
+	Field("epoch_year", "H"),
+	Field("epoch_day", "f"),
+	Field("mm_dot", "f"),
+	Field("mm_ddot", "f"),
+	Field("bstar", "f"),
+	Field("inclination", "f"),
+	Field("raan", "f"),
+	Field("eccentricity", "f"),
+	Field("arg_perigee", "f"),
+	Field("mean_anomaly", "f"),
+	Field("mean_motion", "f"),
+	Field("rev_number", "I"))
+
+register_codec(TEC_LORA_STATE, "LoRa state",
+	Word("B", Bits("tx_state", 0, 8, labels={"Off": 0x00, "On": 0x01, "Beacon off": 0x02}, repeat=2)),
+	Field("duration", "u24"))
+
+register_codec(TEC_LORA_CONFIG, "LoRa config",
+	Field("frequency_mhz", "u24", scale=1000),
+	Word("B", Bits("bandwidth_khz", 6, 2, labels={62.5: 0b00, 125.0: 0b01, 250.0: 0b10, 500.0: 0b11}),
+		Bits("sf", 3, 3, offset=6),
+		Bits("cr", 0, 3, offset=5)),
+	Word("B", Bits("TX_power_dbm", 3, 5, offset=-9)),
+	Field("duration", "B"))
+
+# PAYLOAD EXECUTION TEC
+register_codec(TEC_CRY_EXP, "Crystals experiment",
+	Word("u24", Bits("glass", 18, 6, labels={"Off": 0b000, "Dark": 0b001, "Light": 0b010}, repeat=2),
+		Bits("activation_delay", 0, 18)),
+	Word("u24", Bits("photodiode", 21, 3, labels={"No": 0b000, "Yes": 0b001}),
+		Bits("picture", 18, 3, labels={"No": 0b000, "Yes": 0b001}),
+		Bits("observation_delay", 0, 18)))
+
+# HOUSEKEEPING TER
+register_codec(TER_ACK, "ACK",
+	Field("task_ID", "B"))
+
+register_codec(TER_NACK, "NACK",
+	Field("task_ID", "B"),
+	Field("error_code", "b"))
+
+register_codec(TER_LORA_PONG, "LoRa ping",
+	Field("rssi", "f"),
+	Field("snr", "f"),
+	Field("deltaf", "f"))
+
+# ========== PUBLIC FUNCTIONS ==========
+
+# Encode the payload of a task, tasks without a registered layout have no payload
+def encode_payload(code, values=None):
+	"""Return the payload bytes: code - values (dict of fields)"""
+
+	codec = PAYLOAD_CODECS.get(code)
+	if codec is None:
+		if values:
+			raise ValueError(f"Task 0x{code:02X} has no payload fields")
+		return b''
+	return codec.encode(values or {})
+
+# Decode the payload of a task, None if it has no registered layout
+def decode_payload(code, payload, offset=0):
+	"""Return the dict of fields: code - payload - offset of the payload in the buffer"""
+
+	codec = PAYLOAD_CODECS.get(code)
+	return codec.decode(payload, offset) if codec is not None else None
+
+# Decode many payloads of the same task at once
+def decode_payloads(code, payloads):
+	"""Return a dict of arrays: code - payloads (uint8 array (n, size) or list of bytes/HEX strings of the same length)"""
+
+	codec = PAYLOAD_CODECS[code]
+	if not isinstance(payloads, np.ndarray):
+		rows = [bytes.fromhex(p) if isinstance(p, str) else bytes(p) for p in payloads]
+		payloads = np.frombuffer(b"".join(row[:codec.size] for row in rows), dtype=np.uint8).reshape(len(rows), codec.size)
+	return codec.decode_array(payloads)
+
+# Decode the payloads of whole packets, grouped by task code
+def decode_packets(packets):
+	"""Return {code: (indices, dict of arrays)} for the packets with a registered layout: packets (bytes or HEX strings)
+	Packets too short for their layout are skipped"""
+
+	groups = {}
+	for index, packet in enumerate(packets):
+		packet = bytes.fromhex(packet) if isinstance(packet, str) else bytes(packet)
+		codec = PAYLOAD_CODECS.get(packet[2]) if len(packet) > 2 else None
+		if codec is None or len(packet) < PACKET_HEADER_LENGTH + codec.size:
+			continue
+		indices, rows = groups.setdefault(codec.code, ([], []))
+		indices.append(index)
+		rows.append(packet[PACKET_HEADER_LENGTH:PACKET_HEADER_LENGTH + codec.size])
+
+	return {code: (np.array(indices), decode_payloads(code, rows)) for code, (indices, rows) in groups.items()}
+
+# Fields of the TLE update payload from the two TLE lines
+def tle_values(text):
+	"""Return the TLE update fields: text (two TLE lines)"""
+
+	tle_lines = text.strip().splitlines()
+	if len(tle_lines) < 2:
+		raise ValueError("TLE Data must contain two lines")
+
+	tle_line1 = tle_lines[0]
+	tle_line2 = tle_lines[1]
+
+	# Validate TLE lengths
+	if len(tle_line1) != 69 or len(tle_line2) != 69:
+		raise ValueError("TLE lines must be 69 characters long")
+
+	try:
+		epoch_year = int(tle_line1[18:20])
+		epoch_year += 2000 if epoch_year < 57 else 1900
+		return {
+			"epoch_year": epoch_year,
+			"epoch_day": float(tle_line1[20:32]),
+			"mm_dot": float(tle_line1[33:43]),
+			"mm_ddot": float(f"{tle_line1[44:50].strip()}e{tle_line1[50:52]}"),
+			"bstar": float(f"{tle_line1[53:59].strip()}e{tle_line1[59:61]}"),
+			"inclination": float(tle_line2[8:16]),
+			"raan": float(tle_line2[17:25]),
+			"eccentricity": float(f"0.{tle_line2[26:33].strip()}"),
+			"arg_perigee": float(tle_line2[34:42]),
+			"mean_anomaly": float(tle_line2[43:51]),
+			"mean_motion": float(tle_line2[52:63]),
+			"rev_number": int(tle_line2[63:68]),
+		}
+	except Exception as e:
+		raise ValueError(f"Invalid TLE format: {e}")
@@ -0,0 +1,588 @@
+"""
+Satellite and GS LoRa board emulator over a pseudo-terminal
+
+Opens a pty that speaks the serial protocol of the GS firmware: "TEC:" lines or binary TEC frames in,
+"PACKET:"/"RSSI:"/"RADIO error:" lines or binary frames out, "RADIO:" and "SERIAL:" commands answered as
+esp32_gs_fun.cpp does. Behind it, the satellite replies as COMMS.cpp: NACK for invalid packets or a full
+command queue, ACK before the reboot and LoRa configuration TECs, ACK after execution, pong instead of the
+ACK of a LoRa ping, no TX when the LoRa state is off and no beacons when it is "Beacon off".
+
+The air link has a configurable loss, latency, bit error rate and beacon interval. Frames take their LoRa
+time on air and are only heard when both radios share frequency, bandwidth and SF. Each radio transmits as
+soon as its own queue has a frame: the link is half-duplex, frames overlapping on the channel are lost (a
+radio does not hear while it transmits). Every emulated duration is divided by speed, so the GUI and gsd can
+be loaded at 10-100x the real traffic rate.
+
+Usage: python -m groundstation.sat_emulator [--loss 0.1] [--latency 0.2] [--ber 1e-4] [--beacon 10] [--speed 50]
+		[--file 12=picture.jpg] - then connect the GUI or gsd to the printed pty path
+"""
+
+import argparse
+import binascii
+import heapq
+import os
+import pty
+import random
+import select
+import signal
+import struct
+import sys
+import time
+import tty
+from collections import deque
+
+import numpy as np
+
+try:
+	from . import GS_task as gt
+	from . import payload_codec as pc
+	from . import bulk_download as bd
+except ImportError:
+	import GS_task as gt
+	import payload_codec as pc
+	import bulk_download as bd
+
+# ========== CONSTANTS AND CONFIGURATION ==========
+
+EMULATOR_BOOT_TIME = 1735689600 # [unix] 2025-01-01, clock of the satellite after a reboot until SET_TIME
+EMULATOR_SOURCE = "RedPill" # TX_SOURCES label of MISSION_ID, the station ID of the satellite
+EMULATOR_BEACON_INTERVAL = 30.0 # [s] 0 disables the beacons
+EMULATOR_EXEC_TIME = 0.05 # [s] execution of a TEC by the satellite
+EMULATOR_GS_TURNAROUND = 0.02 # [s] serial input handling of the GS board before the TX starts
+EMULATOR_QUEUE_SIZE = 8 # COMMS_QUEUE_SIZE: events waiting on the satellite (commands and packets to send)
+EMULATOR_QUEUE_RESERVED = 2 # COMMS_QUEUE_RESERVED: slots a new command can not take
+EMULATOR_RSSI = -105.0 # [dBm] mean RSSI of the link
+EMULATOR_SNR = 6.0 # [dB] mean SNR of the link
+EMULATOR_FREQ_ERROR = 150.0 # [Hz] standard deviation of the frequency error
+EMULATOR_READ_SIZE = 4096 # [bytes] pty read size
+EMULATOR_WRITE_TIMEOUT = 1.0 # [s] real time waited for a slow client before dropping serial output
+
+PACKET_SIZE_MAX = 128 # [bytes] longest frame accepted by both firmwares
+LORA_DEFAULT_FREQUENCY = 436.0 # [MHz] LORA_FREQ of both firmwares
+LORA_DEFAULT_POWER = 22 # [dBm] LORA_PWR of the satellite firmware
+LORA_BANDWIDTHS = (62.5, 125.0, 250.0, 500.0) # [kHz] 2 bits code of TEC_LORA_CONFIG
+RADIOLIB_ERR_CRC_MISMATCH = -7 # reception error reported for a corrupted frame
+
+BEACON_STRUCT = struct.Struct(">IH") # uptime [s], beacon counter
+
+# TECs known by the satellite firmware (isTEC), the download TECs are added when files are served
+SATELLITE_TECS = frozenset((gt.TEC_OBC_REBOOT, gt.TEC_EXIT_STATE, gt.TEC_VAR_CHANGE, gt.TEC_SET_TIME, gt.TEC_EPS_REBOOT,
+							gt.TEC_ADCS_REBOOT, gt.TEC_ADCS_TLE, gt.TEC_LORA_STATE, gt.TEC_LORA_CONFIG, gt.TEC_LORA_PING, gt.TEC_CRY_EXP))
+ACK_BEFORE_TECS = frozenset((gt.TEC_OBC_REBOOT, gt.TEC_LORA_CONFIG)) # isACKNeededBefore
+NO_ACK_TECS = frozenset((gt.TEC_LORA_PING,)) # isACKNeeded
+
+# ========== RADIO ==========
+
+# Radio settings: only radios on the same frequency, bandwidth and SF hear each other (the CR is in the LoRa header)
+class Radio:
+	__slots__ = ("frequency", "config", "power")
+
+	def __init__(self, frequency=LORA_DEFAULT_FREQUENCY, config=gt.LORA_DEFAULT_CONFIG, power=LORA_DEFAULT_POWER):
+		self.frequency = frequency
+		self.config = config
+		self.power = power
+
+	def hears(self, other):
+		return (self.frequency == other.frequency and self.config.bw == other.config.bw and self.config.sf == other.config.sf)
+
+# ========== EMULATOR ==========
+
+class SatelliteEmulator:
+	"""GS board and satellite sharing one emulated LoRa channel, driven by an event heap in emulated seconds.
+	loss - probability of losing a frame - latency [s] added to each frame - ber - bit error rate on air
+	beacon_interval [s] - speed: emulated seconds per real second - files: {file ID: bytes} for the download TECs"""
+
+	def __init__(self, loss=0.0, latency=0.0, ber=0.0, beacon_interval=EMULATOR_BEACON_INTERVAL, speed=1.0, files=None, seed=None):
+		self.loss = loss
+		self.latency = latency
+		self.ber = ber
+		self.beacon_interval = beacon_interval
+		self.speed = speed
+		self.random = random.Random(seed)
+		self.rng = np.random.default_rng(seed) # number of bit errors of a frame
+		self.download_source = bd.DownloadSource(files) if files else None
+		self.tecs = SATELLITE_TECS | frozenset(gt.TEC_DATA_REPLIES[gt.TER_DOWNLOAD] if files else ())
+
+		self.master = None
+		self.slave = None
+		self.start = None
+		self.events = [] # (emulated time, order, function, args)
+		self.order = 0
+		self.on_air = [] # frames on the channel: [end, collided]
+		self.serial_buffer = bytearray()
+		self.serial_binary = False
+
+		# GS board
+		self.gs_radio = Radio()
+		self.gs_tx = deque() # packets queued for TX
+		self.gs_busy = False
+
+		# Satellite
+		self.sat_radio = Radio()
+		self.sat_tx = deque() # packets (bytes) waiting for the radio
+		self.sat_busy = False
+		self.commands = deque() # TECs waiting for execution
+		self.executing = False
+		self.clock_offset = EMULATOR_BOOT_TIME # satellite time = offset + emulated time
+		self.boot_time = 0.0
+		self.tx_state = gt.BYTE_TX_ON
+		self.rs_enabled = False
+		self.beacons = 0
+		self.timers = {} # timer name -> token of the pending timer, replaced timers find another token and do nothing
+
+		self.stats = {"gs_tx": 0, "sat_tx": 0, "lost": 0, "collisions": 0, "not_heard": 0, "corrupted": 0, "acks": 0, "nacks": 0, "beacons": 0, "queue_full": 0, "serial_dropped": 0}
+
+	# ========== EVENT LOOP ==========
+
+	# Open the pty, return the path to give to the GUI or gsd
+	def open(self):
+		self.master, self.slave = pty.openpty()
+		tty.setraw(self.slave)
+		os.set_blocking(self.master, False)
+		self.start = time.monotonic()
+		if self.beacon_interval > 0:
+			self.schedule(self.beacon_interval, self.send_beacon)
+		return os.ttyname(self.slave)
+
+	def close(self):
+		for fd in (self.master, self.slave):
+			if fd is not None:
+				os.close(fd)
+		self.master = self.slave = None
+
+	# Emulated seconds since open
+	def now(self):
+		return (time.monotonic() - self.start) * self.speed
+
+	# Run function(*args) after delay emulated seconds
+	def schedule(self, delay, function, *args):
+		self.order += 1
+		heapq.heappush(self.events, (self.now() + delay, self.order, function, args))
+		return self.order
+
+	# Serve the pty until duration emulated seconds have passed (forever if None)
+	def run(self, duration=None):
+		end = None if duration is None else self.now() + duration
+		while end is None or self.now() < end:
+			now = self.now()
+			while self.events and self.events[0][0] <= now:
+				_, _, function, args = heapq.heappop(self.events)
+				function(*args)
+
+			# Sleep until the next event or serial input
+			wait = None if not self.events else max(0.0, (self.events[0][0] - self.now()) / self.speed)
+			if end is not None:
+				remaining = max(0.0, (end - self.now()) / self.speed)
+				wait = remaining if wait is None else min(wait, remaining)
+			readable, _, _ = select.select([self.master], [], [], wait)
+			if readable:
+				try:
+					data = os.read(self.master, EMULATOR_READ_SIZE)
+				except OSError:
+					data = b"" # no client connected to the pty
+				if data:
+					self.serial_input(data)
+
+	# ========== GS BOARD: SERIAL ==========
+
+	# Write to the pty, dropping what a missing or stalled client does not read (as the USB serial of the board)
+	def write(self, data):
+		view = memoryview(data)
+		while view:
+			try:
+				view = view[os.write(self.master, view):]
+			except BlockingIOError:
+				if not select.select([], [self.master], [], EMULATOR_WRITE_TIMEOUT)[1]:
+					self.stats["serial_dropped"] += len(view)
+					return
+
+	def write_line(self, line):
+		self.write((line + "\n").encode('utf-8'))
+
+	# Split the serial input into binary frames and lines
+	def serial_input(self, data):
+		buffer = self.serial_buffer
+		buffer += data
+		while buffer:
+			if buffer[:1] == gt.SERIAL_FRAME_SYNC[:1]:
+				if len(buffer) < gt.SERIAL_FRAME_HEADER_LENGTH:
+					return
+				frame_end = gt.SERIAL_FRAME_HEADER_LENGTH + buffer[3] + gt.SERIAL_FRAME_CRC_LENGTH
+				if len(buffer) < frame_end:
+					return
+				self.serial_frame(bytes(buffer[:frame_end]))
+				del buffer[:frame_end]
+				continue
+
+			line_end = buffer.find(b"\n")
+			if line_end == -1:
+				return
+			line = buffer[:line_end].decode('ascii', 'ignore').strip()
+			del buffer[:line_end + 1]
+			if line:
+				self.serial_line(line)
+
+	def serial_frame(self, frame):
+		crc = int.from_bytes(frame[-gt.SERIAL_FRAME_CRC_LENGTH:], byteorder='big')
+		if frame[:2] != gt.SERIAL_FRAME_SYNC or binascii.crc_hqx(frame[2:-gt.SERIAL_FRAME_CRC_LENGTH], gt.SERIAL_FRAME_CRC_INIT) != crc:
+			self.write_line("FRAME error: CRC mismatch")
+		elif frame[2] != gt.SERIAL_FRAME_TEC:
+			self.write_line(f"FRAME error: unexpected kind 0x{frame[2]:02X}")
+		else:
+			self.queue_tec(frame[gt.SERIAL_FRAME_HEADER_LENGTH:-gt.SERIAL_FRAME_CRC_LENGTH])
+
+	def serial_line(self, line):
+		if line.startswith("TEC:"):
+			try:
+				data = bytes(int(token, 16) for token in line[4:].split())
+			except ValueError:
+				data = b""
+			self.queue_tec(data)
+
+		elif line.startswith("RADIO:"):
+			params = line[6:].split()
+			if len(params) != 5:
+				self.report_radio_error("expected 5 parameters (F, BW, SF, CR, Power)")
+				return
+			try:
+				frequency, bw = float(params[0]), float(params[1])
+				sf, cr, power = int(params[2]), int(params[3]), int(params[4])
+			except ValueError:
+				# The firmware reads garbage as 0, which the radio refuses: nothing is applied here
+				self.report_radio_error(f"failed to apply {' '.join(params)} (invalid number)")
+				return
+			self.gs_radio = Radio(frequency, gt.LoRaConfig(bw, sf, cr), power)
+			self.write_line(f"RADIO settings: F {frequency:.2f} MHz, BW {bw:.2f} kHz, SF {sf}, CR {cr}, Power {power} dBm")
+
+		elif line.startswith("SERIAL:"):
+			mode = line[7:].strip()
+			if mode.startswith("BAUD"):
+				try:
+					baud = int(mode[4:])
+				except ValueError:
+					baud = 0 # toInt() of the firmware
+				if baud in gt.SERIAL_BAUD_RATES:
+					self.write_line(f"{gt.SERIAL_PREFIX_BAUD} {baud}") # the pty has no baud rate
+				else:
+					self.write_line(f"SERIAL error: unsupported baud rate {baud}")
+				return
+			if mode in (gt.SERIAL_MODE_BINARY, gt.SERIAL_MODE_TEXT):
+				self.serial_binary = mode == gt.SERIAL_MODE_BINARY
+			self.write_line(f"{gt.SERIAL_PREFIX_MODE} {gt.SERIAL_MODE_BINARY if self.serial_binary else gt.SERIAL_MODE_TEXT}")
+
+		else:
+			self.write_line("Unrecognized line format")
+
+	# Packet received from serial: checked as dataToPacket does, then queued for TX
+	def queue_tec(self, data):
+		if not data:
+			self.write_line("PACKET error: No valid data")
+			return
+		error = packet_error(data)
+		if error != gt.PACKET_ERR_NONE:
+			self.write_line(f"Invalid packet. Error: {error}")
+			return
+		self.write_line(f"Packet queued ({len(data)} bytes): {data.hex(' ').upper()}")
+		self.gs_tx.append(bytes(data))
+		if not self.gs_busy:
+			self.gs_busy = True
+			self.schedule(EMULATOR_GS_TURNAROUND, self.gs_transmit)
+
+	def report_packet(self, data):
+		if self.serial_binary:
+			self.write(gt.build_serial_frame(gt.SERIAL_FRAME_PACKET, data))
+		else:
+			self.write_line(f"{gt.SERIAL_PREFIX_PACKET} {data.hex(' ').upper()}")
+
+	def report_rssi(self, rssi, snr, freq_error):
+		if self.serial_binary:
+			self.write(gt.build_serial_frame(gt.SERIAL_FRAME_RSSI, gt.SERIAL_FRAME_RSSI_STRUCT.pack(rssi, snr, freq_error)))
+		else:
+			self.write_line(f"{gt.SERIAL_PREFIX_RSSI} {rssi:.2f} SNR: {snr:.2f} dF: {freq_error:.2f}")
+
+	def report_radio_error(self, message):
+		if self.serial_binary:
+			self.write(gt.build_serial_frame(gt.SERIAL_FRAME_RADIO_ERROR, message.encode('utf-8')))
+		else:
+			self.write_line(f"{gt.SERIAL_PREFIX_RADIO_ERROR} {message}")
+
+	# ========== AIR LINK ==========
+
+	# Transmit a frame on the shared channel now, deliver it to receive(frame, corrupted) at the end
+	# Frames overlapping in time are all lost: either the listener was transmitting or it heard two frames at once
+	def air(self, frame, radio, listener, receive, done):
+		now = self.now()
+		airtime = gt.lora_time_on_air(len(frame), radio.config)
+		transmission = [now + airtime, False]
+		for other in self.on_air:
+			if other[0] > now:
+				other[1] = transmission[1] = True
+		self.on_air.append(transmission)
+		self.schedule(airtime, done)
+		self.schedule(airtime, self.air_end, transmission, frame, radio, listener, receive)
+
+	# End of a frame on air: collision, loss, reception on another channel or bit errors
+	def air_end(self, transmission, frame, radio, listener, receive):
+		self.on_air.remove(transmission)
+		if transmission[1]:
+			self.stats["collisions"] += 1
+			return
+		if self.random.random() < self.loss:
+			self.stats["lost"] += 1
+			return
+		if not listener.hears(radio):
+			self.stats["not_heard"] += 1
+			return
+
+		corrupted = False
+		flips = int(self.rng.binomial(8 * len(frame), self.ber)) if self.ber > 0 else 0
+		if flips:
+			frame = bytearray(frame)
+			for bit in self.random.sample(range(8 * len(frame)), flips):
+				frame[bit >> 3] ^= 1 << (bit & 7)
+			frame = bytes(frame)
+			corrupted = True
+			self.stats["corrupted"] += 1
+		self.schedule(self.latency, receive, frame, corrupted)
+
+	def link_report(self):
+		return (round(self.random.gauss(EMULATOR_RSSI, 1.0), 2), round(self.random.gauss(EMULATOR_SNR, 0.5), 2),
+				round(self.random.gauss(0.0, EMULATOR_FREQ_ERROR), 2))
+
+	# GS board TX: packets are sent one after the other, RS encoded when the ECC flag is set
+	def gs_transmit(self):
+		if not self.gs_tx:
+			self.gs_busy = False
+			return
+		packet_bytes = self.gs_tx.popleft()
+		frame = gt.ecc_encode(packet_bytes) if packet_bytes[1] == gt.BYTE_RS_ON else packet_bytes
+		self.stats["gs_tx"] += 1
+		self.air(frame, self.gs_radio, self.sat_radio, self.sat_receive, self.gs_transmit)
+
+	# GS board RX: decode the ECC (always tried after a reception error) and report packet and RSSI
+	def gs_receive(self, frame, corrupted):
+		if corrupted:
+			self.write_line(f"Reception error: {RADIOLIB_ERR_CRC_MISMATCH}")
+		if corrupted or gt.is_data_ecc_enabled(frame):
+			decoded, _, _ = gt.ecc_decode(frame) if len(frame) % gt.RS_BLOCK_SIZE == 0 else (frame, None, None)
+			frame = bytes(decoded)
+		self.report_packet(frame)
+		self.report_rssi(*self.link_report())
+
+	# ========== SATELLITE ==========
+
+	# Satellite clock [unix s]
+	def unix_time(self):
+		return int(self.clock_offset + self.now())
+
+	# Queue a packet for the satellite radio (priority: ACK/NACK, sent before the others)
+	# The event queue of the firmware is full with EMULATOR_QUEUE_SIZE events: the packet is lost (bounded=False: download chunks)
+	def sat_send(self, ter, payload, ecc, priority=False, bounded=True):
+		if bounded and len(self.commands) + len(self.sat_tx) >= EMULATOR_QUEUE_SIZE:
+			self.stats["queue_full"] += 1
+			return
+		if ter == gt.TER_BEACON:
+			ecc = False # beacons are never RS encoded
+		packet_bytes = gt.build_packet(EMULATOR_SOURCE, ter, payload, ecc, unix_time=self.unix_time())
+		if priority:
+			self.sat_tx.appendleft(packet_bytes)
+		else:
+			self.sat_tx.append(packet_bytes)
+		if not self.sat_busy:
+			self.sat_busy = True
+			self.schedule(0.0, self.sat_transmit)
+
+	def send_ack(self, ecc, tec):
+		self.stats["acks"] += 1
+		self.sat_send(gt.TER_ACK, bytes([tec]), ecc, priority=True)
+
+	def send_nack(self, ecc, tec, error):
+		self.stats["nacks"] += 1
+		self.sat_send(gt.TER_NACK, bytes([tec, error & 0xFF]), ecc, priority=True)
+
+	def sat_transmit(self):
+		while self.sat_tx:
+			packet_bytes = self.sat_tx.popleft()
+			if self.tx_state == gt.BYTE_TX_OFF or (self.tx_state == gt.BYTE_TX_NOBEACON and packet_bytes[2] == gt.TER_BEACON):
+				continue # transmission is off, packet skipped
+			frame = gt.ecc_encode(packet_bytes) if self.rs_enabled and packet_bytes[1] == gt.BYTE_RS_ON else packet_bytes
+			self.stats["sat_tx"] += 1
+			self.air(frame, self.sat_radio, self.gs_radio, self.gs_receive, self.sat_transmit)
+			return
+		self.sat_busy = False
+
+	# Satellite RX (COMMS_RX): decode, validate, queue the command, NACK or early ACK
+	def sat_receive(self, frame, corrupted):
+		ecc = corrupted or gt.is_data_ecc_enabled(frame)
+		error = gt.PACKET_ERR_NONE
+		if ecc:
+			if len(frame) % gt.RS_BLOCK_SIZE:
+				error = gt.PACKET_ERR_DECODE
+			else:
+				decoded, error, _ = gt.ecc_decode(frame)
+				frame = bytes(decoded)
+		if error == gt.PACKET_ERR_NONE:
+			error = packet_error(frame, self.tecs)
+		ecc = len(frame) > 1 and frame[1] == gt.BYTE_RS_ON
+		tec = frame[2] if len(frame) > 2 else 0
+		if error == gt.PACKET_ERR_NONE:
+			self.rs_enabled = ecc
+			if EMULATOR_QUEUE_SIZE - len(self.commands) - len(self.sat_tx) <= EMULATOR_QUEUE_RESERVED:
+				error = gt.PACKET_ERR_CMD_FULL
+
+		if error != gt.PACKET_ERR_NONE:
+			self.send_nack(self.rs_enabled, tec, error)
+			return
+
+		packet = gt.decode_packet(frame)
+		self.commands.append((tec, ecc, bytes(packet.payload_bytes)))
+		if tec in ACK_BEFORE_TECS:
+			self.send_ack(self.rs_enabled, tec)
+		if not self.executing:
+			self.executing = True
+			self.schedule(EMULATOR_EXEC_TIME, self.execute_next)
+
+	# COMMS_CMD: execute the oldest command, then ACK or NACK it
+	def execute_next(self):
+		if not self.commands:
+			self.executing = False
+			return
+		tec, ecc, payload = self.commands.popleft()
+		error = self.execute(tec, ecc, payload)
+		if error is None:
+			return # rebooted
+		if error != gt.PACKET_ERR_NONE:
+			self.send_nack(ecc, tec, error)
+		elif tec not in NO_ACK_TECS:
+			self.send_ack(ecc, tec)
+		self.schedule(EMULATOR_EXEC_TIME, self.execute_next)
+
+	# executeTEC: return the error code, None after a reboot
+	def execute(self, tec, ecc, payload):
+		if tec == gt.TEC_OBC_REBOOT:
+			self.reboot()
+			return None
+
+		elif tec == gt.TEC_SET_TIME:
+			if len(payload) < 4:
+				return gt.PACKET_ERR_CMD_PAYLOAD
+			self.clock_offset = int.from_bytes(payload[:4], byteorder='big') - self.now()
+
+		elif tec == gt.TEC_LORA_PING:
+			rssi, snr, freq_error = self.link_report()
+			self.sat_send(gt.TER_LORA_PING, pc.encode_payload(gt.TER_LORA_PING, {"rssi": rssi, "snr": snr, "deltaf": freq_error}), self.rs_enabled)
+
+		elif tec == gt.TEC_LORA_STATE:
+			if len(payload) < 4:
+				return gt.PACKET_ERR_CMD_PAYLOAD
+			self.tx_state = payload[0] & 0x0F
+			duration = int.from_bytes(payload[1:4], byteorder='big')
+			self.set_timer("lora_state", duration, self.revert_lora_state)
+
+		elif tec == gt.TEC_LORA_CONFIG:
+			if len(payload) < 6:
+				return gt.PACKET_ERR_CMD_PAYLOAD
+			frequency = int.from_bytes(payload[:3], byteorder='big') // 1000
+			bw = LORA_BANDWIDTHS[(payload[3] >> 6) & 0b11]
+			sf = ((payload[3] >> 3) & 0b111) + 6
+			cr = (payload[3] & 0b111) + 5
+			power = ((payload[4] >> 3) & 0b11111) - 9
+			if not (400 <= frequency <= 500 and 6 <= sf <= 12 and 5 <= cr <= 8 and -9 <= power <= 22):
+				return gt.PACKET_ERR_CMD_PAYLOAD
+			self.sat_radio = Radio(float(frequency), gt.LoRaConfig(bw, sf, cr), power)
+			self.set_timer("lora_config", payload[5], self.revert_lora_config)
+
+		elif tec in gt.TEC_DATA_REPLIES[gt.TER_DOWNLOAD] and self.download_source is not None:
+			try:
+				chunks = self.download_source.serve(payload)
+			except (KeyError, ValueError):
+				return gt.PACKET_ERR_CMD_PAYLOAD
+			for chunk in chunks:
+				self.sat_send(gt.TER_DOWNLOAD, chunk, self.rs_enabled, bounded=False)
+
+		return gt.PACKET_ERR_NONE
+
+	# One-shot timer replacing the previous one of the same name (deleteTimerIfExists + createDelayedCommand)
+	def set_timer(self, name, duration, function):
+		self.timers.pop(name, None)
+		if duration > 0:
+			token = self.timers[name] = object()
+			self.schedule(duration, self.fire_timer, name, token, function)
+
+	def fire_timer(self, name, token, function):
+		if self.timers.get(name) is token:
+			del self.timers[name]
+			function()
+
+	def revert_lora_state(self):
+		self.tx_state = gt.BYTE_TX_ON
+
+	def revert_lora_config(self):
+		self.sat_radio = Radio()
+
+	# HAL_NVIC_SystemReset: queues, timers, radio and clock back to the boot state
+	def reboot(self):
+		self.commands.clear()
+		self.sat_tx.clear()
+		self.timers.clear()
+		self.executing = False
+		self.sat_radio = Radio()
+		self.tx_state = gt.BYTE_TX_ON
+		self.rs_enabled = False
+		self.clock_offset = EMULATOR_BOOT_TIME - self.now()
+		self.boot_time = self.now()
+
+	def send_beacon(self):
+		self.beacons += 1
+		self.stats["beacons"] += 1
+		self.sat_send(gt.TER_BEACON, BEACON_STRUCT.pack(int(self.now() - self.boot_time), self.beacons & 0xFFFF), False)
+		self.schedule(self.beacon_interval, self.send_beacon)
+
+	def describe(self):
+		return ", ".join(f"{name} {value}" for name, value in self.stats.items())
+
+# Packet check of dataToPacket: error code of a received packet (the MAC is not checked, as in the firmware)
+def packet_error(data, tecs=None):
+	if len(data) < gt.PACKET_HEADER_LENGTH or len(data) > PACKET_SIZE_MAX:
+		return gt.PACKET_ERR_LENGTH
+	if data[1] not in (gt.BYTE_RS_ON, gt.BYTE_RS_OFF):
+		return gt.PACKET_ERR_RS
+	if tecs is not None and data[2] not in tecs:
+		return gt.PACKET_ERR_CMD_UNKNOWN
+	if len(data) < gt.PACKET_HEADER_LENGTH + data[3]:
+		return gt.PACKET_ERR_LENGTH
+	return gt.PACKET_ERR_NONE
+
+# ========== MAIN ==========
+
+# "ID=path" of a --file option
+def file_option(value):
+	file_id, _, path = value.partition("=")
+	with open(path, "rb") as f:
+		return int(file_id), f.read()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Satellite and GS LoRa board emulator over a pseudo-terminal")
+	parser.add_argument("--loss", type=float, default=0.0, help="probability of losing a frame")
+	parser.add_argument("--latency", type=float, default=0.0, help="delay added to each frame [s]")
+	parser.add_argument("--ber", type=float, default=0.0, help="bit error rate on air")
+	parser.add_argument("--beacon", type=float, default=EMULATOR_BEACON_INTERVAL, help="beacon interval [s], 0 to disable")
+	parser.add_argument("--speed", type=float, default=1.0, help="emulated seconds per real second")
+	parser.add_argument("--file", type=file_option, action="append", default=[], help="ID=path of a file for the download TECs")
+	parser.add_argument("--seed", type=int, default=None)
+	parser.add_argument("--duration", type=float, default=None, help="emulated seconds to run, forever if omitted")
+	args = parser.parse_args(argv)
+
+	emulator = SatelliteEmulator(args.loss, args.latency, args.ber, args.beacon, args.speed, dict(args.file), args.seed)
+	signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # print the statistics when terminated
+	print(f"[INFO] Emulator on {emulator.open()}", flush=True)
+	try:
+		emulator.run(args.duration)
+	except KeyboardInterrupt:
+		pass
+	finally:
+		print(f"[INFO] {emulator.describe()}")
+		emulator.close()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,76 @@
+"""Fragmentation and reassembly of payloads over numbered segments"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GS_task as gt
+
+class Clock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+def segments(data, transfer_id, segment_size=50):
+	return [gt.parse_segment(payload) for payload in gt.split_payload(data, transfer_id, segment_size)]
+
+def reassemble(reassembler, data_segments):
+	results = [reassembler.add(segment) for segment in data_segments]
+	return [payload for payload in results if payload is not None]
+
+def test_out_of_order_and_duplicates():
+	data = bytes(range(256)) * 2
+	reassembler = gt.Reassembler(clock=Clock())
+	parts = segments(data, 3)
+	assert reassemble(reassembler, parts[::-1] + parts[:1]) == [data]
+	assert reassembler.completed == 1
+	assert reassembler.duplicates == 1
+
+def test_late_repeat_then_transfer_id_reuse():
+	clock = Clock()
+	reassembler = gt.Reassembler(clock=clock)
+	first = bytes([0xAA]) * 200
+	second = bytes([0xBB]) * 200 # same length: same number of segments
+	first_parts = segments(first, 7)
+	assert reassemble(reassembler, first_parts) == [first]
+
+	# Late repeat of a segment of the completed transfer: no ghost transfer
+	clock.now += 10.0
+	assert reassembler.add(first_parts[1]) is None
+	assert reassembler.duplicates == 1
+	assert reassembler.missing(7) is None
+
+	# Transfer ID reused for another payload with the same number of segments
+	clock.now += 10.0
+	assert reassemble(reassembler, segments(second, 7)) == [second]
+	assert reassembler.completed == 2
+
+def test_reuse_after_the_completed_window():
+	clock = Clock()
+	reassembler = gt.Reassembler(completed_window=60.0, clock=clock)
+	data = b"x" * 120
+	assert reassemble(reassembler, segments(data, 1)) == [data]
+	clock.now += 61.0
+	assert reassemble(reassembler, segments(data, 1)) == [data]
+
+def test_interleaved_transfer_restarts():
+	reassembler = gt.Reassembler(clock=Clock())
+	first = bytes([1]) * 150
+	second = bytes([2]) * 150
+	first_parts = segments(first, 9)
+	assert reassembler.add(first_parts[0]) is None
+	assert reassemble(reassembler, segments(second, 9)) == [second]
+	assert reassembler.dropped == 1
+
+def test_corrupted_segment_fails_the_crc():
+	reassembler = gt.Reassembler(clock=Clock())
+	parts = segments(b"y" * 100, 4)
+	parts[1] = parts[1]._replace(data=memoryview(b"z" * len(parts[1].data)))
+	with pytest.raises(ValueError):
+		reassemble(reassembler, parts)
+	assert reassembler.errors == 1
@@ -0,0 +1,38 @@
+"""Parquet export schema: column types come from the declared SQLite types"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database"))
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+import GS_task as gt
+import Jdata as jdb
+
+def test_null_then_float_column(tmp_path):
+	conn = jdb.database_initialization(str(tmp_path / "packets.db"))
+
+	# RSSI unknown for the packets of the first chunk, measured for the next ones
+	rows = []
+	for i in range(6):
+		rssi = None if i < 3 else f"{-100.5 - i}"
+		packet = gt.build_packet("UniPD", gt.TER_ACK, bytes([gt.TEC_LORA_PING]), False, unix_time=1700000000 + i)
+		rows.append((f"2025-01-01 10:00:0{i}", packet.hex(), rssi, rssi, rssi, ""))
+	ids, errors = jdb.save_packets_bulk(conn, rows)
+	assert not errors
+
+	path = tmp_path / "export.parquet"
+	done, _ = jdb.export_packets(conn, str(path), chunk_size=3)
+	conn.close()
+	assert done == 12 # 6 packets and their 6 ACK rows
+
+	table = pq.read_table(tmp_path / "export_packets.parquet")
+	assert table.schema.field("rssi").type == pa.float64()
+	assert table.schema.field("pl_length").type == pa.int64()
+	assert table.schema.field("comment").type == pa.string()
+	assert table.column("rssi").to_pylist() == [None, None, None, -103.5, -104.5, -105.5]